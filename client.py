@@ -1,13 +1,48 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 
+from routers.group_commands import group_command_router
 from routers.group_router import group_router
+from routers.group_upload import group_upload_router
+from routers.history import history_router, history_store
+from routers.pi_client import pi_client
+from routers.reconciler import reconcile_router, reconciler
+from routers.snapshot_router import snapshot_router
+from routers.status_router import status_poller, status_router
+from routers.sync_router import sync_router
+from routers.tv_routers import discovery
 from routers.tv_routers import router as get_all_pis_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Discovery runs in the background; startup never waits for it
+    await pi_client.start()
+    await discovery.start()
+    await history_store.start()
+    await status_poller.start()
+    await reconciler.start()
+    yield
+    await reconciler.stop()
+    await status_poller.stop()
+    await history_store.stop()
+    await discovery.stop()
+    await pi_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(get_all_pis_router, tags=["Clinet Router/ Get all PI's in network."])
+app.include_router(status_router, tags=["Fleet status"])
+app.include_router(snapshot_router, tags=["Fleet status"])
+app.include_router(history_router, tags=["Device history"])
 app.include_router(group_router, prefix="/groups", tags=["Groups"])
+app.include_router(group_command_router, prefix="/groups", tags=["Group commands"])
+app.include_router(group_upload_router, prefix="/groups", tags=["Group commands"])
+app.include_router(reconcile_router, prefix="/groups", tags=["Desired state"])
+app.include_router(sync_router, tags=["Content sync"])
 
 origins = ["*"]
 
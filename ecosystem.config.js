@@ -1,5 +1,34 @@
 module.exports = {
   apps: [
+    {
+      // Player daemon: owns VLC and the CEC bus. Restarting it blanks the TV,
+      // so deploys only reload python-server below.
+      name: 'tvs-player',
+      script: 'server/player.py',
+      interpreter: './venv/bin/python',
+
+      instances: 1,
+      autorestart: true,
+      watch: false,
+      // Last resort only: the player recycles its VLC instance in-process
+      // well below this (src/vlc_memory.py), so no nightly restart is needed
+      max_memory_restart: '800M',
+
+      env: {
+        PYTHONUNBUFFERED: '1',
+        TVS_PLAYER_SOCKET: 'player.sock'
+      },
+
+      error_file: 'logs/tvs-player-error.log',
+      out_file: 'logs/tvs-player-out.log',
+      merge_logs: true,
+
+      max_restarts: 10,
+      min_uptime: '10s',
+
+      kill_timeout: 5000,  // Time to checkpoint the playback position on SIGTERM
+      restart_delay: 3000
+    },
     {
       name: 'python-server',  // Name of your PM2 process
       script: 'server/server.py',  // Path to your Python script
@@ -14,12 +43,16 @@ module.exports = {
       // Environment variables
       env: {
         NODE_ENV: 'development',
-        PYTHONUNBUFFERED: '1'  // Ensures Python output is sent to PM2 logs immediately
+        PYTHONUNBUFFERED: '1',  // Ensures Python output is sent to PM2 logs immediately
+        TVS_PLAYER_SOCKET: 'player.sock',  // Talk to tvs-player instead of running VLC
+        TVS_API_WORKERS: '2'
       },
       
       env_production: {
         NODE_ENV: 'production',
-        PYTHONUNBUFFERED: '1'
+        PYTHONUNBUFFERED: '1',
+        TVS_PLAYER_SOCKET: 'player.sock',
+        TVS_API_WORKERS: '2'
       },
       
       // Error and output logs
@@ -27,9 +60,6 @@ module.exports = {
       out_file: 'logs/python-server-out.log',
       merge_logs: true,
       
-      // Time-based restart
-      cron_restart: '0 0 * * *',  // Restart at midnight every day
-      
       // Retry strategy
       max_restarts: 10,
       min_uptime: '10s',
@@ -3,7 +3,10 @@ import { useState, useEffect } from 'react';
 import { CardWrapper } from './PiCard/CardWrapper';
 import { VideoControls } from './PiCard/VideoControls';
 import { VideoList } from './PiCard/VideoList';
-import { deleteVideo, fetchPiStatus, isTVOn, pauseVideo, playVideo, stopVideo, uploadVideo } from '@/lib/api';
+import { fetchPiStatus, isTVOn } from '@/lib/api';
+import { deleteGroupVideo, pauseGroup, playGroup, stopGroup, uploadGroupVideo } from '@/lib/groupUtils';
+import { subscribeFleetStatus } from '@/lib/fleetEvents';
+import { useLibraries } from '@/hooks/useLibrary';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import { GroupHDMIStatus } from './GroupHDMIStatus';
 
@@ -39,8 +42,19 @@ export function GroupControl({ group }) {
 
   useEffect(() => {
     fetchAllStatuses();
-    const interval = setInterval(fetchAllStatuses, 60000);
-    return () => clearInterval(interval);
+    return subscribeFleetStatus((devices) => {
+      const statuses = {};
+      group.devices.forEach((device) => {
+        const live = devices[device.host];
+        if (!live) return;
+        statuses[device.host] = live.reachable
+          ? { status: live.status, tvStatus: live.tv_status, error: null }
+          : { status: null, tvStatus: false, error: 'Failed to fetch status' };
+      });
+      if (Object.keys(statuses).length > 0) {
+        setDeviceStatuses(prev => ({ ...prev, ...statuses }));
+      }
+    });
   }, [group]);
 
   const handleGroupAction = async (actionType, ...args) => {
@@ -48,52 +62,27 @@ export function GroupControl({ group }) {
       switch (actionType) {
         case 'upload': {
           const file = args[0];
-
-          const uploadPromises = group.devices.map(async device => {
-            try {
-              await uploadVideo(device.host, file);
-              return { device: device.name, success: true };
-            } catch (err) {
-              return { device: device.name, success: false, error: err.message };
-            }
-          });
-
-          const results = await Promise.all(uploadPromises);
-          const failures = results.filter(r => !r.success);
-          
-          if (failures.length > 0) {
-            const failureMessages = failures.map(f => `${f.device}: ${f.error}`).join('\n');
-            throw new Error(`Upload failed for some devices:\n${failureMessages}`);
-          }
+          await uploadGroupVideo(group.id, file);
           break;
         }
         case 'play': {
           const videoName = args[0];
-          await Promise.all(
-            group.devices.map(device => playVideo(device.host, videoName))
-          );
+          await playGroup(group.id, videoName);
           setCurrentVideo(videoName); 
           break;
         }
         case 'stop': {
-          await Promise.all(
-            group.devices.map(device => {stopVideo(device.host); console.log("Stopping the video for: ", device.host);})
-          );
+          await stopGroup(group.id);
           setCurrentVideo(null); 
           break;
         }
         case 'delete': {
           const videoName = args[0];
-          await Promise.all(
-            group.devices.map(device => deleteVideo(device.host, videoName))
-          );
+          await deleteGroupVideo(group.id, videoName);
           break;
         }
         case 'pause': {
-          await Promise.all(
-            group.devices.map(device => pauseVideo(device.host))
-            
-          );
+          await pauseGroup(group.id);
           break;
         }
         default:
@@ -109,16 +98,23 @@ export function GroupControl({ group }) {
     }
   };
 
+  const libraries = useLibraries(
+    Object.fromEntries(
+      Object.entries(deviceStatuses).map(([host, { status }]) => [host, status?.library?.version])
+    )
+  );
+  // Every video on at least one device of the group, once
+  const groupVideos = Object.values(
+    group.devices.flatMap(device => libraries[device.host] ?? []).reduce((videos, video) => {
+      videos[video.name] ??= video;
+      return videos;
+    }, {})
+  );
+
   const aggregateStatus = {
     isActive: Object.values(deviceStatuses).every(({ status }) => status),
     is_playing: Object.values(deviceStatuses).some(({ status }) => status?.is_playing),
     is_paused: Object.values(deviceStatuses).some(({ status }) => status?.is_paused),
-    available_videos: Object.values(deviceStatuses).reduce((videos, { status }) => {
-      if (status?.available_videos) {
-        return [...new Set([...videos, ...status.available_videos])];
-      }
-      return videos;
-    }, [])
   };
 
   return (
@@ -141,6 +137,7 @@ export function GroupControl({ group }) {
         isGroup
         host={group.devices[0]?.host}
         status={aggregateStatus}
+        videos={groupVideos}
         uploading={uploading}
         setUploading={setUploading}
         onAction={handleGroupAction}
@@ -149,8 +146,7 @@ export function GroupControl({ group }) {
       <VideoList
         isGroup
         host={group.devices[0]?.host}
-        videos={aggregateStatus.available_videos}
-        uploaded_on={[]}
+        videos={groupVideos}
         current_video={currentVideo} // Update this line
         is_playing={aggregateStatus.is_playing}
         is_paused={aggregateStatus.is_paused}
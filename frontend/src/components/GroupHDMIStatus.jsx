@@ -1,6 +1,7 @@
 // components/GroupHDMIStatus.jsx
 import { useState, useEffect } from 'react';
-import { getCurrentActiveDevice, fetch_hdmi_map, switchDevice } from '@/lib/api';
+import { fetch_hdmi_map, switchDevice } from '@/lib/api';
+import { subscribeFleetStatus } from '@/lib/fleetEvents';
 import { Button } from '@/components/ui/button';
 import { ChevronDown, ChevronUp, Monitor } from 'lucide-react';
 import { Alert, AlertDescription } from '@/components/ui/alert';
@@ -11,37 +12,48 @@ export function GroupHDMIStatus({ devices }) {
   const [isExpanded, setIsExpanded] = useState(false);
   const [error, setError] = useState(null);
 
-  const fetchAllStatuses = async () => {
-    const statuses = {};
+  // The HDMI maps rarely change: read them once per device list
+  const fetchHdmiMaps = async () => {
     const maps = {};
-    
+
     await Promise.all(
       devices.map(async (device) => {
         try {
-          const currentDevice = await getCurrentActiveDevice(device.host);
-          const hdmiMap = await fetch_hdmi_map(device.host);
-          statuses[device.host] = currentDevice?.current_input;
-          maps[device.host] = hdmiMap;
+          maps[device.host] = await fetch_hdmi_map(device.host);
         } catch (err) {
-          console.error(`Failed to fetch status for ${device.name}:`, err);
+          console.error(`Failed to fetch HDMI map for ${device.name}:`, err);
         }
       })
     );
 
-    setDeviceStatuses(statuses);
     setHdmiMaps(maps);
   };
 
+  // Active inputs come from the hub's status stream instead of polling each Pi
   useEffect(() => {
-    fetchAllStatuses();
-    const interval = setInterval(fetchAllStatuses, 30000);
-    return () => clearInterval(interval);
-  }, []);
+    fetchHdmiMaps();
+    return subscribeFleetStatus((live) => {
+      const statuses = {};
+      devices.forEach((device) => {
+        const current = live[device.host]?.current_input;
+        if (current !== undefined && current !== null) {
+          statuses[device.host] = parseInt(current);
+        }
+      });
+      if (Object.keys(statuses).length > 0) {
+        setDeviceStatuses(prev => ({ ...prev, ...statuses }));
+      }
+    });
+  }, [devices]);
+
+  const markSwitched = (host, port) => {
+    setDeviceStatuses(prev => ({ ...prev, [host]: parseInt(port) }));
+  };
 
   const handleDeviceSwitch = async (host, port) => {
     try {
       await switchDevice(host, port);
-      await fetchAllStatuses();
+      markSwitched(host, port);
       setError(null);
     } catch (err) {
       setError('Failed to switch device: ' + err.message);
@@ -63,11 +75,11 @@ export function GroupHDMIStatus({ devices }) {
         if (portEntry) {
           const [port] = portEntry;
           await switchDevice(device.host, port);
+          markSwitched(device.host, port);
         }
       });
 
       await Promise.all(switches);
-      await fetchAllStatuses();
     } catch (err) {
       setError('Failed to switch all devices: ' + err.message);
     }
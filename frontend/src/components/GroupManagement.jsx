@@ -211,7 +211,7 @@ export function GroupsList({ availablePis, onSelectGroup }) {
                 setEditingGroupId(groupId);
                 setShowEditModal(true);
               }}
-              onSelect={() => onSelectGroup(group)}
+              onSelect={() => onSelectGroup({ id: groupId, ...group })}
             />
           ))}
         </div>
@@ -7,6 +7,7 @@ import { playVideo, stopVideo, uploadVideo } from '@/lib/api'
 export function VideoControls({
   host,
   status,
+  videos = [],
   uploading,
   setUploading,
   onAction,
@@ -22,7 +23,7 @@ export function VideoControls({
     setIsPaused(status?.is_paused ?? false);
   }, [status]);
 
-  const availableVideos = status?.available_videos ?? [];
+  const availableVideos = videos.map(video => video.name).sort();
 
   const handleFileUpload = async (event) => {
     const file = event.target.files?.[0];
@@ -4,10 +4,27 @@ import { Button } from "@/components/ui/button";
 import { playVideo, deleteVideo, pauseVideo } from "@/lib/api";
 import { useState } from "react";
 
+const SORTS = {
+  name: (a, b) => a.name.localeCompare(b.name),
+  date: (a, b) => b.uploaded_at - a.uploaded_at,
+  size: (a, b) => b.size - a.size,
+  duration: (a, b) => (b.duration ?? -1) - (a.duration ?? -1),
+};
+
+function formatDate(timestamp) {
+  return timestamp ? new Date(timestamp * 1000).toLocaleString() : 'Unknown date';
+}
+
+function formatDuration(seconds) {
+  if (seconds == null) return null;
+  const minutes = Math.floor(seconds / 60);
+  return `${minutes}:${String(Math.round(seconds % 60)).padStart(2, '0')}`;
+}
+
+// videos: library entries { name, size, uploaded_at, duration }
 export function VideoList({
   host,
   videos = [],
-  uploaded_on = [],
   onAction,
   current_video,
   is_playing,
@@ -18,11 +35,9 @@ export function VideoList({
   const [isExpanded, setIsExpanded] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [videoToDelete, setVideoToDelete] = useState(null);
+  const [sort, setSort] = useState('name');
 
-  const videoMap = Array.isArray(videos) ? videos.reduce((map, video, index) => {
-    map[video] = uploaded_on[index] || 'Unknown date';
-    return map;
-  }, {}) : {};
+  const sortedVideos = Array.isArray(videos) ? [...videos].sort(SORTS[sort]) : [];
 
   const handleDelete = async () => {
     if (!videoToDelete) return;
@@ -86,7 +101,17 @@ export function VideoList({
 
       {isExpanded && (
         <div className="space-y-1">
-          {videos.map((video) => (
+          <select
+            value={sort}
+            onChange={(event) => setSort(event.target.value)}
+            className="text-sm border rounded p-1"
+          >
+            <option value="name">Name</option>
+            <option value="date">Newest</option>
+            <option value="size">Largest</option>
+            <option value="duration">Longest</option>
+          </select>
+          {sortedVideos.map(({ name: video, uploaded_at, duration }) => (
             <div
               key={video}
               className={`flex items-center justify-between p-2 ${
@@ -97,7 +122,10 @@ export function VideoList({
             >
               <span className="text-sm truncate flex-1">
                 {video} <br />
-                <span className={"text-xs"}>Upload: {videoMap[video]}</span>
+                <span className={"text-xs"}>
+                  Upload: {formatDate(uploaded_at)}
+                  {duration != null && ` · ${formatDuration(duration)}`}
+                </span>
               </span>
               <div className="flex gap-2">
                 {video === current_video && is_playing && !is_paused ? (
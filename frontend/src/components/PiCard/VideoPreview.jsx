@@ -1,44 +1,77 @@
-import { useState, useEffect, useRef } from "react";
+import { useState, useEffect } from "react";
 import { ChevronDown, ChevronUp } from "lucide-react";
 
+// Index of the two-byte JPEG marker 0xFF <code> in buffer, or -1
+function findMarker(buffer, code, from = 0) {
+  for (let i = from; i < buffer.length - 1; i++) {
+    if (buffer[i] === 0xff && buffer[i + 1] === code) return i;
+  }
+  return -1;
+}
+
 export function VideoPreview({ host, isPlaying, isPaused, authKey }) {
   const [isExpanded, setIsExpanded] = useState(false);
-  const [videoUrl, setVideoUrl] = useState(null);
-  const videoRef = useRef(null);
+  const [frameUrl, setFrameUrl] = useState(null);
 
   useEffect(() => {
-    if (isPlaying && !isPaused && isExpanded) {
-      const auth_token = sessionStorage.getItem("authToken");
-      const setupVideoStream = async () => {
-        try {
-          const response = await fetch(`http://${host}:8000/preview`, {
-            headers: {
-              'AUTH': auth_token
-            }
-          });
+    if (!isPlaying || !isExpanded) return;
+
+    // The live preview is an MJPEG stream; an <img> can't send the AUTH
+    // header, so frames are cut out of the fetched stream by JPEG markers
+    const controller = new AbortController();
+    let currentUrl = null;
+
+    const readStream = async () => {
+      try {
+        const auth_token = sessionStorage.getItem("authToken");
+        const response = await fetch(`http://${host}:8000/preview/live`, {
+          headers: {
+            'AUTH': auth_token
+          },
+          signal: controller.signal,
+        });
+
+        if (!response.ok) {
+          throw new Error('Failed to fetch live preview');
+        }
+
+        const reader = response.body.getReader();
+        let buffer = new Uint8Array(0);
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
 
-          if (!response.ok) {
-            throw new Error('Failed to fetch video stream');
-          }
+          const merged = new Uint8Array(buffer.length + value.length);
+          merged.set(buffer);
+          merged.set(value, buffer.length);
+          buffer = merged;
 
-          // Create a blob URL from the response
-          const blob = await response.blob();
-          const url = URL.createObjectURL(blob);
-          setVideoUrl(url);
+          const start = findMarker(buffer, 0xd8);
+          const end = start === -1 ? -1 : findMarker(buffer, 0xd9, start + 2);
+          if (end === -1) continue;
 
-          return () => {
-            if (url) {
-              URL.revokeObjectURL(url);
-            }
-          };
-        } catch (error) {
-          console.error('Error fetching video stream:', error);
+          const frame = new Blob([buffer.slice(start, end + 2)], { type: 'image/jpeg' });
+          buffer = buffer.slice(end + 2);
+          const url = URL.createObjectURL(frame);
+          setFrameUrl(url);
+          if (currentUrl) URL.revokeObjectURL(currentUrl);
+          currentUrl = url;
         }
-      };
+      } catch (error) {
+        if (error.name !== 'AbortError') {
+          console.error('Error reading live preview:', error);
+        }
+      }
+    };
+
+    readStream();
 
-      setupVideoStream();
-    }
-  }, [host, isPlaying, isPaused, isExpanded, authKey]);
+    return () => {
+      controller.abort();
+      if (currentUrl) URL.revokeObjectURL(currentUrl);
+      setFrameUrl(null);
+    };
+  }, [host, isPlaying, isExpanded, authKey]);
 
   return (
     <div>
@@ -46,7 +79,7 @@ export function VideoPreview({ host, isPlaying, isPaused, authKey }) {
         className="flex items-center justify-between cursor-pointer"
         onClick={() => setIsExpanded((prev) => !prev)}
       >
-        <p className="font-medium">Video Preview</p>
+        <p className="font-medium">Live Preview</p>
         {isExpanded ? (
           <ChevronUp className="h-4 w-4" />
         ) : (
@@ -55,24 +88,22 @@ export function VideoPreview({ host, isPlaying, isPaused, authKey }) {
       </div>
       {isExpanded && (
         <div className="relative aspect-video bg-gray-100 rounded-lg overflow-hidden">
-          {isPlaying && !isPaused ? (
-            <video
-              ref={videoRef}
-              key={`${host}-preview-${videoUrl}`}
-              src={videoUrl}
-              autoPlay
-              controls
-              muted
+          {isPlaying && frameUrl ? (
+            <img
+              src={frameUrl}
+              alt="Live preview"
               className="w-full h-full object-contain"
               style={{ maxHeight: '100%' }}
             />
           ) : (
             <div className="flex items-center justify-center h-full">
-              <p className="text-gray-500">No video playing</p>
+              <p className="text-gray-500">
+                {isPlaying ? "Connecting..." : "No video playing"}
+              </p>
             </div>
           )}
         </div>
       )}
     </div>
   );
-}
\ No newline at end of file
+}
@@ -8,6 +8,7 @@ import { VideoPreview } from "./VideoPreview";
 import { VideoControls } from "./VideoControls";
 import { VideoList } from "./VideoList";
 import { useStatus } from "@/hooks/useStatus";
+import { useLibrary } from "@/hooks/useLibrary";
 import Settings from "./Settings";
 import { useEffect } from "react";
 
@@ -16,6 +17,7 @@ export function PiCard({ pi }) {
   const [uploading, setUploading] = useState(false);
   const { status, error, tvStatus, refreshStatus, currentActivePort } = useStatus(pi.host);
   const [currentTVStatus, setCurrentTVStatus] = useState(false);
+  const videos = useLibrary(pi.host, status?.library?.version);
 
   useEffect(() => {
     if (tvStatus?.status === "on") {
@@ -41,6 +43,7 @@ export function PiCard({ pi }) {
       <VideoControls
         host={pi.host}
         status={status}
+        videos={videos}
         uploading={uploading}
         setUploading={setUploading}
         onAction={refreshStatus}
@@ -52,8 +55,7 @@ export function PiCard({ pi }) {
       />
       <VideoList
         host={pi.host}
-        videos={status?.available_videos || []}
-        uploaded_on={status?.date_uploaded || []}
+        videos={videos}
         onAction={refreshStatus}
         current_video={status?.current_video}
         is_playing={status?.is_playing}
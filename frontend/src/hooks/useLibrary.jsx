@@ -0,0 +1,32 @@
+// hooks/useLibrary.jsx
+
+import { useState, useEffect } from "react";
+import { syncLibrary } from "@/lib/library";
+
+// Video entries of several Pis, given the library version each one's status
+// reports: { host: version } -> { host: [{ name, size, uploaded_at, duration }] }
+export function useLibraries(versions) {
+  const [libraries, setLibraries] = useState({});
+  const key = JSON.stringify(versions);
+
+  useEffect(() => {
+    let cancelled = false;
+    Object.entries(versions).forEach(([host, version]) => {
+      if (version == null) return;
+      syncLibrary(host, version)
+        .then(library => {
+          if (cancelled) return;
+          setLibraries(prev => ({ ...prev, [host]: Object.values(library.videos) }));
+        })
+        .catch(err => console.error(`Failed to sync the library of ${host}:`, err));
+    });
+    return () => { cancelled = true; };
+  }, [key]);
+
+  return libraries;
+}
+
+export function useLibrary(host, version) {
+  const libraries = useLibraries({ [host]: version });
+  return libraries[host] ?? [];
+}
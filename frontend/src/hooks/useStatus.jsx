@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from "react";
 import { fetchPiStatus, getCurrentActiveDevice, isTVOn } from "@/lib/api";
+import { subscribeFleetStatus } from "@/lib/fleetEvents";
 
 export function useStatus(host) {
   const [status, setStatus] = useState(null);
@@ -24,10 +25,21 @@ export function useStatus(host) {
     }
   };
 
+  // Live updates come from the hub's event stream instead of polling the Pi
   useEffect(() => {
     refreshStatus();
-    const interval = setInterval(refreshStatus, 60000);
-    return () => clearInterval(interval);
+    return subscribeFleetStatus((devices) => {
+      const device = devices[host];
+      if (!device) return;
+      if (!device.reachable) {
+        setError("Failed to fetch status");
+        return;
+      }
+      setStatus(device.status);
+      setTVStatus(device.tv_status);
+      setCurrentActivePort(device.current_input);
+      setError(null);
+    });
   }, [host]);
 
   return { status, error, tvStatus, refreshStatus, currentActivePort };
@@ -43,6 +43,22 @@ export async function fetchPiStatus(host) {
   }
 }
 
+// Page of a Pi's video library, or with `since` the changes after that
+// version; null when the Pi no longer has those changes (410)
+export async function fetchLibrary(host, params = {}) {
+  const auth_token = sessionStorage.getItem("authToken");
+  const query = new URLSearchParams(params).toString();
+  const response = await fetch(`http://${host}:8000/library?${query}`, {
+    method: "GET",
+    headers: {
+      "AUTH": auth_token
+    }
+  });
+  if (response.status === 410) return null;
+  if (!response.ok) throw new Error(`Failed to fetch the video library: ${response.status}`);
+  return response.json();
+}
+
 // lib/api.js
 export async function uploadVideo(host, file) {
   const auth_token = sessionStorage.getItem("authToken");
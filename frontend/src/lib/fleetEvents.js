@@ -0,0 +1,88 @@
+// lib/fleetEvents.js
+
+// One Server-Sent Events connection to the hub per tab, shared by every
+// component that shows Pi status. The hub polls the Pis; dashboards only listen.
+const API_BASE_URL = process.env.NEXT_PUBLIC_ACTIVE_SERVER_HOSTNAME;
+const RECONNECT_DELAY = 5000;
+
+let source = null;
+let reconnectTimer = null;
+let connecting = false;
+const devices = {};
+const listeners = new Set();
+
+function notify() {
+  listeners.forEach(listener => listener({ ...devices }));
+}
+
+// EventSource can't send the AUTH header, so the stream is opened with a
+// one-time ticket the hub hands out for it
+async function fetchTicket() {
+  const auth_token = sessionStorage.getItem("authToken");
+  const response = await fetch(`http://${API_BASE_URL}:7777/pis/events/ticket`, {
+    method: "POST",
+    headers: { "AUTH": auth_token },
+  });
+  if (!response.ok) throw new Error(`Ticket request failed: ${response.status}`);
+  return (await response.json()).ticket;
+}
+
+function scheduleReconnect() {
+  if (listeners.size === 0 || reconnectTimer) return;
+  reconnectTimer = setTimeout(() => {
+    reconnectTimer = null;
+    if (listeners.size > 0 && !source && !connecting) connect();
+  }, RECONNECT_DELAY);
+}
+
+async function connect() {
+  let ticket;
+  connecting = true;
+  try {
+    ticket = await fetchTicket();
+  } catch (error) {
+    console.error("Fleet status stream unavailable:", error);
+    scheduleReconnect();
+    return;
+  } finally {
+    connecting = false;
+  }
+  if (listeners.size === 0) return;
+
+  const params = new URLSearchParams({ ticket });
+  source = new EventSource(`http://${API_BASE_URL}:7777/pis/events?${params}`);
+
+  source.addEventListener("snapshot", (event) => {
+    JSON.parse(event.data).devices.forEach(device => {
+      devices[device.host] = device;
+    });
+    notify();
+  });
+
+  source.addEventListener("device", (event) => {
+    const device = JSON.parse(event.data);
+    devices[device.host] = device;
+    notify();
+  });
+
+  // A ticket only opens one stream: reconnect with a new one
+  source.onerror = () => {
+    source.close();
+    source = null;
+    scheduleReconnect();
+  };
+}
+
+export function subscribeFleetStatus(listener) {
+  listeners.add(listener);
+  if (!source && !connecting && !reconnectTimer) connect();
+  listener({ ...devices });
+
+  return () => {
+    listeners.delete(listener);
+    if (listeners.size === 0 && source) {
+      source.close();
+      source = null;
+    }
+  };
+}
@@ -77,12 +77,84 @@ export async function deleteGroup(groupId) {
 
 export async function isDeviceInAnyGroup(deviceHost) {
   try {
-    const groups = await getGroups();
-    return Object.values(groups).some(group => 
-      group.devices.some(device => device.host === deviceHost)
+    const response = await fetch(
+      `http://${API_BASE_URL}:7777/groups/by-device/${encodeURIComponent(deviceHost)}`
     );
+    if (!response.ok) {
+      throw new Error('Failed to fetch device groups');
+    }
+    const result = await response.json();
+    return result.groups.length > 0;
   } catch (error) {
     console.error('Error checking device group membership:', error);
     return false;
   }
-}
\ No newline at end of file
+}
+
+
+// Group commands are fanned out to every member Pi by the hub
+async function sendGroupCommand(path, method, body) {
+  const auth_token = sessionStorage.getItem("authToken");
+  const headers = { "AUTH": auth_token };
+  if (body) headers['Content-Type'] = 'application/json';
+
+  const response = await fetch(`http://${API_BASE_URL}:7777/groups/${path}`, {
+    method,
+    headers,
+    body: body ? JSON.stringify(body) : undefined,
+  });
+  if (!response.ok) {
+    throw new Error(`Group command failed: ${response.status}`);
+  }
+
+  const result = await response.json();
+  if (result.failed > 0) {
+    const failureMessages = result.results
+      .filter(r => !r.ok)
+      .map(r => `${r.name}: ${typeof r.detail === 'string' ? r.detail : r.detail?.detail ?? 'failed'}`)
+      .join('\n');
+    throw new Error(`${result.action} failed for some devices:\n${failureMessages}`);
+  }
+  return result;
+}
+
+export async function playGroup(groupId, videoName) {
+  return sendGroupCommand(`${groupId}/play`, 'POST', { video_name: videoName });
+}
+
+export async function pauseGroup(groupId) {
+  return sendGroupCommand(`${groupId}/pause`, 'POST');
+}
+
+export async function stopGroup(groupId) {
+  return sendGroupCommand(`${groupId}/stop`, 'POST');
+}
+
+export async function deleteGroupVideo(groupId, videoName) {
+  return sendGroupCommand(`${groupId}/videos/${encodeURIComponent(videoName)}`, 'DELETE');
+}
+
+// The file is sent to the hub once; the hub streams it to every member Pi
+export async function uploadGroupVideo(groupId, file) {
+  const auth_token = sessionStorage.getItem("authToken");
+  const params = new URLSearchParams({ filename: file.name });
+
+  const response = await fetch(`http://${API_BASE_URL}:7777/groups/${groupId}/upload?${params}`, {
+    method: 'POST',
+    headers: { "AUTH": auth_token },
+    body: file,
+  });
+  if (!response.ok) {
+    throw new Error(`Failed to upload video: ${response.status} ${await response.text()}`);
+  }
+
+  const result = await response.json();
+  if (result.failed > 0) {
+    const failureMessages = result.results
+      .filter(r => r.state !== 'done')
+      .map(r => `${r.name}: ${r.error ?? r.state}`)
+      .join('\n');
+    throw new Error(`Upload failed for some devices:\n${failureMessages}`);
+  }
+  return result;
+}
@@ -0,0 +1,57 @@
+// lib/library.js
+
+import { fetchLibrary } from "@/lib/api";
+
+// Per-tab copy of every Pi's video library. A Pi's status only carries the
+// library version; when it moves, just the videos added and removed since
+// the cached version are fetched. The whole library is paged through the
+// first time, or when the Pi no longer has the changes.
+const PAGE_SIZE = 500;
+
+const libraries = {}; // host -> { version, videos: { name: entry } }
+const inflight = {}; // host -> Promise of the sync in progress
+
+async function catchUp(host, library) {
+  const changes = await fetchLibrary(host, { since: library.version });
+  if (!changes) return null;
+  const videos = { ...library.videos };
+  changes.removed.forEach(name => delete videos[name]);
+  changes.added.forEach(entry => { videos[entry.name] = entry; });
+  return { version: changes.version, videos };
+}
+
+async function listAll(host) {
+  // Stamped with the first page's version: anything that changes while
+  // paging is picked up by the next delta
+  const videos = {};
+  let cursor = null;
+  let version = null;
+  do {
+    const params = cursor ? { limit: PAGE_SIZE, cursor } : { limit: PAGE_SIZE };
+    const page = await fetchLibrary(host, params);
+    version ??= page.version;
+    page.items.forEach(entry => { videos[entry.name] = entry; });
+    cursor = page.next_cursor;
+  } while (cursor);
+  return { version, videos };
+}
+
+async function sync(host) {
+  const cached = libraries[host];
+  libraries[host] = (cached && await catchUp(host, cached)) || await listAll(host);
+  return libraries[host];
+}
+
+export function syncLibrary(host, version) {
+  const cached = libraries[host];
+  if (cached && cached.version === version) return Promise.resolve(cached);
+  if (inflight[host]) {
+    // The sync in progress may have started before `version` existed: once it
+    // settles, sync again if it didn't reach it
+    return inflight[host].then(library =>
+      library.version === version ? library : syncLibrary(host, version)
+    );
+  }
+  inflight[host] = sync(host).finally(() => { delete inflight[host]; });
+  return inflight[host];
+}
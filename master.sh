@@ -43,8 +43,11 @@ update_pi() {
             exit 1
         fi
 
+        # The player daemon keeps playing across API reloads; start it if missing
+        pm2 describe tvs-player > /dev/null 2>&1 || pm2 start ecosystem.config.js --only tvs-player
+
         echo '🔄 Restarting python-server PM2 instance...'
-        pm2 reload python-server
+        pm2 reload ecosystem.config.js --only python-server
         if [ \$? -ne 0 ]; then
             echo '❌ PM2 reload failed'
             exit 1
@@ -0,0 +1,34 @@
+import time
+from typing import Dict, Optional
+
+from routers.pi_client import pi_client
+
+CLOCK_SAMPLES = 8
+
+
+async def estimate_offset(
+    host: str, token: Optional[str], samples: int = CLOCK_SAMPLES
+) -> Dict[str, float]:
+    """
+    Estimate the offset of a Pi's clock relative to the hub's, NTP style.
+
+    Each sample records hub send time t0, Pi receive time t1, Pi send time t2
+    and hub receive time t3. The sample with the shortest round trip is the
+    least disturbed by queueing, so its offset is used; half its round trip
+    bounds the error.
+
+    Returns offset (Pi clock minus hub clock), round trip and error bound,
+    all in seconds.
+    """
+    best = None
+    for _ in range(samples):
+        t0 = time.time()
+        stamps = await pi_client.get_json(host, "/clock", token=token)
+        t3 = time.time()
+        t1, t2 = stamps["received_at"], stamps["sent_at"]
+        round_trip = (t3 - t0) - (t2 - t1)
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        if best is None or round_trip < best["round_trip"]:
+            best = {"offset": offset, "round_trip": round_trip}
+    best["error_bound"] = best["round_trip"] / 2
+    return best
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CONTENT_DIR = Path("group_content")
+MANIFEST_NAME = "manifest.json"
+
+
+def group_dir(group_id: str) -> Path:
+    return CONTENT_DIR / group_id
+
+
+def content_path(group_id: str, filename: str) -> Path:
+    return group_dir(group_id) / Path(filename).name
+
+
+def load_manifest(group_id: str) -> Dict[str, Any]:
+    """Manifest of a group's content: {"files": {name: {size, sha256, updated_at}}}"""
+    manifest_file = group_dir(group_id) / MANIFEST_NAME
+    try:
+        if manifest_file.exists():
+            with open(manifest_file, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading manifest for {group_id}: {e}")
+    return {"files": {}}
+
+
+def save_manifest(group_id: str, manifest: Dict[str, Any]) -> None:
+    directory = group_dir(group_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_file = directory / f"{MANIFEST_NAME}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, directory / MANIFEST_NAME)
+
+
+def remove_file(group_id: str, filename: str) -> bool:
+    """Retire a file from a group's content; returns False if it wasn't there"""
+    manifest = load_manifest(group_id)
+    if manifest["files"].pop(filename, None) is None:
+        return False
+    save_manifest(group_id, manifest)
+    content_path(group_id, filename).unlink(missing_ok=True)
+    return True
+
+
+def remove_group(group_id: str) -> None:
+    shutil.rmtree(group_dir(group_id), ignore_errors=True)
+
+
+class ContentWriter:
+    """
+    Write an incoming upload into a group's content store.
+
+    Chunks are hashed as they arrive and written off the event loop; the file
+    only appears in the manifest once `commit()` is called.
+    """
+
+    def __init__(self, group_id: str, filename: str):
+        self.group_id = group_id
+        self.filename = Path(filename).name
+        group_dir(group_id).mkdir(parents=True, exist_ok=True)
+        self.tmp_path = content_path(group_id, f".{self.filename}.part")
+        self.file = open(self.tmp_path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    async def write(self, chunk: bytes):
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        await asyncio.to_thread(self.file.write, chunk)
+
+    def commit(self) -> Dict[str, Any]:
+        self.file.close()
+        os.replace(self.tmp_path, content_path(self.group_id, self.filename))
+        entry = {
+            "size": self.size,
+            "sha256": self.sha256.hexdigest(),
+            "updated_at": time.time(),
+        }
+        manifest = load_manifest(self.group_id)
+        manifest["files"][self.filename] = entry
+        save_manifest(self.group_id, manifest)
+        return entry
+
+    def abort(self):
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def find_content(group_id: str, filename: str) -> Optional[Path]:
+    if filename not in load_manifest(group_id)["files"]:
+        return None
+    path = content_path(group_id, filename)
+    return path if path.exists() else None
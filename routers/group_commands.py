@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel, Field
+
+from routers import content_store
+from routers.clock_sync import estimate_offset
+from routers.group_store import group_store
+from routers.pi_client import CircuitOpenError, pi_client
+from routers.reconciler import reconciler
+
+logger = logging.getLogger(__name__)
+
+group_command_router = APIRouter()
+
+MAX_PARALLEL_DEVICES = 16
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+COMMAND_TIMEOUT = 15.0
+# The start is at least this long after the last Pi is ready, plus twice
+# the slowest round trip per batch of /play_at calls so every one arrives
+# before it
+SYNC_START_MARGIN = 0.5
+SYNC_REPORT_MARGIN = 0.5
+# Repeating these can't do a command twice; other methods are only retried
+# when the request never reached the Pi
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+# Errors raised before a request was sent
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class GroupPlayRequest(BaseModel):
+    video_name: str
+
+
+class GroupSyncedPlayRequest(BaseModel):
+    video_name: str
+    # Seconds from ready to start; never less than the round trips require
+    start_delay: Optional[float] = Field(None, gt=0)
+
+
+def get_group_devices(group_id: str) -> List[Dict[str, str]]:
+    group = group_store.get(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return group["devices"]
+
+
+async def send_with_retries(
+    device: Dict[str, str],
+    method: str,
+    path: str,
+    token: Optional[str],
+    semaphore: asyncio.Semaphore,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Send one command to one Pi.
+
+    Network errors and 5xx answers are retried with exponential backoff; a 4xx
+    answer is the Pi's final word and is returned as is. A command that isn't
+    idempotent (POST) is only retried if it never reached the Pi, so a Pi
+    that acted but answered too slowly doesn't get it twice.
+    """
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    result = {"name": device["name"], "host": device["host"], "ok": False}
+    start = time.perf_counter()
+    delay = RETRY_BACKOFF
+    async with semaphore:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            result["attempts"] = attempt
+            try:
+                response = await pi_client.request(
+                    device["host"],
+                    method,
+                    path,
+                    token=token,
+                    timeout=COMMAND_TIMEOUT,
+                    **kwargs,
+                )
+                result["status_code"] = response.status_code
+                result["ok"] = response.is_success
+                try:
+                    result["detail"] = response.json()
+                except ValueError:
+                    result["detail"] = response.text
+                if response.status_code < 500 or not idempotent:
+                    break
+            except CircuitOpenError as e:
+                result["detail"] = str(e)
+                break
+            except httpx.HTTPError as e:
+                result["detail"] = str(e) or type(e).__name__
+                if not idempotent and not isinstance(e, NOT_SENT_ERRORS):
+                    break
+            if attempt < MAX_ATTEMPTS:
+                await asyncio.sleep(delay)
+                delay *= 2
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+async def fan_out(
+    group_id: str,
+    action: str,
+    method: str,
+    path: str,
+    token: Optional[str],
+    **kwargs,
+) -> Dict[str, Any]:
+    """Run the same command on every member of a group and aggregate the results"""
+    devices = get_group_devices(group_id)
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_DEVICES)
+    results = await asyncio.gather(
+        *(
+            send_with_retries(device, method, path, token, semaphore, **kwargs)
+            for device in devices
+        )
+    )
+    succeeded = sum(1 for result in results if result["ok"])
+    if results and succeeded < len(results):
+        logger.warning(
+            f"Group {group_id} {action}: {len(results) - succeeded} of "
+            f"{len(results)} devices failed"
+        )
+    return {
+        "group_id": group_id,
+        "action": action,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+@group_command_router.post("/{group_id}/play")
+async def play_group(
+    group_id: str, request: GroupPlayRequest, AUTH: str | None = Header(None)
+):
+    """Play a video on every device of the group"""
+    reconciler.follow(
+        group_id, video=request.video_name, playlist=None, playback="playing"
+    )
+    return await fan_out(
+        group_id, "play", "POST", "/play", AUTH, json=request.model_dump()
+    )
+
+
+@group_command_router.post("/{group_id}/pause")
+async def pause_group(group_id: str, AUTH: str | None = Header(None)):
+    """Pause playback on every device of the group"""
+    reconciler.follow(group_id, playback="paused")
+    return await fan_out(group_id, "pause", "POST", "/pause", AUTH)
+
+
+@group_command_router.post("/{group_id}/resume")
+async def resume_group(group_id: str, AUTH: str | None = Header(None)):
+    """Resume playback on every device of the group"""
+    reconciler.follow(group_id, playback="playing")
+    return await fan_out(group_id, "resume", "POST", "/resume", AUTH)
+
+
+@group_command_router.post("/{group_id}/stop")
+async def stop_group(group_id: str, AUTH: str | None = Header(None)):
+    """Stop playback on every device of the group"""
+    reconciler.follow(group_id, playback="stopped")
+    return await fan_out(group_id, "stop", "POST", "/stop", AUTH)
+
+
+@group_command_router.delete("/{group_id}/videos/{video_name}")
+async def delete_group_video(
+    group_id: str, video_name: str, AUTH: str | None = Header(None)
+):
+    """Delete a video from every device of the group and retire it from sync"""
+    content_store.remove_file(group_id, video_name)
+    path = f"/video/{quote(video_name, safe='')}"
+    return await fan_out(group_id, "delete", "DELETE", path, AUTH)
+
+
+async def prepare_device(
+    device: Dict[str, str],
+    video_name: str,
+    token: Optional[str],
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    """Measure a Pi's clock offset, then have it pre-load the video paused"""
+    result = {"name": device["name"], "host": device["host"], "ok": False}
+    async with semaphore:
+        try:
+            result["clock"] = await estimate_offset(device["host"], token)
+            response = await pi_client.request(
+                device["host"],
+                "POST",
+                "/prepare",
+                token=token,
+                timeout=COMMAND_TIMEOUT,
+                json={"video_name": video_name},
+            )
+            result["ok"] = response.is_success
+            if not response.is_success:
+                result["detail"] = response.text
+        except (CircuitOpenError, httpx.HTTPError) as e:
+            result["detail"] = str(e) or type(e).__name__
+    return result
+
+
+@group_command_router.post("/{group_id}/play_synced")
+async def play_group_synced(
+    group_id: str, request: GroupSyncedPlayRequest, AUTH: str | None = Header(None)
+):
+    """
+    Start a video on every device of the group at the same instant.
+
+    Every Pi's clock offset is estimated and the video is pre-loaded paused
+    everywhere. Once all Pis are ready a start time T is chosen on the hub's
+    clock and each Pi is told to start at T translated to its own clock. The
+    measured start skew of each Pi is collected and reported together with
+    the offset error bound, which together bound the real start error.
+
+    Pis that were prepared but couldn't be scheduled are told to /play
+    right away rather than being left paused and muted.
+    """
+    devices = get_group_devices(group_id)
+    reconciler.follow(
+        group_id, video=request.video_name, playlist=None, playback="playing"
+    )
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_DEVICES)
+    prepared = await asyncio.gather(
+        *(
+            prepare_device(device, request.video_name, AUTH, semaphore)
+            for device in devices
+        )
+    )
+    ready = [result for result in prepared if result["ok"]]
+
+    # The /play_at calls go out MAX_PARALLEL_DEVICES at a time
+    slowest = max((r["clock"]["round_trip"] for r in ready), default=0)
+    waves = -(-len(ready) // MAX_PARALLEL_DEVICES)
+    delay = 2 * slowest * max(waves, 1) + SYNC_START_MARGIN
+    if request.start_delay is not None:
+        delay = max(delay, request.start_delay)
+    start_at = time.time() + delay
+
+    async def schedule_start(result: Dict[str, Any]):
+        local_start = start_at + result["clock"]["offset"]
+        async with semaphore:
+            try:
+                response = await pi_client.request(
+                    result["host"],
+                    "POST",
+                    "/play_at",
+                    token=AUTH,
+                    json={"start_at": local_start},
+                )
+                result["ok"] = response.is_success
+                if not response.is_success:
+                    result["detail"] = response.text
+            except (CircuitOpenError, httpx.HTTPError) as e:
+                result["ok"] = False
+                result["detail"] = str(e) or type(e).__name__
+            if not result["ok"]:
+                await start_unsynced(result)
+
+    async def start_unsynced(result: Dict[str, Any]):
+        try:
+            response = await pi_client.request(
+                result["host"],
+                "POST",
+                "/play",
+                token=AUTH,
+                timeout=COMMAND_TIMEOUT,
+                json={"video_name": request.video_name},
+            )
+            result["fallback"] = "play" if response.is_success else "failed"
+        except (CircuitOpenError, httpx.HTTPError):
+            result["fallback"] = "failed"
+
+    await asyncio.gather(*(schedule_start(result) for result in ready))
+
+    await asyncio.sleep(max(start_at - time.time(), 0) + SYNC_REPORT_MARGIN)
+
+    async def collect_report(result: Dict[str, Any]):
+        if not result["ok"]:
+            return
+        async with semaphore:
+            try:
+                report = await pi_client.get_json(
+                    result["host"], "/play_at", token=AUTH
+                )
+                result["skew_ms"] = report.get("skew_ms")
+                result["error_bound_ms"] = round(
+                    result["clock"]["error_bound"] * 1000, 3
+                )
+            except (CircuitOpenError, httpx.HTTPError) as e:
+                result["detail"] = str(e) or type(e).__name__
+
+    await asyncio.gather(*(collect_report(result) for result in prepared))
+
+    skews = [r["skew_ms"] for r in prepared if r.get("skew_ms") is not None]
+    succeeded = sum(1 for result in prepared if result["ok"])
+    return {
+        "group_id": group_id,
+        "action": "play_synced",
+        "start_at": start_at,
+        "start_delay": round(delay, 3),
+        "succeeded": succeeded,
+        "failed": len(prepared) - succeeded,
+        "max_skew_ms": max(skews) if skews else None,
+        "skew_spread_ms": round(max(skews) - min(skews), 3) if skews else None,
+        "results": prepared,
+    }
@@ -1,18 +1,17 @@
-import json
 import logging
-import time as import_time
-from pathlib import Path
-from typing import Dict, List
+from typing import List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
+from routers import content_store
+from routers.group_store import group_store
+from routers.http_cache import conditional_json, make_etag
+
 logger = logging.getLogger(__name__)
 
 group_router = APIRouter()
 
-GROUPS_FILE = Path("groups.json")
-
 
 class Device(BaseModel):
     name: str
@@ -29,54 +28,35 @@ class GroupUpdate(BaseModel):
     devices: List[Device]
 
 
-def load_groups() -> Dict:
-    """Load groups from JSON file"""
-    try:
-        if GROUPS_FILE.exists():
-            with open(GROUPS_FILE, "r") as f:
-                return json.load(f)
-        return {}
-    except Exception as e:
-        logger.error(f"Error loading groups: {e}")
-        return {}
+@group_router.get("")
+async def get_groups(request: Request):
+    """Get all groups"""
+    return conditional_json(request, make_etag(group_store.version), group_store.all)
 
 
-def save_groups(groups: Dict) -> None:
-    """Save groups to JSON file"""
-    try:
-        with open(GROUPS_FILE, "w") as f:
-            json.dump(groups, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving groups: {e}")
-        raise HTTPException(status_code=500, detail="Failed to save groups")
+@group_router.get("/by-device/{host}")
+async def get_device_groups(host: str):
+    """Ids of the groups a device (by host) belongs to"""
+    return {"host": host, "groups": sorted(group_store.groups_for_device(host=host))}
 
 
-@group_router.get("")
-async def get_groups():
-    """Get all groups"""
-    try:
-        groups = load_groups()
-        return groups
-    except Exception as e:
-        logger.error(f"Error getting groups: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@group_router.get("/{group_id}")
+async def get_group(group_id: str):
+    """Get a single group"""
+    group = group_store.get(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return {"id": group_id, **group}
 
 
 @group_router.post("")
 async def create_group(group: Group):
     """Create a new group"""
     try:
-        groups = load_groups()
-        group_id = f"group_{len(groups) + 1}"
-
-        groups[group_id] = {
-            "name": group.name,
-            "devices": [device.dict() for device in group.devices],
-            "createdAt": import_time.time(),
-        }
-
-        save_groups(groups)
-        return {"id": group_id, **groups[group_id]}
+        group_id = group_store.create(
+            group.name, [device.model_dump() for device in group.devices]
+        )
+        return {"id": group_id, **group_store.get(group_id)}
     except Exception as e:
         logger.error(f"Error creating group: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -85,22 +65,14 @@ async def create_group(group: Group):
 @group_router.put("/{group_id}")
 async def update_group(group_id: str, group_update: GroupUpdate):
     """Update an existing group"""
+    if group_store.get(group_id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
     try:
-        groups = load_groups()
-        if group_id not in groups:
-            raise HTTPException(status_code=404, detail="Group not found")
-
-        groups[group_id].update(
-            {
-                "name": group_update.name,
-                "devices": [device.dict() for device in group_update.devices],
-            }
+        return group_store.update(
+            group_id,
+            name=group_update.name,
+            devices=[device.model_dump() for device in group_update.devices],
         )
-
-        save_groups(groups)
-        return groups[group_id]
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Error updating group: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -109,16 +81,12 @@ async def update_group(group_id: str, group_update: GroupUpdate):
 @group_router.delete("/{group_id}")
 async def delete_group(group_id: str):
     """Delete a group"""
+    if group_store.get(group_id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
     try:
-        groups = load_groups()
-        if group_id not in groups:
-            raise HTTPException(status_code=404, detail="Group not found")
-
-        del groups[group_id]
-        save_groups(groups)
+        group_store.delete(group_id)
+        content_store.remove_group(group_id)
         return {"message": "Group deleted successfully"}
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Error deleting group: {e}")
         raise HTTPException(status_code=500, detail=str(e))
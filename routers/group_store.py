@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+GROUPS_FILE = Path("groups.json")
+
+
+class GroupStore:
+    """
+    In-memory group store backed by groups.json.
+
+    The file is read once at startup and rewritten atomically (temp file and
+    rename) after every change. Reverse indexes from device host and device
+    name to group ids answer membership questions without scanning groups.
+    """
+
+    def __init__(self, path: Path = GROUPS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.groups: Dict[str, Dict] = self._load()
+        # Bumped on every change; starts at the process start time so
+        # versions (and the ETags built from them) never repeat across restarts
+        self.version = int(time.time() * 1000)
+        self.by_host: Dict[str, Set[str]] = {}
+        self.by_name: Dict[str, Set[str]] = {}
+        for group_id, group in self.groups.items():
+            self._index(group_id, group)
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            if self.path.exists():
+                with open(self.path, "r") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading groups: {e}")
+        return {}
+
+    def _save(self):
+        tmp_file = self.path.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self.groups, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        self.version += 1
+
+    def _index(self, group_id: str, group: Dict):
+        for device in group["devices"]:
+            self.by_host.setdefault(device["host"], set()).add(group_id)
+            self.by_name.setdefault(device["name"], set()).add(group_id)
+
+    def _unindex(self, group_id: str, group: Dict):
+        for index, key in ((self.by_host, "host"), (self.by_name, "name")):
+            for device in group["devices"]:
+                members = index.get(device[key])
+                if members is not None:
+                    members.discard(group_id)
+                    if not members:
+                        del index[device[key]]
+
+    def _new_id(self) -> str:
+        while True:
+            group_id = f"group_{uuid.uuid4().hex[:8]}"
+            if group_id not in self.groups:
+                return group_id
+
+    def all(self) -> Dict[str, Dict]:
+        return self.groups
+
+    def get(self, group_id: str) -> Optional[Dict]:
+        return self.groups.get(group_id)
+
+    def create(self, name: str, devices: List[Dict]) -> str:
+        with self._lock:
+            group_id = self._new_id()
+            group = {"name": name, "devices": devices, "createdAt": time.time()}
+            self.groups[group_id] = group
+            self._index(group_id, group)
+            self._save()
+            return group_id
+
+    def update(self, group_id: str, **fields) -> Dict:
+        with self._lock:
+            group = self.groups[group_id]
+            self._unindex(group_id, group)
+            group.update(fields)
+            self._index(group_id, group)
+            self._save()
+            return group
+
+    def delete(self, group_id: str) -> None:
+        with self._lock:
+            group = self.groups.pop(group_id)
+            self._unindex(group_id, group)
+            self._save()
+
+    def groups_for_device(
+        self, host: Optional[str] = None, name: Optional[str] = None
+    ) -> Set[str]:
+        """Ids of the groups a device belongs to, matched by host or name"""
+        group_ids = set(self.by_host.get(host, ())) if host else set()
+        if name:
+            group_ids |= self.by_name.get(name, set())
+        return group_ids
+
+
+# Global store shared by all hub routers
+group_store = GroupStore()
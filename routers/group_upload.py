@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from fastapi import APIRouter, Header, HTTPException, Request
+from starlette.requests import ClientDisconnect
+
+from routers.content_store import ContentWriter
+from routers.group_commands import get_group_devices
+from routers.pi_client import CircuitOpenError, pi_client
+
+logger = logging.getLogger(__name__)
+
+group_upload_router = APIRouter()
+
+ALLOWED_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov"}
+BUFFERED_CHUNKS = 16  # per device; the slowest Pi throttles the incoming stream
+PUT_POLL_INTERVAL = 1.0
+UPLOAD_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+MAX_TRACKED_UPLOADS = 20
+
+# upload_id -> progress document, oldest first
+uploads: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def multipart_parts(filename: str, boundary: str):
+    safe_name = filename.replace('"', "%22")
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head, tail
+
+
+async def device_body(
+    queue: asyncio.Queue, progress: Dict[str, Any], head: bytes, tail: bytes
+) -> AsyncIterator[bytes]:
+    """Multipart body for one Pi, fed chunk by chunk from its queue"""
+    yield head
+    while True:
+        chunk = await queue.get()
+        if chunk is None:
+            break
+        progress["sent_bytes"] += len(chunk)
+        yield chunk
+    yield tail
+
+
+async def upload_to_device(
+    device: Dict[str, str],
+    queue: asyncio.Queue,
+    progress: Dict[str, Any],
+    filename: str,
+    token: Optional[str],
+):
+    boundary = uuid.uuid4().hex
+    head, tail = multipart_parts(filename, boundary)
+    progress["state"] = "uploading"
+    try:
+        response = await pi_client.request(
+            device["host"],
+            "POST",
+            "/upload",
+            token=token,
+            timeout=UPLOAD_TIMEOUT,
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            content=device_body(queue, progress, head, tail),
+        )
+        progress["status_code"] = response.status_code
+        progress["state"] = "done" if response.is_success else "failed"
+        if not response.is_success:
+            progress["error"] = response.text
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        progress["state"] = "failed"
+        progress["error"] = str(e) or type(e).__name__
+
+
+async def put_chunk(queue: asyncio.Queue, task: asyncio.Task, chunk: Optional[bytes]):
+    """Block until the device accepts the chunk, unless its upload already ended"""
+    while not task.done():
+        try:
+            await asyncio.wait_for(queue.put(chunk), PUT_POLL_INTERVAL)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+def track_upload(upload_id: str, job: Dict[str, Any]):
+    uploads[upload_id] = job
+    while len(uploads) > MAX_TRACKED_UPLOADS:
+        uploads.popitem(last=False)
+
+
+@group_upload_router.post("/{group_id}/upload")
+async def upload_to_group(
+    group_id: str,
+    request: Request,
+    filename: str,
+    upload_id: Optional[str] = None,
+    AUTH: str | None = Header(None),
+):
+    """
+    Stream one uploaded video to every device of the group.
+
+    The request body is the raw file. It is read once and each chunk is handed
+    to every member Pi's upload as it arrives; per-device queues are bounded so
+    a slow Pi slows the incoming stream down instead of filling memory.
+    The file is also kept in the group's content store, so Pis that missed the
+    upload pull it later through the sync manifest.
+    Progress can be followed at GET /groups/uploads/{upload_id}.
+    """
+    if Path(filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            400, f"Unsupported file type. Allowed types: {ALLOWED_EXTENSIONS}"
+        )
+    devices = get_group_devices(group_id)
+    upload_id = upload_id or uuid.uuid4().hex
+
+    content_length = request.headers.get("content-length")
+    job = {
+        "upload_id": upload_id,
+        "group_id": group_id,
+        "filename": filename,
+        "total_bytes": int(content_length) if content_length else None,
+        "received_bytes": 0,
+        "started_at": time.time(),
+        "finished_at": None,
+        "devices": {
+            device["host"]: {
+                "name": device["name"],
+                "state": "pending",
+                "sent_bytes": 0,
+            }
+            for device in devices
+        },
+    }
+    # Before any device task exists: nothing would feed them if this raised
+    writer = ContentWriter(group_id, filename)
+    track_upload(upload_id, job)
+
+    queues = {d["host"]: asyncio.Queue(maxsize=BUFFERED_CHUNKS) for d in devices}
+    tasks = {
+        d["host"]: asyncio.create_task(
+            upload_to_device(
+                d, queues[d["host"]], job["devices"][d["host"]], filename, AUTH
+            )
+        )
+        for d in devices
+    }
+
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            job["received_bytes"] += len(chunk)
+            await asyncio.gather(
+                writer.write(chunk),
+                *(put_chunk(queues[host], task, chunk) for host, task in tasks.items()),
+            )
+        job["content"] = writer.commit()
+        await asyncio.gather(
+            *(put_chunk(queues[host], task, None) for host, task in tasks.items())
+        )
+        await asyncio.gather(*tasks.values())
+    except ClientDisconnect:
+        # Abort the device uploads so no Pi keeps a truncated file
+        writer.abort()
+        for task in tasks.values():
+            task.cancel()
+        for progress in job["devices"].values():
+            if progress["state"] not in ("done", "failed"):
+                progress["state"] = "aborted"
+        logger.warning(f"Group upload {upload_id} aborted by the client")
+        raise HTTPException(400, "Upload aborted by the client")
+    except BaseException:
+        writer.abort()
+        for task in tasks.values():
+            task.cancel()
+        raise
+    finally:
+        job["finished_at"] = time.time()
+
+    results = [
+        {"host": host, **progress} for host, progress in job["devices"].items()
+    ]
+    succeeded = sum(1 for result in results if result["state"] == "done")
+    return {
+        "upload_id": upload_id,
+        "group_id": group_id,
+        "action": "upload",
+        "filename": filename,
+        "received_bytes": job["received_bytes"],
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+@group_upload_router.get("/uploads/{upload_id}")
+async def get_upload_progress(upload_id: str):
+    """Per-device progress of a group upload"""
+    if upload_id not in uploads:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return uploads[upload_id]
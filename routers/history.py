@@ -0,0 +1,397 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import APIRouter, HTTPException
+
+from routers.status_router import POLL_INTERVAL, status_poller
+
+logger = logging.getLogger(__name__)
+
+history_router = APIRouter()
+
+HISTORY_DIR = Path("device_history")
+PERSIST_INTERVAL = 300  # seconds between writes of the rollups to disk
+
+RAW_CAPACITY = 1440  # 6 hours of samples at the 15 s poll interval
+ROLLUPS = {
+    # resolution -> (bucket seconds, buckets kept)
+    "5m": (300, 2016),  # 7 days
+    "1h": (3600, 2160),  # 90 days
+}
+MAX_VIDEOS = 64  # distinct video names remembered per device
+
+# Bits of the raw sample flags column
+REACHABLE, TV_ON, PLAYING, PAUSED = 1, 2, 4, 8
+
+RAW_COLUMNS = {
+    "t": "d",
+    "flags": "B",
+    "latency_ms": "f",
+    "error_count": "i",
+    "video": "h",
+}
+ROLLUP_COLUMNS = {
+    "t": "d",
+    "samples": "I",
+    "reachable": "I",
+    "tv_on": "I",
+    "playing": "I",
+    "latency_sum": "f",
+    "latency_max": "f",
+    "error_count": "i",
+    "video": "h",
+}
+
+
+class RingBuffer:
+    """Fixed-capacity table of numeric columns, each stored in an array"""
+
+    def __init__(self, columns: Dict[str, str], capacity: int):
+        self.capacity = capacity
+        self.columns = {
+            name: array(typecode, [0]) * capacity for name, typecode in columns.items()
+        }
+        self.start = 0
+        self.size = 0
+
+    def append(self, row: Dict[str, Any]):
+        index = (self.start + self.size) % self.capacity
+        for name, column in self.columns.items():
+            column[index] = row[name]
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def rows(self, since: float = 0, until: float = float("inf")) -> Iterator[Dict]:
+        """Rows with since <= t < until, oldest first"""
+        t = self.columns["t"]
+        for offset in range(self.size):
+            index = (self.start + offset) % self.capacity
+            if since <= t[index] < until:
+                yield {name: column[index] for name, column in self.columns.items()}
+
+    def oldest(self) -> Optional[float]:
+        return self.columns["t"][self.start] if self.size else None
+
+    def dump(self) -> Dict[str, str]:
+        """Columns in time order, base64 encoded"""
+        dumped = {}
+        for name, column in self.columns.items():
+            ordered = column[self.start :] + column[: self.start]
+            dumped[name] = base64.b64encode(ordered[: self.size].tobytes()).decode()
+        return dumped
+
+    def load(self, dumped: Dict[str, str]):
+        for name, column in self.columns.items():
+            values = array(column.typecode)
+            values.frombytes(base64.b64decode(dumped[name]))
+            values = values[-self.capacity :]
+            column[: len(values)] = values
+            self.size = len(values)
+        self.start = 0
+
+
+class DeviceHistory:
+    """Raw samples and downsampled rollups of one device"""
+
+    def __init__(self):
+        self.raw = RingBuffer(RAW_COLUMNS, RAW_CAPACITY)
+        self.rollups = {
+            resolution: RingBuffer(ROLLUP_COLUMNS, capacity)
+            for resolution, (_, capacity) in ROLLUPS.items()
+        }
+        # resolution -> bucket being filled
+        self.open: Dict[str, Dict[str, Any]] = {}
+        self.videos: List[str] = []
+
+    def video_index(self, name: Optional[str]) -> int:
+        if name is None:
+            return -1
+        if name not in self.videos:
+            if len(self.videos) >= MAX_VIDEOS:
+                return -2  # "other"
+            self.videos.append(name)
+        return self.videos.index(name)
+
+    def video_name(self, index: int) -> Optional[str]:
+        if index == -2:
+            return "(other)"
+        return self.videos[index] if index >= 0 else None
+
+    def add(self, sample: Dict[str, Any]):
+        self.raw.append(sample)
+        for resolution, (seconds, _) in ROLLUPS.items():
+            bucket_start = sample["t"] - sample["t"] % seconds
+            bucket = self.open.get(resolution)
+            if bucket is not None and bucket["t"] != bucket_start:
+                self.rollups[resolution].append(bucket)
+                bucket = None
+            if bucket is None:
+                bucket = dict.fromkeys(ROLLUP_COLUMNS, 0)
+                bucket["t"] = bucket_start
+                self.open[resolution] = bucket
+            flags = sample["flags"]
+            bucket["samples"] += 1
+            bucket["reachable"] += bool(flags & REACHABLE)
+            bucket["tv_on"] += bool(flags & TV_ON)
+            bucket["playing"] += bool(flags & PLAYING)
+            bucket["latency_sum"] += sample["latency_ms"]
+            bucket["latency_max"] = max(bucket["latency_max"], sample["latency_ms"])
+            bucket["error_count"] = max(bucket["error_count"], sample["error_count"])
+            bucket["video"] = sample["video"]
+
+    def rollup_rows(
+        self, resolution: str, since: float = 0, until: float = float("inf")
+    ) -> List[Dict[str, Any]]:
+        """Closed buckets with since <= t < until, then the open one if it is too"""
+        rows = list(self.rollups[resolution].rows(since, until))
+        bucket = self.open.get(resolution)
+        if bucket is not None and since <= bucket["t"] < until:
+            rows.append(dict(bucket))
+        return rows
+
+    def dump(self) -> Dict[str, Any]:
+        return {
+            "videos": self.videos,
+            "open": self.open,
+            "rollups": {name: ring.dump() for name, ring in self.rollups.items()},
+        }
+
+    def load(self, dumped: Dict[str, Any]):
+        self.videos = dumped["videos"]
+        self.open = dumped["open"]
+        for name, ring in self.rollups.items():
+            if name in dumped["rollups"]:
+                ring.load(dumped["rollups"][name])
+
+
+def make_sample(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a status poller device document into a raw sample row"""
+    status = document["status"] or {}
+    flags = 0
+    if document["reachable"]:
+        flags |= REACHABLE
+        if (document["tv_status"] or {}).get("status") == "on":
+            flags |= TV_ON
+        if status.get("is_playing"):
+            flags |= PLAYING
+        if status.get("is_paused"):
+            flags |= PAUSED
+    return {
+        "t": time.time(),
+        "flags": flags,
+        "latency_ms": document.get("latency_ms") or 0.0,
+        "error_count": status.get("error_count") or 0,
+        "video": status.get("current_video") if document["reachable"] else None,
+    }
+
+
+class HistoryStore:
+    """
+    Per-device health history, fed by every status poll.
+
+    Raw samples are kept in a fixed-size ring for the last few hours and
+    folded into 5 minute and hourly rollup rings; all rings are preallocated
+    arrays, so memory per device is fixed regardless of retention. The
+    rollups are written to disk periodically and reloaded on startup.
+    """
+
+    def __init__(self, directory: Path = HISTORY_DIR):
+        self.directory = directory
+        self.devices: Dict[str, DeviceHistory] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, document: Dict[str, Any]):
+        history = self.devices.get(document["host"])
+        if history is None:
+            history = self.devices[document["host"]] = DeviceHistory()
+        sample = make_sample(document)
+        sample["video"] = history.video_index(sample["video"])
+        history.add(sample)
+
+    def _path(self, host: str) -> Path:
+        return self.directory / f"{host}.json"
+
+    def load(self):
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob("*.json"):
+            try:
+                with open(path, "r") as f:
+                    history = DeviceHistory()
+                    history.load(json.load(f))
+                self.devices[path.stem] = history
+            except Exception as e:
+                logger.error(f"Error loading history {path}: {e}")
+
+    def save(self):
+        self.directory.mkdir(exist_ok=True)
+        for host, history in list(self.devices.items()):
+            tmp_file = self._path(host).with_suffix(".tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(history.dump(), f)
+            os.replace(tmp_file, self._path(host))
+
+    async def start(self):
+        await asyncio.to_thread(self.load)
+        status_poller.sample_hooks.append(self.record)
+        self._task = asyncio.create_task(self._persist_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self.record in status_poller.sample_hooks:
+            status_poller.sample_hooks.remove(self.record)
+        await asyncio.to_thread(self.save)
+
+    async def _persist_loop(self):
+        while True:
+            await asyncio.sleep(PERSIST_INTERVAL)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception as e:
+                logger.error(f"Error saving device history: {e}")
+
+    def query(
+        self, host: str, since: float, until: float, resolution: str
+    ) -> List[Dict[str, Any]]:
+        history = self.devices[host]
+        if resolution == "raw":
+            return [
+                {
+                    "t": row["t"],
+                    "reachable": bool(row["flags"] & REACHABLE),
+                    "tv_on": bool(row["flags"] & TV_ON),
+                    "playing": bool(row["flags"] & PLAYING),
+                    "paused": bool(row["flags"] & PAUSED),
+                    "latency_ms": round(row["latency_ms"], 1),
+                    "error_count": row["error_count"],
+                    "video": history.video_name(row["video"]),
+                }
+                for row in history.raw.rows(since, until)
+            ]
+        return [
+            {
+                "t": row["t"],
+                "samples": row["samples"],
+                "reachable": round(row["reachable"] / row["samples"], 3),
+                "tv_on": round(row["tv_on"] / row["samples"], 3),
+                "playing": round(row["playing"] / row["samples"], 3),
+                "latency_ms_mean": round(row["latency_sum"] / row["samples"], 1),
+                "latency_ms_max": round(row["latency_max"], 1),
+                "error_count": row["error_count"],
+                "video": history.video_name(row["video"]),
+            }
+            for row in history.rollup_rows(resolution, since, until)
+        ]
+
+    def pick_resolution(self, host: str, since: float) -> str:
+        """Finest resolution whose retention still covers `since`"""
+        history = self.devices[host]
+        oldest = history.raw.oldest()
+        if oldest is not None and oldest <= since:
+            return "raw"
+        for resolution, (seconds, capacity) in ROLLUPS.items():
+            if since >= time.time() - seconds * capacity:
+                return resolution
+        return list(ROLLUPS)[-1]
+
+
+# Global history store; started and stopped from the app lifespan in client.py
+history_store = HistoryStore()
+
+
+def _require_history(host: str):
+    if host not in history_store.devices:
+        raise HTTPException(status_code=404, detail="No history for this device")
+
+
+@history_router.get("/history")
+async def list_history():
+    """Devices with recorded history and how far back each resolution goes"""
+    return {
+        host: {
+            "raw_since": history.raw.oldest(),
+            **{
+                f"{name}_since": ring.oldest()
+                for name, ring in history.rollups.items()
+            },
+        }
+        for host, history in history_store.devices.items()
+    }
+
+
+@history_router.get("/history/{host}")
+async def get_history(
+    host: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    resolution: str = "auto",
+):
+    """
+    Samples of one device between start and end (epoch seconds).
+
+    resolution is raw, 5m, 1h or auto (the finest one covering the range).
+    Rollup rows give the fraction of samples that were reachable, TV on and
+    playing in each bucket.
+    """
+    _require_history(host)
+    end = end or time.time()
+    start = start or end - 3600
+    if resolution == "auto":
+        resolution = history_store.pick_resolution(host, start)
+    elif resolution != "raw" and resolution not in ROLLUPS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution {resolution}")
+    return {
+        "host": host,
+        "resolution": resolution,
+        "samples": history_store.query(host, start, end, resolution),
+    }
+
+
+@history_router.get("/history/{host}/summary")
+async def get_history_summary(
+    host: str, start: Optional[float] = None, end: Optional[float] = None
+):
+    """Hours reachable, TV on and playing between start and end (default: 7 days)"""
+    _require_history(host)
+    end = end or time.time()
+    start = start or end - 7 * 24 * 3600
+    resolution = history_store.pick_resolution(host, start)
+    history = history_store.devices[host]
+    # Every sample stands for one poll interval; counting samples rather than
+    # whole buckets keeps partly covered buckets from being overcounted
+    if resolution == "raw":
+        rows = [
+            {
+                "reachable": bool(row["flags"] & REACHABLE),
+                "tv_on": bool(row["flags"] & TV_ON),
+                "playing": bool(row["flags"] & PLAYING),
+                "error_count": row["error_count"],
+            }
+            for row in history.raw.rows(start, end)
+        ]
+    else:
+        rows = history.rollup_rows(resolution, start, end)
+
+    def hours(key: str) -> float:
+        return round(sum(row[key] for row in rows) * POLL_INTERVAL / 3600, 2)
+
+    return {
+        "host": host,
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+        "reachable_hours": hours("reachable"),
+        "tv_on_hours": hours("tv_on"),
+        "playing_hours": hours("playing"),
+        "max_error_count": max((row["error_count"] for row in rows), default=0),
+    }
@@ -0,0 +1,58 @@
+import gzip
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+GZIP_MIN_SIZE = 1024  # smaller bodies aren't worth compressing
+GZIP_LEVEL = 6
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the version numbers that identify a resource's state"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def _gzip_etag(etag: str) -> str:
+    # The gzipped body is a different representation, so it gets its own tag
+    return etag[:-1] + '-gzip"'
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The tag of If-None-Match that still matches `etag`, if any"""
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*":
+            return etag
+        if tag in (etag, _gzip_etag(etag)):
+            return tag
+    return None
+
+
+def conditional_json(
+    request: Request, etag: str, build: Callable[[], Any]
+) -> Response:
+    """
+    JSON response for a polled resource whose current state is `etag`.
+
+    A matching If-None-Match is answered with a bodyless 304 without calling
+    `build`. Bodies of GZIP_MIN_SIZE bytes or more are gzipped when the
+    client accepts it.
+    """
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+
+    body = json.dumps(
+        jsonable_encoder(build()), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get(
+        "accept-encoding", ""
+    ):
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+        etag = _gzip_etag(etag)
+    headers["ETag"] = etag
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, Dict, Optional, Set, Tuple
+
+from routers.pi_client import pi_client
+
+PAGE_SIZE = 500  # the most a Pi serves per /library page
+
+
+class LibraryMirror:
+    """
+    Hub-side copy of every Pi's video library.
+
+    A Pi's /status only carries its library version. When that moves, just
+    the videos added and removed since the mirrored version are fetched;
+    the full library is paged through the first time, or when the Pi no
+    longer has the changes (410).
+    """
+
+    def __init__(self):
+        # host -> {"version", "videos": {name: entry}}
+        self.libraries: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def names(self, host: str) -> Set[str]:
+        library = self.libraries.get(host)
+        return set(library["videos"]) if library else set()
+
+    async def sync(self, host: str, version: int, token: Optional[str]):
+        """Bring the mirror of `host` up to `version` of its library"""
+        async with self._locks.setdefault(host, asyncio.Lock()):
+            library = self.libraries.get(host)
+            if library and library["version"] == version:
+                return
+            if library and await self._catch_up(host, library, token):
+                return
+            library, changed = await self._list(host, token)
+            self.libraries[host] = library
+            if changed:
+                # Changes made while paging are fetched like any other delta
+                await self._catch_up(host, library, token)
+
+    async def _catch_up(
+        self, host: str, library: Dict[str, Any], token: Optional[str]
+    ) -> bool:
+        response = await pi_client.request(
+            host, "GET", "/library", token=token, params={"since": library["version"]}
+        )
+        if response.status_code == 410:
+            return False
+        response.raise_for_status()
+        changes = response.json()
+        videos = dict(library["videos"])
+        for name in changes["removed"]:
+            videos.pop(name, None)
+        videos.update({entry["name"]: entry for entry in changes["added"]})
+        self.libraries[host] = {"version": changes["version"], "videos": videos}
+        return True
+
+    async def _list(self, host: str, token: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Every page of a Pi's library, stamped with the version of the first
+        page, and whether the library changed before the last one.
+        """
+        videos, cursor, version = {}, None, None
+        while True:
+            params = {"limit": PAGE_SIZE}
+            if cursor:
+                params["cursor"] = cursor
+            page = await pi_client.get_json(host, "/library", token=token, params=params)
+            if version is None:
+                version = page["version"]
+            videos.update({entry["name"]: entry for entry in page["items"]})
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return {"version": version, "videos": videos}, page["version"] != version
+
+
+# Shared instance; kept in sync by the status poller's fetches
+library_mirror = LibraryMirror()
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+PI_PORT = 8000
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 5.0
+
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a Pi whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Per-device circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls
+    are rejected without touching the network. Once `reset_timeout` has passed
+    a single trial call is let through (half-open); success closes the breaker,
+    failure opens it again.
+
+    Calls already in flight when a failure is counted fail for the same
+    reason and aren't counted again, so the parallel calls of one status
+    poll add at most one failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self, started_at: float):
+        """Count the failure of a call started at `started_at` (monotonic)"""
+        self.trial_in_flight = False
+        if self.last_failure_at is not None and started_at < self.last_failure_at:
+            return
+        self.last_failure_at = time.monotonic()
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = self.last_failure_at
+
+
+class PiClient:
+    """Shared keep-alive HTTP client for talking to Pis from the hub"""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        # (host, path) -> (ETag, body) of the last conditional GET
+        self._validated: Dict[Tuple[str, str, str], Tuple[str, Any]] = {}
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker()
+        return self.breakers[host]
+
+    async def request(
+        self,
+        host: str,
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Call `path` on the Pi at `host` through its circuit breaker.
+
+        Connection errors, timeouts and 5xx answers count as failures;
+        4xx answers mean the Pi is alive and are returned to the caller.
+        """
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if token:
+            headers["AUTH"] = token
+        started_at = time.monotonic()
+        try:
+            response = await self.client.request(
+                method,
+                f"http://{host}:{PI_PORT}{path}",
+                headers=headers,
+                timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+                **kwargs,
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError):
+            breaker.record_failure(started_at)
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by a caller-side timeout: release a half-open trial
+            breaker.trial_in_flight = False
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure(started_at)
+        else:
+            breaker.record_success()
+        return response
+
+    async def get_json(self, host: str, path: str, **kwargs) -> Any:
+        response = await self.request(host, "GET", path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_json_revalidated(self, host: str, path: str, **kwargs) -> Any:
+        """
+        get_json for polled resources: the last body is kept with its ETag
+        and sent back as If-None-Match, so an unchanged resource costs a 304.
+        """
+        # Each query string is a different resource with its own ETag
+        key = (host, path, str(httpx.QueryParams(kwargs.get("params") or {})))
+        cached = self._validated.get(key)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        response = await self.request(host, "GET", path, headers=headers, **kwargs)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self._validated[key] = (etag, body)
+        else:
+            self._validated.pop(key, None)
+        return body
+
+
+# Shared instance; started and closed from the app lifespan in client.py
+pi_client = PiClient()
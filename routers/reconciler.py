@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from routers.group_store import group_store
+from routers.library_mirror import library_mirror
+from routers.pi_client import CircuitOpenError, pi_client
+from routers.status_router import POLL_INTERVAL, fetch_device_status, status_poller
+from routers.tv_routers import discovery
+
+logger = logging.getLogger(__name__)
+
+reconcile_router = APIRouter()
+
+RECONCILE_INTERVAL = 60.0  # seconds between full passes over every group
+MAX_PARALLEL_DEVICES = 16
+CACHE_MAX_AGE = 2 * POLL_INTERVAL  # older cached statuses are re-read
+BATCH_TIMEOUT = 30.0
+
+
+class DesiredState(BaseModel):
+    """What every device of a group should be doing; None leaves a field alone"""
+
+    video: Optional[str] = None
+    playlist: Optional[str] = None  # a playlist stored on the Pis, instead of video
+    playback: Literal["playing", "paused", "stopped"] = "playing"
+    input: Optional[int] = None
+    volume: Optional[int] = Field(None, ge=0, le=100)
+    schedule: Optional[Dict[str, Any]] = None  # weekday -> DaySchedule
+
+
+def plan(
+    desired: Dict[str, Any], actual: Dict[str, Any]
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Minimal list of /batch operations that moves a Pi from `actual` to
+    `desired`, plus the reasons it can't fully converge yet.
+    """
+    ops: List[Dict] = []
+    pending: List[str] = []
+    status = actual["status"]
+
+    wanted_input = desired.get("input")
+    if wanted_input is not None and str(actual["current_input"]) != str(wanted_input):
+        ops.append({"op": "switch", "args": {"device_number": desired["input"]}})
+
+    if desired.get("volume") is not None and status.get("volume") != desired["volume"]:
+        ops.append({"op": "set_volume", "args": {"volume": desired["volume"]}})
+
+    video, playlist = desired.get("video"), desired.get("playlist")
+    playback = desired.get("playback", "playing")
+    playing, paused = status["is_playing"], status["is_paused"]
+    if playlist is not None:
+        loaded = status.get("playlist") == playlist and (playing or paused)
+    else:
+        loaded = (
+            status["current_video"] == video
+            and status.get("playlist") is None
+            and (playing or paused)
+        )
+    if playback == "stopped":
+        if playing or paused:
+            ops.append({"op": "stop", "args": {}})
+    elif video is None and playlist is None:
+        if playback == "playing" and paused:
+            ops.append({"op": "resume", "args": {}})
+        elif playback == "paused" and playing:
+            ops.append({"op": "pause", "args": {}})
+    elif video is not None and video not in actual["videos"]:
+        # Content sync delivers it; the next pass starts it
+        pending.append(f"{video} is not on the device yet")
+    elif not loaded:
+        if playlist is not None:
+            ops.append({"op": "play_playlist", "args": {"name": playlist}})
+            if playback == "paused":
+                ops.append({"op": "pause", "args": {}})
+        elif playback == "playing":
+            ops.append({"op": "play", "args": {"video_name": video}})
+        else:
+            # Held paused for good: a plain prepare would play after a while
+            ops.append(
+                {"op": "prepare", "args": {"video_name": video, "auto_start": False}}
+            )
+    elif playback == "playing" and paused:
+        ops.append({"op": "resume", "args": {}})
+    elif playback == "paused" and playing:
+        ops.append({"op": "pause", "args": {}})
+
+    schedule = desired.get("schedule")
+    if schedule is not None:
+        current = actual.get("schedule") or {}
+        if any(current.get(day) != times for day, times in schedule.items()):
+            # set_schedule resets the days it isn't given to their defaults
+            ops.append({"op": "set_schedule", "args": {**current, **schedule}})
+
+    return ops, pending
+
+
+class Reconciler:
+    """
+    Drives every device of a group towards the group's desired state.
+
+    Actual state comes from the status poller's cache, so a Pi that already
+    matches costs no request at all. When the cache shows a difference the
+    Pi is re-read, the minimal set of changes is computed and pushed as one
+    /batch call. Full passes run periodically, and a device is reconciled as
+    soon as the poller sees it change, which covers newly discovered and
+    rebooted Pis.
+    """
+
+    def __init__(self):
+        # host -> outcome of the last reconciliation
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._semaphore = asyncio.Semaphore(MAX_PARALLEL_DEVICES)
+        self._tasks: List[asyncio.Task] = []
+        self._pending: set = set()
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._watch_status()),
+        ]
+
+    async def stop(self):
+        for task in [*self._tasks, *self._pending]:
+            task.cancel()
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile_all()
+            except Exception as e:
+                logger.error(f"Reconciliation pass failed: {e}")
+            await asyncio.sleep(RECONCILE_INTERVAL)
+
+    async def _watch_status(self):
+        while True:
+            queue = status_poller.subscribe()
+            try:
+                while (document := await queue.get()) is not None:
+                    if document["reachable"] and self.desired_for(document["host"]):
+                        host = document["host"]
+                        task = asyncio.create_task(self.reconcile_host(host))
+                        self._pending.add(task)
+                        task.add_done_callback(self._pending.discard)
+            finally:
+                status_poller.unsubscribe(queue)
+
+    def desired_for(self, host: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(group id, desired state) for a device; the latest-set group wins"""
+        candidates = [
+            (group_id, group_store.get(group_id)["desired"])
+            for group_id in group_store.groups_for_device(host=host)
+            if group_store.get(group_id).get("desired")
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda item: item[1]["updated_at"])
+
+    async def reconcile_all(self) -> Dict[str, Dict[str, Any]]:
+        hosts = {
+            device["host"]
+            for group in group_store.all().values()
+            if group.get("desired")
+            for device in group["devices"]
+        }
+        online = set(discovery.get_pis().values())
+        for host in hosts - online:
+            self.devices[host] = {"converged": False, "error": "offline"}
+        results = await asyncio.gather(
+            *(self.reconcile_host(host) for host in hosts & online)
+        )
+        return dict(zip(hosts & online, results))
+
+    async def reconcile_group(
+        self, group_id: str, use_cache: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        hosts = [device["host"] for device in group_store.get(group_id)["devices"]]
+        results = await asyncio.gather(
+            *(self.reconcile_host(host, use_cache) for host in hosts)
+        )
+        return dict(zip(hosts, results))
+
+    async def _actual_state(
+        self, host: str, desired: Dict[str, Any], token: str, use_cache: bool
+    ) -> Tuple[Dict[str, Any], bool]:
+        """A device's current state, and whether it came from the status cache"""
+        cached = status_poller.last_known.get(host)
+        from_cache = bool(
+            use_cache and cached and time.time() - cached["fetched_at"] < CACHE_MAX_AGE
+        )
+        actual = dict(cached) if from_cache else await fetch_device_status(host, token)
+        actual["videos"] = library_mirror.names(host)
+        if desired.get("schedule") is not None:
+            actual["schedule"] = await pi_client.get_json(
+                host, "/tv/get_schedule", token=token
+            )
+        return actual, from_cache
+
+    async def reconcile_host(
+        self, host: str, use_cache: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Bring one device to its group's desired state; None if unmanaged"""
+        entry = self.desired_for(host)
+        if entry is None:
+            self.devices.pop(host, None)
+            return None
+        group_id, desired = entry
+        token = status_poller.token
+        result = {"group_id": group_id, "checked_at": time.time(), "ops": []}
+        if not token:
+            result.update(
+                converged=False, error="PI_AUTH_TOKEN is not configured on the hub"
+            )
+            self.devices[host] = result
+            return result
+
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock, self._semaphore:
+            try:
+                actual, from_cache = await self._actual_state(
+                    host, desired, token, use_cache
+                )
+                ops, pending = plan(desired, actual)
+                if ops and from_cache:
+                    # Only trust the cache for "nothing to do"; confirm a diff
+                    actual, _ = await self._actual_state(
+                        host, desired, token, use_cache=False
+                    )
+                    ops, pending = plan(desired, actual)
+                result["pending"] = pending
+                result["error"] = None
+                if ops:
+                    result["ops"] = [op["op"] for op in ops]
+                    result["error"] = await self._push(host, ops, token)
+                    await status_poller.refresh(host)
+                result["converged"] = not pending and result["error"] is None
+            except (CircuitOpenError, httpx.HTTPError, asyncio.TimeoutError) as e:
+                result.update(converged=False, error=str(e) or type(e).__name__)
+
+        if result["ops"]:
+            logger.info(f"Reconciled {host} for {group_id}: {result['ops']}")
+        self.devices[host] = result
+        return result
+
+    async def _push(self, host: str, ops: List[Dict], token: str) -> Optional[str]:
+        response = await pi_client.request(
+            host,
+            "POST",
+            "/batch",
+            token=token,
+            timeout=BATCH_TIMEOUT,
+            json={"operations": ops, "stop_on_error": False},
+        )
+        if not response.is_success:
+            return f"Batch failed with {response.status_code}: {response.text}"
+        failed = [r for r in response.json()["results"] if r["status"] == "error"]
+        if failed:
+            return "; ".join(f"{r['op']}: {r['detail']}" for r in failed)
+        return None
+
+    def follow(self, group_id: str, **fields):
+        """Fold a manual group command into the group's desired state, if any"""
+        group = group_store.get(group_id)
+        if group is None or not group.get("desired"):
+            return
+        group_store.update(
+            group_id, desired={**group["desired"], **fields, "updated_at": time.time()}
+        )
+
+
+# Global reconciler; started and stopped from the app lifespan in client.py
+reconciler = Reconciler()
+
+
+def _require_group(group_id: str) -> Dict[str, Any]:
+    group = group_store.get(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return group
+
+
+@reconcile_router.get("/{group_id}/desired")
+async def get_desired_state(group_id: str):
+    """A group's desired state and how far each device is from it"""
+    group = _require_group(group_id)
+    return {
+        "group_id": group_id,
+        "desired": group.get("desired"),
+        "devices": {
+            device["host"]: reconciler.devices.get(device["host"])
+            for device in group["devices"]
+        },
+    }
+
+
+@reconcile_router.put("/{group_id}/desired")
+async def set_desired_state(group_id: str, desired: DesiredState):
+    """Set a group's desired state and converge its devices now"""
+    _require_group(group_id)
+    if desired.video is not None and desired.playlist is not None:
+        raise HTTPException(
+            status_code=400, detail="Set either a video or a playlist, not both"
+        )
+    group_store.update(
+        group_id, desired={**desired.model_dump(), "updated_at": time.time()}
+    )
+    results = await reconciler.reconcile_group(group_id, use_cache=False)
+    return {"group_id": group_id, "results": results}
+
+
+@reconcile_router.delete("/{group_id}/desired")
+async def clear_desired_state(group_id: str):
+    """Stop managing a group's devices"""
+    _require_group(group_id)
+    group_store.update(group_id, desired=None)
+    return {"message": "Desired state cleared"}
+
+
+@reconcile_router.post("/{group_id}/reconcile")
+async def reconcile_group_now(group_id: str):
+    """Run reconciliation for a group now, reading every device afresh"""
+    group = _require_group(group_id)
+    if not group.get("desired"):
+        raise HTTPException(status_code=400, detail="Group has no desired state")
+    results = await reconciler.reconcile_group(group_id, use_cache=False)
+    return {"group_id": group_id, "results": results}
@@ -0,0 +1,116 @@
+import asyncio
+import base64
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+
+from routers.pi_client import CircuitOpenError, pi_client
+from routers.tv_routers import discovery
+
+logger = logging.getLogger(__name__)
+
+snapshot_router = APIRouter()
+
+SNAPSHOT_TTL = 5.0  # matches the Pis' own capture TTL
+SNAPSHOT_TIMEOUT = 4.0
+MAX_CONCURRENT_SNAPSHOTS = 32
+
+
+class SnapshotFetcher:
+    """
+    Hub-side cache of each Pi's latest snapshot.
+
+    Within SNAPSHOT_TTL a cached capture is served without contacting the Pi;
+    after that the Pi is asked with If-None-Match, so an unchanged frame
+    costs a 304 instead of the image. Captures are cached per token, so one
+    is only served again to callers the Pi accepted it for.
+    """
+
+    def __init__(self):
+        # (host, token) -> {"data", "etag", "taken_at", "fetched_at"}
+        self.cache: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_SNAPSHOTS)
+
+    async def get(self, host: str, token: Optional[str]) -> Dict[str, Any]:
+        cached = self.cache.get((host, token))
+        if cached and time.time() - cached["fetched_at"] < SNAPSHOT_TTL:
+            return cached
+
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        async with self._semaphore:
+            response = await pi_client.request(
+                host,
+                "GET",
+                "/snapshot",
+                token=token,
+                timeout=SNAPSHOT_TIMEOUT,
+                headers=headers,
+            )
+        if response.status_code == 304 and cached:
+            cached["fetched_at"] = time.time()
+            return cached
+        response.raise_for_status()
+
+        snapshot = {
+            "data": response.content,
+            "etag": response.headers.get("etag"),
+            "taken_at": float(response.headers.get("x-taken-at", time.time())),
+            "fetched_at": time.time(),
+        }
+        self.cache[(host, token)] = snapshot
+        return snapshot
+
+
+snapshot_fetcher = SnapshotFetcher()
+
+
+@snapshot_router.get("/pis/{host}/snapshot")
+async def get_pi_snapshot(host: str, AUTH: str | None = Header(None)):
+    """Latest snapshot of one Pi, cached on the hub"""
+    # Only discovered Pis: anything else would make the hub a proxy
+    if host not in discovery.get_pis().values():
+        raise HTTPException(status_code=404, detail="Unknown device")
+    try:
+        snapshot = await snapshot_fetcher.get(host, AUTH)
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Device is offline")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Snapshot failed: {e}")
+    return Response(
+        snapshot["data"],
+        media_type="image/jpeg",
+        headers={"ETag": snapshot["etag"] or "", "Cache-Control": "no-cache"},
+    )
+
+
+@snapshot_router.get("/pis/contact-sheet")
+async def get_contact_sheet(AUTH: str | None = Header(None)):
+    """
+    Current frame of every discovered Pi in one document.
+
+    Images are small JPEGs inlined as data URIs, so a dashboard can render
+    the whole fleet from a single request.
+    """
+
+    async def entry(name: str, host: str) -> Dict[str, Any]:
+        try:
+            snapshot = await snapshot_fetcher.get(host, AUTH)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            return {"name": name, "host": host, "image": None, "error": error}
+        image = base64.b64encode(snapshot["data"]).decode()
+        return {
+            "name": name,
+            "host": host,
+            "image": f"data:image/jpeg;base64,{image}",
+            "etag": snapshot["etag"],
+            "taken_at": snapshot["taken_at"],
+            "error": None,
+        }
+
+    pis = [(name, host) for name, host in discovery.get_pis().items() if name]
+    devices = await asyncio.gather(*(entry(name, host) for name, host in pis))
+    return {"generated_at": time.time(), "devices": devices}
@@ -0,0 +1,297 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import secrets
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from routers.library_mirror import library_mirror
+from routers.pi_client import CircuitOpenError, pi_client
+from routers.tv_routers import discovery
+
+logger = logging.getLogger(__name__)
+
+status_router = APIRouter()
+
+DEVICE_TIMEOUT = 4.0  # seconds allowed for one Pi to answer all status calls
+MAX_CONCURRENT_DEVICES = 32
+STALE_AFTER = 90.0  # seconds after which a cached status is flagged stale
+POLL_INTERVAL = 15.0  # seconds between two polls of the same Pi
+SUPERVISE_INTERVAL = 5.0  # seconds between checks for added or removed Pis
+SSE_HEARTBEAT = 15.0
+SUBSCRIBER_QUEUE_SIZE = 256
+EVENT_TICKET_TTL = 30.0  # seconds an /pis/events ticket stays redeemable
+
+
+async def fetch_device_status(host: str, token: Optional[str]) -> Dict[str, Any]:
+    """
+    Fetch the three status resources the dashboard needs from one Pi, and
+    bring the hub's mirror of its library up to the version it reports
+    """
+    status, tv_status, current = await asyncio.gather(
+        pi_client.get_json_revalidated(host, "/status", token=token),
+        pi_client.get_json(host, "/tv/status", token=token),
+        pi_client.get_json(host, "/tv/current", token=token),
+    )
+    try:
+        await library_mirror.sync(host, status["library"]["version"], token)
+    except (KeyError, CircuitOpenError, httpx.HTTPError) as e:
+        logger.warning(f"Library of {host} could not be mirrored: {e}")
+    return {
+        "status": status,
+        "tv_status": tv_status,
+        "current_input": current.get("current_input"),
+        "fetched_at": time.time(),
+    }
+
+
+class StatusPoller:
+    """
+    Hub-side cache of every Pi's status.
+
+    One background loop per discovered Pi keeps the cache fresh, so the load
+    on a Pi no longer depends on how many dashboards are open. Concurrent
+    refreshes of the same Pi share one upstream call. Whenever a Pi's status
+    changes the new document is pushed to every subscriber.
+
+    Polls use the fleet's API key from PI_AUTH_TOKEN; without it nothing is
+    polled.
+    """
+
+    def __init__(self):
+        self.token: Optional[str] = os.environ.get("PI_AUTH_TOKEN")
+        self.names: Dict[str, str] = {}  # host -> name
+        # host -> last successful fetch
+        self.last_known: Dict[str, Dict[str, Any]] = {}
+        # host -> last published device document
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.subscribers: Set[asyncio.Queue] = set()
+        # Called with every polled device document, changed or not
+        self.sample_hooks: List[Callable[[Dict[str, Any]], None]] = []
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_DEVICES)
+        self._supervisor: Optional[asyncio.Task] = None
+        # ticket -> expiry, for EventSource clients that can't send headers
+        self._tickets: Dict[str, float] = {}
+
+    def issue_ticket(self) -> str:
+        now = time.time()
+        self._tickets = {t: exp for t, exp in self._tickets.items() if exp > now}
+        ticket = secrets.token_urlsafe(24)
+        self._tickets[ticket] = now + EVENT_TICKET_TTL
+        return ticket
+
+    def redeem_ticket(self, ticket: Optional[str]) -> bool:
+        """Whether `ticket` was issued and is unexpired; each works once"""
+        expires_at = self._tickets.pop(ticket, None) if ticket else None
+        return expires_at is not None and expires_at > time.time()
+
+    async def start(self):
+        if not self.token:
+            logger.warning("PI_AUTH_TOKEN is not set; Pi status will not be polled")
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        for task in [self._supervisor, *self._loops.values()]:
+            if task:
+                task.cancel()
+        self._loops.clear()
+
+    async def _supervise(self):
+        while True:
+            current = {host: name for name, host in discovery.get_pis().items() if name}
+            self.names.update(current)
+            for host in current.keys() - self._loops.keys():
+                self._loops[host] = asyncio.create_task(self._poll_loop(host))
+            for host in self._loops.keys() - current.keys():
+                self._loops.pop(host).cancel()
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+
+    async def _poll_loop(self, host: str):
+        # Spread the first polls so a restart doesn't hit every Pi at once
+        await asyncio.sleep(random.uniform(0, POLL_INTERVAL))
+        while True:
+            if self.token:
+                try:
+                    await self.refresh(host)
+                except Exception as e:
+                    logger.error(f"Status poll of {host} failed: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def refresh(self, host: str) -> Dict[str, Any]:
+        """Fetch a Pi's status now, joining an in-flight fetch if there is one"""
+        task = self._inflight.get(host)
+        if task is None:
+            task = asyncio.create_task(self._fetch(host))
+            self._inflight[host] = task
+            task.add_done_callback(lambda _: self._inflight.pop(host, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, host: str) -> Dict[str, Any]:
+        error = None
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                self.last_known[host] = await asyncio.wait_for(
+                    fetch_device_status(host, self.token), DEVICE_TIMEOUT
+                )
+            except CircuitOpenError:
+                error = "offline (circuit open)"
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+
+        document = self.device_document(host, error)
+        document["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        for hook in self.sample_hooks:
+            try:
+                hook(document)
+            except Exception as e:
+                logger.error(f"Status sample hook failed: {e}")
+        previous = self.documents.get(host)
+        self.documents[host] = document
+        if previous is None or self._changed(previous, document):
+            self.publish(document)
+        return document
+
+    def device_document(self, host: str, error: Optional[str] = None) -> Dict[str, Any]:
+        cached = self.last_known.get(host)
+        age = time.time() - cached["fetched_at"] if cached else None
+        return {
+            "name": self.names.get(host, host),
+            "host": host,
+            "reachable": cached is not None and error is None,
+            "error": error,
+            "circuit": pi_client.breaker(host).state,
+            "status": cached["status"] if cached else None,
+            "tv_status": cached["tv_status"] if cached else None,
+            "current_input": cached["current_input"] if cached else None,
+            "fetched_at": cached["fetched_at"] if cached else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": age is None or age > STALE_AFTER or error is not None,
+        }
+
+    @staticmethod
+    def _changed(previous: Dict[str, Any], document: Dict[str, Any]) -> bool:
+        # tv_status carries a timestamp that changes on every call
+        keys = ("reachable", "error", "status", "current_input")
+        if any(previous[key] != document[key] for key in keys):
+            return True
+        return (previous["tv_status"] or {}).get("status") != (
+            document["tv_status"] or {}
+        ).get("status")
+
+    def snapshot(self) -> Dict[str, Any]:
+        devices = []
+        for host in self._loops:
+            if host in self.documents:
+                error = self.documents[host]["error"]
+            else:
+                error = "not polled yet"
+            devices.append(self.device_document(host, error))
+        return {"generated_at": time.time(), "devices": devices}
+
+    def publish(self, document: Dict[str, Any]):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(document)
+            except asyncio.QueueFull:
+                # A subscriber that can't keep up is closed; EventSource
+                # reconnects and starts again from a fresh snapshot
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+
+# Global poller; started and stopped from the app lifespan in client.py
+status_poller = StatusPoller()
+
+
+async def require_fleet_token(AUTH: str | None = Header(None)) -> str:
+    """
+    Hub routes serving what the Pis protect take the Pis' API key, checked
+    against the one the hub polls with
+    """
+    if not status_poller.token:
+        raise HTTPException(
+            status_code=503, detail="PI_AUTH_TOKEN is not configured on the hub"
+        )
+    if not AUTH or not hmac.compare_digest(AUTH, status_poller.token):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return AUTH
+
+
+@status_router.get("/pis/status", dependencies=[Depends(require_fleet_token)])
+async def get_fleet_status(refresh: bool = False):
+    """
+    Status of every discovered Pi in one document.
+
+    Served from the hub's cache, which background polling keeps fresh; each
+    device carries the age of its data and a stale flag. With refresh=true
+    every Pi is queried now (concurrent requests share upstream calls).
+    """
+    if refresh:
+        hosts = [host for name, host in discovery.get_pis().items() if name]
+        await asyncio.gather(*(status_poller.refresh(host) for host in hosts))
+    return status_poller.snapshot()
+
+
+@status_router.post("/pis/events/ticket", dependencies=[Depends(require_fleet_token)])
+async def issue_event_ticket():
+    """
+    One-time ticket for /pis/events. EventSource can't send headers, and a
+    short-lived ticket in its URL keeps the API key out of access logs.
+    """
+    return {"ticket": status_poller.issue_ticket(), "expires_in": EVENT_TICKET_TTL}
+
+
+@status_router.get("/pis/events")
+async def stream_fleet_status(request: Request, ticket: Optional[str] = None):
+    """
+    Server-Sent Events stream of fleet status, opened with a ticket from
+    /pis/events/ticket.
+
+    Sends a `snapshot` event with every device first, then a `device` event
+    whenever a Pi's status changes.
+    """
+    if not status_poller.redeem_ticket(ticket):
+        raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+    queue = status_poller.subscribe()
+
+    async def events():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(status_poller.snapshot())}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    document = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if document is None:
+                    break
+                yield f"event: device\ndata: {json.dumps(document)}\n\n"
+        finally:
+            status_poller.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
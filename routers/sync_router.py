@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from routers import content_store
+from routers.group_store import group_store
+
+sync_router = APIRouter()
+
+
+@sync_router.get("/groups/{group_id}/manifest")
+async def get_group_manifest(group_id: str):
+    """Content manifest of one group"""
+    if group_store.get(group_id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return content_store.load_manifest(group_id)
+
+
+@sync_router.get("/groups/{group_id}/content/{filename}")
+async def get_group_content(group_id: str, filename: str):
+    """Download a content file; supports Range requests for resumable pulls"""
+    path = content_store.find_content(group_id, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return FileResponse(path, media_type="application/octet-stream")
+
+
+@sync_router.get("/sync/manifest")
+async def get_device_manifest(
+    request: Request, hostname: Optional[str] = None, host: Optional[str] = None
+):
+    """
+    Merged manifest of every group a device belongs to.
+
+    The device is matched by hostname or IP; the IP defaults to the address
+    the request came from. Pis poll this to converge on their content.
+    """
+    host = host or request.client.host
+    files: Dict[str, Dict[str, Any]] = {}
+    group_ids = []
+    for group_id in sorted(group_store.groups_for_device(host=host, name=hostname)):
+        group_ids.append(group_id)
+        for name, entry in content_store.load_manifest(group_id)["files"].items():
+            # The same name in two groups: the most recent upload wins
+            if name in files and files[name]["updated_at"] >= entry["updated_at"]:
+                continue
+            files[name] = {
+                **entry,
+                "url": f"/groups/{group_id}/content/{quote(name)}",
+            }
+    return {"groups": group_ids, "files": files}
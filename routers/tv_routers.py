@@ -1,15 +1,32 @@
 import asyncio
+import json
+import logging
+import os
 import socket
 import time
+from pathlib import Path
 from typing import Any, Dict, List
 
 import httpx
-import uvicorn
-from fastapi import APIRouter
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
-from zeroconf import ServiceBrowser, ServiceStateChange, Zeroconf
+from zeroconf import ServiceStateChange
+from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
+
+from routers.http_cache import conditional_json, make_etag
+
+logger = logging.getLogger(__name__)
+
+SERVICE_TYPE = "_pivideo._tcp.local."
+PI_PORT = 8000
+DEVICE_CACHE_FILE = Path("pis_cache.json")
+
+RESOLVE_TIMEOUT_MS = 3000
+PROBE_INTERVAL = 30  # seconds between liveness probe rounds
+PROBE_TIMEOUT = 2.0
+MAX_CONCURRENT_PROBES = 32
+SAVE_DELAY = 1.0  # seconds; changes within it are written to disk together
+FORGET_AFTER = 7 * 24 * 3600  # drop cached devices unseen for a week
 
 
 # Pydantic models for response validation
@@ -19,42 +36,165 @@ class PiStatus(BaseModel):
 
 
 class PiDiscovery:
-    def __init__(self):
-        self.pis = {}
-        self.zeroconf = Zeroconf()
-        self.browser = ServiceBrowser(
-            self.zeroconf,
-            "_pivideo._tcp.local.",
+    """
+    Zeroconf discovery of Pis with a persisted device cache.
+
+    Known devices are loaded from disk at construction so the hub can answer
+    immediately after a restart; `start()` then browses for services on the
+    event loop, resolves them concurrently and periodically probes every
+    known device to confirm it is still alive.
+    """
+
+    def __init__(self, cache_file: Path = DEVICE_CACHE_FILE):
+        self.cache_file = cache_file
+        # hostname -> {"host": ip, "last_seen": epoch seconds, "online": bool}
+        self.devices: Dict[str, Dict[str, Any]] = self._load_cache()
+        # Bumped on every change to the device table; starts at the process
+        # start time so versions never repeat across restarts
+        self.version = int(time.time() * 1000)
+        self.aiozc: AsyncZeroconf | None = None
+        self.browser: AsyncServiceBrowser | None = None
+        self.client: httpx.AsyncClient | None = None
+        self._tasks: set = set()
+        self._probe_task: asyncio.Task | None = None
+        self._save_task: asyncio.Task | None = None
+        self._probe_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, "r") as f:
+                    devices = json.load(f)
+                now = time.time()
+                return {
+                    hostname: device
+                    for hostname, device in devices.items()
+                    if now - device.get("last_seen", 0) < FORGET_AFTER
+                }
+        except Exception as e:
+            logger.error(f"Error loading device cache: {e}")
+        return {}
+
+    def _save_cache(self):
+        # Every change to the device table ends here; the write is debounced
+        # and done off the event loop
+        self.version += 1
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(SAVE_DELAY)
+        await self._write_cache()
+
+    async def _write_cache(self):
+        data = json.dumps(self.devices, indent=2)
+        try:
+            await asyncio.to_thread(self._write_file, data)
+        except Exception as e:
+            logger.error(f"Error saving device cache: {e}")
+
+    def _write_file(self, data: str):
+        tmp_file = self.cache_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            f.write(data)
+        os.replace(tmp_file, self.cache_file)
+
+    async def start(self):
+        """Start browsing and probing; returns without waiting for any result"""
+        self.client = httpx.AsyncClient(timeout=PROBE_TIMEOUT)
+        self.aiozc = AsyncZeroconf()
+        self.browser = AsyncServiceBrowser(
+            self.aiozc.zeroconf,
+            SERVICE_TYPE,
             handlers=[self.on_service_state_change],
         )
-        # Give initial time for discovery
-        time.sleep(2)
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        if self.browser:
+            await self.browser.async_cancel()
+        if self.aiozc:
+            await self.aiozc.async_close()
+        if self.client:
+            await self.client.aclose()
+        if self._save_task:
+            self._save_task.cancel()
+        await self._write_cache()
 
     def on_service_state_change(self, zeroconf, service_type, name, state_change):
-        if state_change is ServiceStateChange.Added:
-            info = self.zeroconf.get_service_info(service_type, name)
-            if info:
-                ip = socket.inet_ntoa(info.addresses[0])
-                hostname = info.properties.get(b"hostname", b"").decode("utf-8")
-                self.pis[hostname] = ip
+        # Called on the event loop: never block here, resolve in a task instead
+        if state_change in (ServiceStateChange.Added, ServiceStateChange.Updated):
+            task = asyncio.create_task(self._resolve(service_type, name))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
         elif state_change is ServiceStateChange.Removed:
-            # Remove the service when it's no longer available
-            for hostname, url in list(self.pis.items()):
-                if name.startswith(hostname):
-                    del self.pis[hostname]
-
-    def get_pis(self):
-        return self.pis
-
-    def __del__(self):
-        self.zeroconf.close()
+            for hostname, device in self.devices.items():
+                if name == f"{hostname}.{SERVICE_TYPE}":
+                    device["online"] = False
+            self._save_cache()
+
+    async def _resolve(self, service_type: str, name: str):
+        info = AsyncServiceInfo(service_type, name)
+        if not await info.async_request(self.aiozc.zeroconf, RESOLVE_TIMEOUT_MS):
+            logger.warning(f"Could not resolve {name}")
+            return
+        if not info.addresses:
+            return
+        ip = socket.inet_ntoa(info.addresses[0])
+        hostname = info.properties.get(b"hostname", b"").decode("utf-8")
+        if not hostname:
+            return
+        self.devices[hostname] = {"host": ip, "last_seen": time.time(), "online": True}
+        self._save_cache()
+
+    async def _probe(self, device: Dict[str, Any]) -> bool:
+        """Any HTTP answer from the Pi API counts as alive"""
+        async with self._probe_semaphore:
+            try:
+                await self.client.get(f"http://{device['host']}:{PI_PORT}/")
+                return True
+            except httpx.HTTPError:
+                return False
+
+    async def probe_all(self):
+        devices = list(self.devices.values())
+        results = await asyncio.gather(*(self._probe(d) for d in devices))
+        now = time.time()
+        for device, alive in zip(devices, results):
+            device["online"] = alive
+            if alive:
+                device["last_seen"] = now
+        self._save_cache()
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Device probe round failed: {e}")
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    def get_pis(self) -> Dict[str, str]:
+        """Hostname -> IP of every device not known to be offline"""
+        return {
+            hostname: device["host"]
+            for hostname, device in self.devices.items()
+            if device.get("online", True)
+        }
+
+    def get_devices(self) -> Dict[str, Dict[str, Any]]:
+        return self.devices
 
 
 # Create FastAPI app
 router = APIRouter()
 
 
-# Create global discovery instance
+# Create global discovery instance; started from the app lifespan in client.py
 discovery = PiDiscovery()
 
 
@@ -69,16 +209,19 @@ async def root():
 
 
 @router.get("/pis")
-async def get_pis():
-    """Get status of all discovered Pis"""
-    pi_statuses = []
-    current_pis = discovery.get_pis()
-
-    async with httpx.AsyncClient() as client:
-        for hostname, url in current_pis.items():
-            data = {}
-            if hostname != "":
-                data["name"] = hostname
-                data["host"] = url
-                pi_statuses.append(data)
-    return JSONResponse(pi_statuses)
+async def get_pis(request: Request):
+    """Get all discovered Pis that are not known to be offline"""
+
+    def build() -> List[Dict[str, Any]]:
+        devices = discovery.get_devices()
+        return [
+            {
+                "name": hostname,
+                "host": url,
+                "last_seen": devices[hostname].get("last_seen"),
+            }
+            for hostname, url in discovery.get_pis().items()
+            if hostname != ""
+        ]
+
+    return conditional_json(request, make_etag(discovery.version), build)
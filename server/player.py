@@ -0,0 +1,15 @@
+import os
+
+from src.logging_setup import APP_LOG_FILE, PLAYER_LOG_FILE, setup_logging
+
+# Configure logging before any module that logs at import time is loaded
+# The API workers share server.log; this single process rotates it
+setup_logging(PLAYER_LOG_FILE, rotate_shared=[APP_LOG_FILE])
+
+from src.player_client import DEFAULT_PLAYER_SOCKET
+from src.player_service import serve
+
+if __name__ == "__main__":
+    # Long-lived player daemon: owns VLC and the CEC bus. The API in
+    # server.py talks to it over this socket and can restart freely.
+    serve(os.environ.get("TVS_PLAYER_SOCKET", DEFAULT_PLAYER_SOCKET))
@@ -1,20 +1,43 @@
+import os
+
 import uvicorn
 from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from src.logging_setup import setup_logging
+
+# Unix socket of the player daemon (server/player.py). Unset, the player runs
+# inside this process as it used to, and only one worker is possible.
+PLAYER_SOCKET = os.environ.get("TVS_PLAYER_SOCKET")
+API_WORKERS = int(os.environ.get("TVS_API_WORKERS", "1"))
+
+# Configure logging before any module that logs at import time is loaded;
+# with a player daemon, VLC and its log live in that process, and it rotates
+# the log the API workers share
+setup_logging(rotate_vlc_log=not PLAYER_SOCKET, shared=bool(PLAYER_SOCKET))
+
 from session_encrypt import auth_manager
-from src.hdmi_controllers import CECController
+from src.player_client import (
+    PlayerClient,
+    RemoteCECController,
+    RemoteSyncAgent,
+    RemoteTVController,
+    RemoteVideoManager,
+)
+from src.player_service import PlayerService
+from src.routers.batch import router_batch
+from src.routers.content_sync import initialize_router_content_sync, router_sync
 from src.routers.group_router import group_router
 from src.routers.inputs_switch import initialize_router_cec_controller, router_cec
+from src.routers.playlists import initialize_router_playlists, router_playlists
 from src.routers.tv_controller import initialize_router_tv_controller, tv_router
 from src.routers.video_manager import (  # main router
     initialize_router_video_manager,
     initialize_router_video_manager_logger,
     router_main,
 )
-from src.tv_controller import TVController
 from src.utils import register_service
-from src.video_manager import PlayerState, logger, video_manager
+from src.video_manager import logger
 
 app = FastAPI()
 
@@ -70,11 +93,35 @@ def protect_router(router: APIRouter) -> APIRouter:
     return new_router
 
 
+def create_player():
+    """
+    The video manager, TV controller, CEC controller and sync agent the
+    routers drive: proxies to the player daemon, or the real objects when
+    the player runs in this process.
+    """
+    if PLAYER_SOCKET:
+        client = PlayerClient(PLAYER_SOCKET)
+        return (
+            RemoteVideoManager(client),
+            RemoteTVController(client),
+            RemoteCECController(client),
+            RemoteSyncAgent(client),
+        )
+    service = PlayerService()
+    return (
+        service.video_manager,
+        service.tv_controller,
+        service.cec_controller,
+        service.sync_agent,
+    )
+
+
 # Function to initialize protected routers
 def initialize_protected_routers(app: FastAPI, use: bool = False):
     """Initialize all routers with authentication"""
+    video_manager, tv_controller, cec_controller, sync_agent = create_player()
+
     # Protect TV controller router
-    tv_controller = TVController()
     initialize_router_tv_controller(tv_controller)
     if use:
         protected_tv_router = protect_router(tv_router)
@@ -83,7 +130,6 @@ def initialize_protected_routers(app: FastAPI, use: bool = False):
         app.include_router(tv_router, prefix="/tv", tags=["Schedule Tv"])
 
     # Protect CEC controller router
-    cec_controller = CECController()
     initialize_router_cec_controller(cec_controller)
     if use:
         protected_cec_router = protect_router(router_cec)
@@ -107,10 +153,46 @@ def initialize_protected_routers(app: FastAPI, use: bool = False):
     else:
         app.include_router(router_main, tags=["Main Video Controller"])
 
+    # Protect playlists router
+    initialize_router_playlists(video_manager)
+    if use:
+        protected_playlists_router = protect_router(router_playlists)
+        app.include_router(
+            protected_playlists_router, prefix="/playlists", tags=["Playlists"]
+        )
+    else:
+        app.include_router(router_playlists, prefix="/playlists", tags=["Playlists"])
+
+    # Protect batch router; its steps call the routers initialized above
+    if use:
+        protected_batch_router = protect_router(router_batch)
+        app.include_router(protected_batch_router, tags=["Batch"])
+    else:
+        app.include_router(router_batch, tags=["Batch"])
+
+    # Protect content sync router
+    initialize_router_content_sync(sync_agent)
+    if use:
+        protected_sync_router = protect_router(router_sync)
+        app.include_router(protected_sync_router, prefix="/sync", tags=["Content Sync"])
+    else:
+        app.include_router(router_sync, prefix="/sync", tags=["Content Sync"])
+
 
 initialize_protected_routers(app, use=True)
 
 
 if __name__ == "__main__":
     zeroconf = register_service()
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # log_config=None lets uvicorn's loggers go through the shared log pipeline
+    if PLAYER_SOCKET and API_WORKERS > 1:
+        # Each worker imports the app itself and talks to the same player
+        uvicorn.run(
+            "server:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=API_WORKERS,
+            log_config=None,
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SYNC_CONFIG_FILE = Path("sync_config.json")
+SYNC_STATE_FILE = Path("sync_state.json")
+
+DEFAULT_SYNC_INTERVAL = 300  # seconds between manifest checks
+REQUEST_TIMEOUT = 30
+CHUNK_SIZE = 1024 * 1024
+
+
+def load_sync_config() -> Dict:
+    """
+    Hub location and sync interval.
+
+    Read from sync_config.json ({"hub_url": "http://10.0.0.5:7777",
+    "interval": 300}); TVS_HUB_URL overrides the hub URL.
+    """
+    config = {"hub_url": None, "interval": DEFAULT_SYNC_INTERVAL}
+    try:
+        if SYNC_CONFIG_FILE.exists():
+            with open(SYNC_CONFIG_FILE, "r") as f:
+                config.update(json.load(f))
+    except Exception as e:
+        logger.error(f"Error loading sync config: {e}")
+    config["hub_url"] = os.environ.get("TVS_HUB_URL", config["hub_url"])
+    return config
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentSyncAgent:
+    """
+    Pull-based content sync against the hub's per-device manifest.
+
+    Every interval the agent fetches the manifest, downloads files that are
+    missing or whose hash differs (resuming partial downloads with Range
+    requests), verifies their SHA-256 and moves them into the upload
+    directory. Files it installed earlier that are no longer in the manifest
+    are removed. Files uploaded directly to the Pi are never touched.
+    """
+
+    def __init__(self, video_manager, hub_url: str, interval: int):
+        self.video_manager = video_manager
+        self.hub_url = hub_url.rstrip("/")
+        self.interval = interval
+        self.upload_dir: Path = video_manager.upload_dir
+        self.partial_dir = self.upload_dir / "partial"
+        self.partial_dir.mkdir(exist_ok=True)
+        # name -> {"sha256", "size", "mtime"} of files this agent installed
+        self.installed: Dict[str, Dict] = self._load_state()
+        self.last_run: Dict = {}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, Dict]:
+        try:
+            if SYNC_STATE_FILE.exists():
+                with open(SYNC_STATE_FILE, "r") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading sync state: {e}")
+        return {}
+
+    def _save_state(self):
+        tmp_file = SYNC_STATE_FILE.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self.installed, f, indent=2)
+        os.replace(tmp_file, SYNC_STATE_FILE)
+
+    def start(self):
+        threading.Thread(target=self._run, name="content-sync", daemon=True).start()
+
+    def trigger(self):
+        """Run a sync round now instead of waiting for the interval"""
+        self._wake.set()
+
+    def status(self) -> Dict:
+        """Result of the last sync round and the files managed by sync"""
+        return {
+            "hub_url": self.hub_url,
+            "interval": self.interval,
+            "last_run": self.last_run,
+            "managed_files": sorted(
+                name for name, known in self.installed.items() if known.get("managed")
+            ),
+        }
+
+    def _run(self):
+        while True:
+            self.sync_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def fetch_manifest(self) -> Dict:
+        query = urllib.parse.urlencode({"hostname": socket.gethostname()})
+        url = f"{self.hub_url}/sync/manifest?{query}"
+        with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as response:
+            return json.load(response)
+
+    def is_current(self, name: str, entry: Dict) -> bool:
+        path = self.upload_dir / name
+        if not path.exists():
+            return False
+        stat = path.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        known = self.installed.get(name)
+        if known and known["mtime"] == stat.st_mtime and known["size"] == stat.st_size:
+            return known["sha256"] == entry["sha256"]
+        # Not installed by us or changed since: hash once and remember
+        sha256 = file_sha256(path)
+        self.installed[name] = {
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        return sha256 == entry["sha256"]
+
+    def download(self, name: str, entry: Dict):
+        """Download one file, resuming a previous partial download if possible"""
+        part = self.partial_dir / f"{name}.part"
+        part_meta = self.partial_dir / f"{name}.part.json"
+
+        # A partial download of different content can't be resumed
+        if part.exists():
+            try:
+                with open(part_meta, "r") as f:
+                    if json.load(f).get("sha256") != entry["sha256"]:
+                        part.unlink()
+            except (OSError, ValueError):
+                part.unlink()
+        with open(part_meta, "w") as f:
+            json.dump({"sha256": entry["sha256"]}, f)
+
+        offset = part.stat().st_size if part.exists() else 0
+        request = urllib.request.Request(self.hub_url + entry["url"])
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            mode = "ab" if offset and response.status == 206 else "wb"
+            with open(part, mode) as f:
+                for block in iter(lambda: response.read(CHUNK_SIZE), b""):
+                    f.write(block)
+
+        if file_sha256(part) != entry["sha256"]:
+            part.unlink()
+            part_meta.unlink(missing_ok=True)
+            raise ValueError(f"Hash mismatch for {name}")
+
+        target = self.upload_dir / name
+        os.replace(part, target)
+        part_meta.unlink(missing_ok=True)
+        stat = target.stat()
+        self.installed[name] = {
+            "sha256": entry["sha256"],
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "managed": True,
+        }
+        logger.info(f"Synced {name} ({entry['size']} bytes)")
+
+    def retire(self, name: str):
+        current = self.video_manager.current_video
+        if current and Path(current).name == name:
+            self.video_manager.stop()
+            self.video_manager.current_video = None
+        (self.upload_dir / name).unlink(missing_ok=True)
+        (self.video_manager.compressed_dir / name).unlink(missing_ok=True)
+        logger.info(f"Retired {name}")
+
+    def sync_once(self) -> Dict:
+        with self._lock:
+            result = {
+                "started_at": time.time(),
+                "downloaded": [],
+                "retired": [],
+                "failed": {},
+            }
+            try:
+                manifest = self.fetch_manifest()
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                logger.warning(f"Content sync: hub unreachable: {e}")
+                result["error"] = str(e)
+                self.last_run = result
+                return result
+
+            files = manifest.get("files", {})
+            for name, entry in files.items():
+                name = Path(name).name
+                try:
+                    if not self.is_current(name, entry):
+                        self.download(name, entry)
+                        result["downloaded"].append(name)
+                    self.installed[name]["managed"] = True
+                except Exception as e:
+                    logger.error(f"Content sync failed for {name}: {e}")
+                    result["failed"][name] = str(e)
+
+            for name, known in list(self.installed.items()):
+                if name in files:
+                    continue
+                if known.get("managed"):
+                    try:
+                        self.retire(name)
+                        result["retired"].append(name)
+                    except Exception as e:
+                        logger.error(f"Failed to retire {name}: {e}")
+                        result["failed"][name] = str(e)
+                        continue
+                del self.installed[name]
+
+            self._save_state()
+            result["finished_at"] = time.time()
+            self.last_run = result
+            return result
+
+
+def start_content_sync(video_manager) -> Optional[ContentSyncAgent]:
+    """Start the sync agent if a hub is configured"""
+    config = load_sync_config()
+    if not config["hub_url"]:
+        logger.info("Content sync disabled: no hub_url configured")
+        return None
+    agent = ContentSyncAgent(video_manager, config["hub_url"], config["interval"])
+    agent.start()
+    return agent
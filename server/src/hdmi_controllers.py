@@ -4,16 +4,8 @@ import subprocess
 
 class CECController:
     def __init__(self):
-        self.logger = self._setup_logging()
-
-    def _setup_logging(self):
-        logger = logging.getLogger("cec_controller")
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        return logger
+        # Handlers are configured once in src.logging_setup
+        self.logger = logging.getLogger("cec_controller")
 
     def _execute_cec_command(self, command: str) -> str:
         try:
@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.keyframes import summarize
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE = Path("playback_profile.json")
+# Transcodes run beside playback and must never starve VLC of CPU
+INGEST_NICENESS = 10
+
+DEFAULT_PROFILE = {
+    # What the Pi decodes in hardware without dropping frames
+    "video_codecs": ["h264"],
+    "containers": [".mp4", ".mov", ".mkv"],
+    "max_width": 1920,
+    "max_height": 1080,
+    "max_fps": 30,
+    "max_bitrate_kbps": 12000,
+    # How normalized renditions are encoded
+    "encoder": "libx264",
+    "preset": "veryfast",
+    "crf": 23,
+    # Every video is played at this loudness (EBU R128) by a gain on the
+    # player volume, without letting its true peak go over the ceiling
+    "loudness_target_lufs": -23,
+    "max_true_peak_dbtp": -1,
+    "max_gain_db": 12,
+}
+
+
+def load_playback_profile() -> Dict:
+    """
+    Playback profile uploads are normalized to.
+
+    Keys in playback_profile.json override DEFAULT_PROFILE, e.g.
+    {"max_height": 720, "encoder": "h264_v4l2m2m"} for a Pi 3.
+    """
+    profile = dict(DEFAULT_PROFILE)
+    try:
+        if PROFILE_FILE.exists():
+            with open(PROFILE_FILE, "r") as f:
+                profile.update(json.load(f))
+    except Exception as e:
+        logger.error(f"Error loading playback profile: {e}")
+    return profile
+
+
+def plan_rendition(name: str, media: Dict, profile: Dict) -> Tuple[str, List[str]]:
+    """
+    How a video is made playable: "passthrough", "remux" or "transcode",
+    with the reasons it is outside the profile
+    """
+    reasons = []
+    if media["video_codec"] not in profile["video_codecs"]:
+        reasons.append(f"codec {media['video_codec']}")
+    width, height = media["width"] or 0, media["height"] or 0
+    if width > profile["max_width"] or height > profile["max_height"]:
+        reasons.append(f"resolution {width}x{height}")
+    if media["fps"] > profile["max_fps"]:
+        reasons.append(f"{media['fps']} fps")
+    if (media["bitrate_kbps"] or 0) > profile["max_bitrate_kbps"]:
+        reasons.append(f"{media['bitrate_kbps']} kb/s")
+    if reasons:
+        return "transcode", reasons
+
+    suffix = Path(name).suffix.lower()
+    if suffix not in profile["containers"]:
+        return "remux", [f"container {suffix}"]
+    return "passthrough", []
+
+
+def loudness_gain(loudness: Dict, profile: Dict) -> float:
+    """Gain (dB) that brings a video measured at `loudness` to the profile's target"""
+    # Silence is gated to -70 LUFS; there is nothing to bring up
+    if loudness["integrated_lufs"] <= -70 or loudness["true_peak_dbtp"] is None:
+        return 0.0
+    gain = profile["loudness_target_lufs"] - loudness["integrated_lufs"]
+    gain = min(gain, profile["max_true_peak_dbtp"] - loudness["true_peak_dbtp"])
+    return round(float(max(-profile["max_gain_db"], min(profile["max_gain_db"], gain))), 1)
+
+
+def rendition_path(entry: Optional[Dict], rendition_dir: Path) -> Optional[Path]:
+    """The normalized rendition of a library entry, once it is ready"""
+    ingest = entry.get("ingest") if entry else None
+    if ingest and ingest["state"] == "done" and ingest.get("rendition"):
+        path = rendition_dir / ingest["rendition"]
+        if path.is_file():
+            return path
+    return None
+
+
+class Ingest:
+    """
+    Background ingest of every new or replaced video in the library.
+
+    Each upload is probed once with ffprobe and what it is (codec, size,
+    frame rate, bitrate, duration) is added to its library entry. Videos
+    outside the playback profile are transcoded into a normalized
+    rendition, videos in a container outside it are remuxed without
+    re-encoding, and VLC plays that rendition instead of the upload.
+    Everything else is played as uploaded. The loudness of every video
+    with audio is measured so the player can level it with a gain, and
+    whichever file is played gets its keyframes indexed for seeking. One
+    video is processed at a time, at low CPU priority.
+    """
+
+    def __init__(
+        self,
+        library,
+        compressor,
+        rendition_dir: Path,
+        keyframes,
+        profile: Optional[Dict] = None,
+    ):
+        self.library = library
+        self.compressor = compressor
+        self.rendition_dir = rendition_dir
+        self.keyframes = keyframes
+        self.rendition_dir.mkdir(exist_ok=True)
+        self.profile = profile or load_playback_profile()
+        library.removed_hooks.append(self._remove_rendition)
+
+    def start(self):
+        self._prune()
+        self.keyframes.prune()
+        threading.Thread(target=self._run, name="ingest", daemon=True).start()
+
+    def _run(self):
+        while True:
+            name, entry = self.library.next_pending()
+            try:
+                self.ingest(name, entry)
+            except Exception as e:
+                logger.error(f"Ingest of {name} failed: {e}")
+                self.library.update(name, entry, ingest={"state": "failed", "error": str(e)})
+
+    def ingest(self, name: str, entry: Dict):
+        # A replaced video must not keep the rendition of its predecessor
+        self._remove_rendition(name)
+        source = self.library.upload_dir / name
+        media = self.compressor.describe_video(str(source))
+        if media is None:
+            self.library.update(
+                name, entry, ingest={"state": "failed", "error": "Could not probe the video"}
+            )
+            return
+
+        action, reasons = plan_rendition(name, media, self.profile)
+        ingest = {
+            "state": "done" if action == "passthrough" else "running",
+            "action": action,
+            "reasons": reasons,
+            "rendition": None,
+        }
+        if not self.library.update(
+            name, entry, duration=media["duration"], media=media, ingest=ingest
+        ):
+            return
+        if media["audio_codec"] is not None:
+            self._measure_loudness(name, entry, source)
+        if action == "passthrough":
+            self._index(name, entry, source)
+            return
+
+        logger.info(f"Ingest of {name}: {action} ({', '.join(reasons)})")
+        rendition = self.rendition_dir / f"{name}.mp4"
+        partial = self.rendition_dir / f".{name}.part.mp4"
+        started = time.monotonic()
+        if action == "remux":
+            ok = self.compressor.remux(str(source), str(partial), niceness=INGEST_NICENESS)
+        else:
+            ok = self.compressor.normalize(
+                str(source), str(partial), media, self.profile, niceness=INGEST_NICENESS
+            )
+        elapsed = round(time.monotonic() - started, 1)
+        if ok:
+            os.replace(partial, rendition)
+        else:
+            partial.unlink(missing_ok=True)
+
+        done = {
+            **ingest,
+            "state": "done" if ok else "failed",
+            "rendition": rendition.name if ok else None,
+            "elapsed_s": elapsed,
+        }
+        if not self.library.update(name, entry, ingest=done) and ok:
+            # Replaced or removed meanwhile; the new file gets its own ingest
+            rendition.unlink(missing_ok=True)
+            return
+        logger.info(f"Ingest of {name} {done['state']} after {elapsed} s")
+        self._index(name, entry, rendition if ok else source)
+
+    def _measure_loudness(self, name: str, entry: Dict, source: Path):
+        loudness = self.compressor.measure_loudness(str(source), niceness=INGEST_NICENESS)
+        if loudness is None:
+            logger.warning(f"Could not measure the loudness of {name}")
+            return
+        loudness["gain_db"] = loudness_gain(loudness, self.profile)
+        logger.info(
+            f"Loudness of {name}: {loudness['integrated_lufs']} LUFS, gain {loudness['gain_db']} dB"
+        )
+        self.library.update(name, entry, loudness=loudness)
+
+    def _index(self, name: str, entry: Dict, playback: Path):
+        keyframes = self.keyframes.get(playback)
+        if keyframes:
+            self.library.update(name, entry, keyframes=summarize(keyframes))
+
+    def _remove_rendition(self, name: str):
+        (self.rendition_dir / f"{name}.mp4").unlink(missing_ok=True)
+
+    def _prune(self):
+        # Renditions of videos removed while the player was down, and
+        # partial files of interrupted transcodes
+        keep = set()
+        for name in self.library.names():
+            ingest = (self.library.get(name) or {}).get("ingest") or {}
+            if ingest.get("rendition"):
+                keep.add(ingest["rendition"])
+        for path in self.rendition_dir.iterdir():
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
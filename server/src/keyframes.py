@@ -0,0 +1,91 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Keyframes = List[Tuple[float, int]]  # (seconds, byte offset) in time order
+
+
+def nearest_keyframe(keyframes: Keyframes, seconds: float) -> Tuple[float, int]:
+    """The keyframe closest to `seconds`, on either side"""
+    times = [time for time, _ in keyframes]
+    i = bisect.bisect_left(times, seconds)
+    candidates = keyframes[max(i - 1, 0) : i + 1]
+    return min(candidates, key=lambda keyframe: abs(keyframe[0] - seconds))
+
+
+def summarize(keyframes: Keyframes) -> dict:
+    """Keyframe count and the longest gap between two, for library entries"""
+    gaps = [b[0] - a[0] for a, b in zip(keyframes, keyframes[1:])]
+    return {"count": len(keyframes), "max_interval_s": round(max(gaps, default=0), 3)}
+
+
+class KeyframeIndex:
+    """
+    Keyframe times and byte offsets of video files, extracted once with
+    ffprobe and cached as JSON files in `cache_dir`.
+
+    A cached index is only used while its file keeps the size and mtime it
+    was indexed at, so a replaced file is indexed again.
+    """
+
+    def __init__(self, compressor, cache_dir: Path):
+        self.compressor = compressor
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(exist_ok=True)
+
+    def _cache_file(self, path: Path) -> Path:
+        return self.cache_dir / (hashlib.sha1(str(path).encode()).hexdigest()[:16] + ".json")
+
+    @staticmethod
+    def _signature(path: Path) -> List[int]:
+        st = path.stat()
+        return [st.st_size, st.st_mtime_ns]
+
+    def cached(self, path: Path) -> Optional[Keyframes]:
+        """The index of `path` if it was already extracted; never runs ffprobe"""
+        try:
+            with open(self._cache_file(path), "r") as f:
+                index = json.load(f)
+            if index["signature"] == self._signature(path):
+                return [tuple(keyframe) for keyframe in index["keyframes"]]
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def get(self, path: Path) -> Optional[Keyframes]:
+        """The index of `path`, extracting it first if needed"""
+        keyframes = self.cached(path)
+        if keyframes is not None:
+            return keyframes
+        signature = self._signature(path)
+        keyframes = self.compressor.get_keyframes(str(path))
+        if not keyframes:
+            logger.warning(f"No keyframes found in {path}")
+            return None
+
+        index = {"path": str(path), "signature": signature, "keyframes": keyframes}
+        # Written aside: the player and the API may index the same file at once
+        tmp_file = self.cache_dir / f".{uuid.uuid4().hex}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_file, self._cache_file(path))
+        return keyframes
+
+    def prune(self):
+        """Drop the indexes of files that were removed or replaced"""
+        for cache_file in self.cache_dir.iterdir():
+            try:
+                with open(cache_file, "r") as f:
+                    index = json.load(f)
+                if index["signature"] == self._signature(Path(index["path"])):
+                    continue
+            except (OSError, ValueError, KeyError):
+                pass
+            cache_file.unlink(missing_ok=True)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import threading
+from typing import AsyncIterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_HOST = "127.0.0.1"
+PREVIEW_PORT = 8090
+PREVIEW_PATH = "/live.mjpg"
+PREVIEW_WIDTH = 320
+PREVIEW_FPS = 4
+PREVIEW_BITRATE = 600  # kbit/s
+# Keep the tee running this long after the last viewer leaves, so closing
+# and reopening a preview doesn't restart the media twice
+PREVIEW_LINGER = 15.0
+# TVS_LIVE_PREVIEW=always opens every video with the tee, so a viewer never
+# disturbs playback, at the cost of transcoding the preview all the time
+PREVIEW_ALWAYS_ON = os.environ.get("TVS_LIVE_PREVIEW") == "always"
+CONNECT_TIMEOUT = 8.0
+CHUNK_SIZE = 16 * 1024
+
+
+def preview_media_options() -> List[str]:
+    """
+    libvlc media options that duplicate the player output into a small MJPEG
+    stream served by VLC itself on localhost, next to the normal display.
+    """
+    transcode = (
+        f"transcode{{vcodec=MJPG,vb={PREVIEW_BITRATE},width={PREVIEW_WIDTH},"
+        f"fps={PREVIEW_FPS},acodec=none}}"
+    )
+    output = (
+        f"standard{{access=http,mux=mpjpeg,"
+        f"dst={PREVIEW_HOST}:{PREVIEW_PORT}{PREVIEW_PATH}}}"
+    )
+    return [
+        f':sout=#duplicate{{dst=display,dst="{transcode}:{output}"}}',
+        ":sout-keep",
+    ]
+
+
+class LivePreview:
+    """
+    Live low-bitrate view of what the TV is showing.
+
+    The tee only runs while at least one viewer is connected: the first
+    viewer turns it on in the video manager (the current media is reopened
+    with the stream output, at the same position), and it is turned off
+    again once the last viewer has been gone for PREVIEW_LINGER seconds.
+    With PREVIEW_ALWAYS_ON the tee is part of every media and never toggled.
+    Viewers are served by relaying VLC's local HTTP output.
+    """
+
+    def __init__(self, video_manager):
+        self.video_manager = video_manager
+        self.viewers = 0
+        self._lock = threading.Lock()
+        self._linger: Optional[threading.Timer] = None
+
+    def _acquire(self):
+        with self._lock:
+            self.viewers += 1
+            if self._linger is not None:
+                self._linger.cancel()
+                self._linger = None
+            if self.viewers == 1:
+                self.video_manager.set_live_preview(True)
+
+    def _release(self):
+        with self._lock:
+            self.viewers -= 1
+            if self.viewers == 0:
+                self._linger = threading.Timer(PREVIEW_LINGER, self._stop_if_idle)
+                self._linger.daemon = True
+                self._linger.start()
+
+    def _stop_if_idle(self):
+        with self._lock:
+            self._linger = None
+            if self.viewers == 0:
+                self.video_manager.set_live_preview(False)
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, str]:
+        # VLC opens its HTTP output a moment after the media starts
+        deadline = asyncio.get_running_loop().time() + CONNECT_TIMEOUT
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(PREVIEW_HOST, PREVIEW_PORT)
+                break
+            except OSError:
+                if asyncio.get_running_loop().time() > deadline:
+                    raise RuntimeError("Live preview stream did not start")
+                await asyncio.sleep(0.25)
+
+        writer.write(f"GET {PREVIEW_PATH} HTTP/1.0\r\nHost: {PREVIEW_HOST}\r\n\r\n".encode())
+        await writer.drain()
+        header = await reader.readuntil(b"\r\n\r\n")
+        content_type = "multipart/x-mixed-replace"
+        for line in header.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-type":
+                content_type = value.strip()
+        return reader, writer, content_type
+
+    async def open(self) -> Tuple[str, AsyncIterator[bytes]]:
+        """Register a viewer and return the stream's content type and body"""
+        await asyncio.to_thread(self._acquire)
+        try:
+            reader, writer, content_type = await self._connect()
+        except Exception:
+            self._release()
+            raise
+
+        async def relay():
+            try:
+                while chunk := await reader.read(CHUNK_SIZE):
+                    yield chunk
+            finally:
+                writer.close()
+                self._release()
+
+        return content_type, relay()
@@ -0,0 +1,184 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+LOG_DIR = Path("logs")
+APP_LOG_FILE = LOG_DIR / "server.log"
+PLAYER_LOG_FILE = LOG_DIR / "player.log"
+VLC_LOG_FILE = LOG_DIR / "vlc.log"
+
+APP_LOG_MAX_BYTES = 5 * 1024 * 1024
+VLC_LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_QUEUE_SIZE = 10000
+LOG_CHECK_INTERVAL = 30
+
+# Per-subsystem levels, keyed by logger name prefix.
+# Override with e.g. TVS_LOG_LEVELS="cec_controller=DEBUG,uvicorn.access=INFO"
+LOG_LEVELS: Dict[str, str] = {
+    "src": "INFO",
+    "cec_controller": "INFO",
+    "uvicorn": "INFO",
+    "uvicorn.access": "WARNING",
+}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, but keep them separate so the
+        # JSON formatter can still emit the exception as its own field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class CopyTruncateRotator(threading.Thread):
+    """
+    Size-based rotation for log files other processes keep open: the one
+    libvlc writes itself, and the one every API worker appends to.
+
+    Writers hold their files open in append mode, so a file is rotated
+    copy-then-truncate style and they keep writing at the new end of file.
+    Only one process may rotate a given file.
+    """
+
+    def __init__(self, limits: Dict[Path, int], backup_count: int):
+        super().__init__(name="log-rotator", daemon=True)
+        self.limits = limits  # path -> max bytes
+        self.backup_count = backup_count
+
+    def run(self):
+        while True:
+            for path, max_bytes in self.limits.items():
+                try:
+                    if path.exists() and path.stat().st_size > max_bytes:
+                        self.rotate(path)
+                except OSError as e:
+                    logging.getLogger(__name__).warning(f"Rotation of {path} failed: {e}")
+            time.sleep(LOG_CHECK_INTERVAL)
+
+    def rotate(self, path: Path):
+        for index in range(self.backup_count - 1, 0, -1):
+            older = path.with_name(f"{path.name}.{index}")
+            if older.exists():
+                older.replace(path.with_name(f"{path.name}.{index + 1}"))
+        shutil.copyfile(path, path.with_name(f"{path.name}.1"))
+        with open(path, "r+b") as f:
+            f.truncate(0)
+
+
+def _parse_levels() -> Dict[str, str]:
+    levels = dict(LOG_LEVELS)
+    for item in os.environ.get("TVS_LOG_LEVELS", "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(
+    log_file: Path = APP_LOG_FILE,
+    rotate_vlc_log: bool = True,
+    shared: bool = False,
+    rotate_shared: Optional[List[Path]] = None,
+) -> None:
+    """
+    Configure logging for the whole Pi server.
+
+    Every logger writes into a bounded in-memory queue; a background listener
+    thread formats the records and writes them to a size-rotated JSON log file
+    and, for warnings and above, to stderr. Only the process running VLC
+    should rotate the VLC log. Safe to call more than once.
+
+    With `shared`, several processes (API workers) append to `log_file` and
+    none of them rotates it: one other process lists it in `rotate_shared`
+    and rotates it copy-then-truncate style instead.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    LOG_DIR.mkdir(exist_ok=True)
+
+    if shared:
+        # Renaming the file under the other writers would lose their lines
+        file_handler = logging.FileHandler(log_file)
+    else:
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=APP_LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+        )
+    file_handler.setFormatter(JsonFormatter())
+
+    # stderr ends up in pm2's unrotated log files, so keep it to warnings
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+    console_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(logging.WARNING)
+
+    for name, level in _parse_levels().items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    limits = {path: APP_LOG_MAX_BYTES for path in rotate_shared or []}
+    if rotate_vlc_log:
+        limits[VLC_LOG_FILE] = VLC_LOG_MAX_BYTES
+    if limits:
+        CopyTruncateRotator(limits, LOG_BACKUP_COUNT).start()
@@ -0,0 +1,317 @@
+import base64
+import json
+import logging
+import socket
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.keyframes import KeyframeIndex
+from src.live_preview import LivePreview
+from src.routers.tv_controller import DaySchedule, WeeklySchedule
+from src.preview import PreviewBuilder
+from src.snapshot import SNAPSHOT_TTL
+from src.video_compressor import VideoCompressor
+from src.video_manager import COMPRESSED_DIR, KEYFRAME_DIR, UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAYER_SOCKET = "player.sock"
+# Long enough for prepare_paused, which waits up to 10 s twice on VLC
+CALL_TIMEOUT = 30.0
+
+# Exceptions that cross the socket with their type, so routers keep handling
+# them exactly as they did with an in-process player
+ERROR_TYPES = {
+    cls.__name__: cls
+    for cls in (FileNotFoundError, KeyError, LookupError, RuntimeError, TypeError, ValueError)
+}
+
+
+class PlayerUnavailableError(RuntimeError):
+    """The player daemon could not be reached"""
+
+
+def error_payload(error: Exception) -> Dict[str, str]:
+    message = error.args[0] if len(error.args) == 1 else str(error)
+    return {"type": type(error).__name__, "message": str(message)}
+
+
+class PlayerClient:
+    """
+    Calls into the player daemon over its Unix socket.
+
+    The protocol is one JSON object per line in each direction: requests are
+    {"method", "params"}, replies {"result"} or {"error": {"type", "message"}}.
+    Each thread keeps its own connection; a connection that went stale
+    because the daemon restarted is replaced once before giving up.
+    """
+
+    def __init__(self, path: str, timeout: float = CALL_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        return sock, sock.makefile("rb")
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def call(self, method: str, **params) -> Any:
+        request = json.dumps({"method": method, "params": params}).encode() + b"\n"
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            fresh = conn is None
+            try:
+                if conn is None:
+                    conn = self._local.conn = self._connect()
+                conn[0].sendall(request)
+                line = conn[1].readline()
+                if not line:
+                    raise ConnectionResetError("connection closed by the player daemon")
+                break
+            except TimeoutError as e:
+                # The command may still be running; never send it twice
+                self._close()
+                raise PlayerUnavailableError(f"Player daemon timed out on {method}") from e
+            except OSError as e:
+                self._close()
+                if fresh or attempt:
+                    raise PlayerUnavailableError(
+                        f"Player daemon is not reachable: {e}"
+                    ) from e
+
+        reply = json.loads(line)
+        if "error" in reply:
+            error = reply["error"]
+            raise ERROR_TYPES.get(error["type"], RuntimeError)(error["message"])
+        return reply["result"]
+
+
+class RemoteSnapshots:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+        self.ttl = SNAPSHOT_TTL
+
+    def get(self) -> Dict:
+        snapshot = self._client.call("snapshot.get")
+        return {**snapshot, "data": base64.b64decode(snapshot["data"])}
+
+
+class RemoteMemoryMonitor:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+
+    def report(self, since: float = 0) -> Dict:
+        return self._client.call("memory.report", since=since)
+
+
+class RemoteVideoLibrary:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+
+    def summary(self) -> Dict[str, int]:
+        return self._client.call("library.summary")
+
+    def names(self) -> List[str]:
+        return self._client.call("library.names")
+
+    def page(self, **query) -> Dict:
+        return self._client.call("library.page", **query)
+
+    def changes_since(self, since: int) -> Optional[Dict]:
+        return self._client.call("library.changes", since=since)
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self._client.call("library.get", name=name)
+
+    def annotate(self, name: str, uploaded_at: float, **fields) -> bool:
+        return self._client.call(
+            "library.annotate", name=name, uploaded_at=uploaded_at, **fields
+        )
+
+
+class RemoteLivePreview(LivePreview):
+    """
+    Live preview whose viewer count is kept by the player daemon, so viewers
+    on every API worker share one tee. The stream itself is VLC's local HTTP
+    output and is relayed from here as before.
+    """
+
+    def __init__(self, client: PlayerClient):
+        super().__init__(None)
+        self._client = client
+
+    def _acquire(self):
+        self._client.call("preview.acquire")
+
+    def _release(self):
+        try:
+            self._client.call("preview.release")
+        except PlayerUnavailableError as e:
+            logger.warning(f"Could not release live preview viewer: {e}")
+
+
+class RemotePlaylistStore:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+
+    def all(self) -> Dict[str, Dict]:
+        return self._client.call("playlists.all")
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self._client.call("playlists.get", name=name)
+
+    def put(self, name: str, playlist: Dict):
+        self._client.call("playlists.put", name=name, playlist=playlist)
+
+    def delete(self, name: str):
+        self._client.call("playlists.delete", name=name)
+
+
+class RemotePlaylists:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+        self.store = RemotePlaylistStore(client)
+
+    @property
+    def name(self) -> Optional[str]:
+        return self._client.call("playlists.name")
+
+    def start(self, name: str, index: Optional[int] = None, start_ms: int = 0):
+        self._client.call("playlists.start", name=name, index=index, start_ms=start_ms)
+
+    def report(self) -> Optional[Dict]:
+        return self._client.call("playlists.report")
+
+
+class RemoteVideoManager:
+    """
+    Stands in for VideoManager in the API process.
+
+    Files are still written and read here (both processes share the upload
+    directory); everything that touches VLC is forwarded to the daemon.
+    """
+
+    def __init__(self, client: PlayerClient):
+        self._client = client
+        self.upload_dir = UPLOAD_DIR
+        self.compressed_dir = COMPRESSED_DIR
+        self.upload_dir.mkdir(exist_ok=True)
+        self.compressed_dir.mkdir(exist_ok=True)
+        self.compressor = VideoCompressor(target_resolution=240, target_fps=10)
+        self.snapshots = RemoteSnapshots(client)
+        self.memory = RemoteMemoryMonitor(client)
+        self.library = RemoteVideoLibrary(client)
+        self.previews = PreviewBuilder(self.compressor, self.compressed_dir)
+        self.keyframes = KeyframeIndex(self.compressor, KEYFRAME_DIR)
+        self.live_preview = RemoteLivePreview(client)
+        self.playlists = RemotePlaylists(client)
+
+    @property
+    def current_video(self) -> Optional[str]:
+        return self._client.call("video.get", name="current_video")
+
+    @current_video.setter
+    def current_video(self, video_path: Optional[str]):
+        self._client.call("video.set_current", video_path=video_path)
+
+    @property
+    def startup_report(self) -> Optional[Dict]:
+        return self._client.call("video.get", name="startup_report")
+
+    @property
+    def sync_start_report(self) -> Optional[Dict]:
+        return self._client.call("video.get", name="sync_start_report")
+
+    def get_status(self) -> Dict:
+        return self._client.call("video.status")
+
+    def load_video(self, video_path: str):
+        self._client.call("video.load", video_path=video_path)
+
+    def play(self):
+        self._client.call("video.play")
+
+    def pause(self):
+        self._client.call("video.pause")
+
+    def stop(self):
+        self._client.call("video.stop")
+
+    def seek(self, seconds: float) -> Dict:
+        return self._client.call("video.seek", seconds=seconds)
+
+    def set_volume(self, volume: int):
+        self._client.call("video.set_volume", volume=volume)
+
+    def prepare_paused(self, video_path: str, auto_start: bool = True):
+        self._client.call(
+            "video.prepare_paused", video_path=video_path, auto_start=auto_start
+        )
+
+    def start_at(self, start_at: float):
+        self._client.call("video.start_at", start_at=start_at)
+
+
+class RemoteTVController:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+
+    @property
+    def schedule_version(self) -> int:
+        return self._client.call("tv.schedule_version")
+
+    @property
+    def current_schedule(self) -> WeeklySchedule:
+        return WeeklySchedule(**self._client.call("tv.get_schedule"))
+
+    @current_schedule.setter
+    def current_schedule(self, schedule: WeeklySchedule):
+        self._client.call("tv.set_schedule", schedule=schedule.model_dump())
+
+    def schedule_day(self, day: str, times: DaySchedule):
+        self._client.call("tv.schedule_day", day=day, times=times.model_dump())
+
+    def save_schedule(self):
+        self._client.call("tv.save_schedule")
+
+    def clear_schedule(self):
+        self._client.call("tv.clear_schedule")
+
+    def turn_on_tv(self):
+        return self._client.call("tv.turn_on")
+
+    def turn_off_tv(self):
+        return self._client.call("tv.turn_off")
+
+    def get_tv_status(self) -> bool:
+        return self._client.call("tv.status")
+
+
+class RemoteCECController:
+    def __init__(self, client: PlayerClient):
+        self._client = client
+
+    def switch_input(self, device_number: int) -> bool:
+        return self._client.call("cec.switch_input", device_number=device_number)
+
+
+class RemoteSyncAgent:
+    """Content sync runs next to the player, so only one agent exists per Pi"""
+
+    def __init__(self, client: PlayerClient):
+        self._client = client
+
+    def status(self) -> Dict:
+        return self._client.call("sync.status")
+
+    def trigger(self):
+        self._client.call("sync.trigger")
@@ -0,0 +1,170 @@
+import base64
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.content_sync import start_content_sync
+from src.hdmi_controllers import CECController
+from src.player_client import ERROR_TYPES, error_payload
+from src.routers.tv_controller import DaySchedule, WeeklySchedule
+from src.tv_controller import TVController
+from src.video_manager import VideoManager
+
+logger = logging.getLogger(__name__)
+
+# VideoManager attributes the API may read
+READABLE_ATTRIBUTES = {"current_video", "startup_report", "sync_start_report"}
+
+
+class PlayerService:
+    """
+    Everything on the Pi that has to outlive the API: VLC, the CEC bus, the
+    TV schedule and content sync.
+
+    Methods are exposed by name to the API process(es) through serve().
+    Commands that change playback run one at a time, as they did when the
+    single API event loop serialized them; reads never wait behind them.
+    """
+
+    def __init__(self):
+        self.video_manager = VideoManager()
+        self.cec_controller = CECController()
+        self.tv_controller = TVController(self.video_manager, self.cec_controller)
+        self.sync_agent = start_content_sync(self.video_manager)
+        self._command_lock = threading.Lock()
+
+        vm, tv, playlists = self.video_manager, self.tv_controller, self.video_manager.playlists
+        # method -> (handler taking the request params, serialized with other commands)
+        self.methods: Dict[str, Tuple[Callable[..., Any], bool]] = {
+            "video.status": (vm.get_status, False),
+            "video.get": (self._get_attribute, False),
+            "video.set_current": (self._set_current, True),
+            "video.load": (vm.load_video, True),
+            "video.play": (vm.play, True),
+            "video.pause": (vm.pause, True),
+            "video.stop": (vm.stop, True),
+            "video.seek": (vm.seek, True),
+            "video.set_volume": (vm.set_volume, True),
+            "video.prepare_paused": (vm.prepare_paused, True),
+            "video.start_at": (vm.start_at, True),
+            "memory.report": (vm.memory.report, False),
+            "library.summary": (vm.library.summary, False),
+            "library.names": (vm.library.names, False),
+            "library.page": (vm.library.page, False),
+            "library.get": (vm.library.get, False),
+            "library.annotate": (vm.library.annotate, False),
+            "library.changes": (vm.library.changes_since, False),
+            "snapshot.get": (self._snapshot, False),
+            "preview.acquire": (vm.live_preview._acquire, True),
+            "preview.release": (vm.live_preview._release, False),
+            "playlists.all": (playlists.store.all, False),
+            "playlists.get": (playlists.store.get, False),
+            "playlists.put": (playlists.store.put, False),
+            "playlists.delete": (playlists.store.delete, False),
+            "playlists.name": (lambda: playlists.name, False),
+            "playlists.start": (playlists.start, True),
+            "playlists.report": (playlists.report, False),
+            "tv.get_schedule": (lambda: tv.current_schedule.model_dump(), False),
+            "tv.schedule_version": (lambda: tv.schedule_version, False),
+            "tv.set_schedule": (self._set_schedule, True),
+            "tv.schedule_day": (self._schedule_day, True),
+            "tv.save_schedule": (tv.save_schedule, True),
+            "tv.clear_schedule": (tv.clear_schedule, True),
+            "tv.turn_on": (tv.turn_on_tv, True),
+            "tv.turn_off": (tv.turn_off_tv, True),
+            "tv.status": (tv.get_tv_status, False),
+            "cec.switch_input": (self.cec_controller.switch_input, True),
+            "sync.status": (lambda: self._require_sync().status(), False),
+            "sync.trigger": (lambda: self._require_sync().trigger(), False),
+        }
+
+    def _get_attribute(self, name: str) -> Any:
+        if name not in READABLE_ATTRIBUTES:
+            raise ValueError(f"Unknown attribute {name}")
+        return getattr(self.video_manager, name)
+
+    def _set_current(self, video_path: Optional[str]):
+        self.video_manager.current_video = video_path
+
+    def _snapshot(self) -> Dict:
+        snapshot = self.video_manager.snapshots.get()
+        return {**snapshot, "data": base64.b64encode(snapshot["data"]).decode()}
+
+    def _set_schedule(self, schedule: Dict):
+        self.tv_controller.current_schedule = WeeklySchedule(**schedule)
+
+    def _schedule_day(self, day: str, times: Dict):
+        self.tv_controller.schedule_day(day, DaySchedule(**times))
+
+    def _require_sync(self):
+        if self.sync_agent is None:
+            raise LookupError("Content sync is not configured")
+        return self.sync_agent
+
+    def dispatch(self, request: Dict) -> Dict:
+        method = request.get("method")
+        if method not in self.methods:
+            return {"error": {"type": "ValueError", "message": f"Unknown method {method}"}}
+        handler, exclusive = self.methods[method]
+        try:
+            if exclusive:
+                with self._command_lock:
+                    result = handler(**request.get("params", {}))
+            else:
+                result = handler(**request.get("params", {}))
+            return {"result": result}
+        except Exception as e:
+            if type(e).__name__ not in ERROR_TYPES:
+                logger.error(f"Player method {method} failed: {e}")
+            return {"error": error_payload(e)}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.service.dispatch(json.loads(line))
+            except ValueError as e:
+                reply = {"error": error_payload(e)}
+            self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+
+class PlayerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: PlayerService):
+        self.service = service
+        super().__init__(path, _RequestHandler)
+
+
+def serve(path: str):
+    """
+    Run the player and serve it on a Unix socket until SIGTERM.
+
+    The player is started first, so the last video is back on screen before
+    the API can reach it. The socket is only accessible to this user: it
+    bypasses the API's authentication.
+    """
+    service = PlayerService()
+
+    Path(path).unlink(missing_ok=True)
+    server = PlayerServer(path, service)
+    os.chmod(path, 0o600)
+
+    def handle_sigterm(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    logger.info(f"Player daemon listening on {path}")
+    try:
+        server.serve_forever()
+    finally:
+        # Resume exactly here when the daemon comes back
+        service.video_manager.save_last_played()
+        server.server_close()
+        Path(path).unlink(missing_ok=True)
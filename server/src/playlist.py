@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import vlc
+
+logger = logging.getLogger(__name__)
+
+PLAYLISTS_FILE = Path("playlists.json")
+
+LOOKAHEAD = 2  # items queued and pre-parsed beyond the current one
+MAX_QUEUED = 50  # the media list is rebuilt once this many items have played
+
+
+class PlaylistStore:
+    """
+    Named playlists persisted in playlists.json.
+
+    A playlist is {"mode": "ordered" | "shuffle" | "weighted", "items": [...]}
+    where each item is {"video", "duration", "weight"}; duration (seconds)
+    cuts an item short, weight only matters in weighted mode.
+    """
+
+    def __init__(self, path: Path = PLAYLISTS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.playlists: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            if self.path.exists():
+                with open(self.path, "r") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading playlists: {e}")
+        return {}
+
+    def _save(self):
+        tmp_file = self.path.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self.playlists, f, indent=2)
+        os.replace(tmp_file, self.path)
+
+    def all(self) -> Dict[str, Dict]:
+        return self.playlists
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self.playlists.get(name)
+
+    def put(self, name: str, playlist: Dict):
+        with self._lock:
+            self.playlists[name] = playlist
+            self._save()
+
+    def delete(self, name: str):
+        with self._lock:
+            del self.playlists[name]
+            self._save()
+
+
+class PlaylistEngine:
+    """
+    Plays a playlist through the video manager's media list player.
+
+    The media list holds the current item plus LOOKAHEAD upcoming ones, so
+    VLC moves from item to item on its own. Every time VLC starts the next
+    item, a worker thread queues one more item (picked according to the
+    playlist's mode) and starts parsing it in the background, so the file is
+    opened and probed well before its turn. After MAX_QUEUED items the media
+    list is rebuilt from the current item to keep it small.
+    """
+
+    def __init__(self, video_manager, store: PlaylistStore):
+        self.video_manager = video_manager
+        self.store = store
+        self.name: Optional[str] = None
+        self.playlist: Optional[Dict] = None
+        # Playlist item indices in media list order, and the playing one
+        self.sequence: List[int] = []
+        self.position = -1
+        self.item_started_at: Optional[float] = None
+        self.cycle = 0
+        self._order: List[int] = []
+        self._lock = threading.RLock()
+        self._events: queue.Queue = queue.Queue()
+        # Bumped on every media list rebuild, so events of an old list are ignored
+        self._generation = 0
+        self._attached_to = None
+        threading.Thread(target=self._run, name="playlist", daemon=True).start()
+
+    @property
+    def active(self) -> bool:
+        return self.playlist is not None
+
+    def _attach(self):
+        list_player = self.video_manager.list_player
+        if self._attached_to is not list_player:
+            list_player.event_manager().event_attach(
+                vlc.EventType.MediaListPlayerNextItemSet, self._on_next_item
+            )
+            self._attached_to = list_player
+
+    def _on_next_item(self, event):
+        # Runs on a libvlc thread, which must not call back into the player
+        self._events.put((time.time(), self._generation))
+
+    def _path(self, index: int) -> Path:
+        return self.video_manager.upload_dir / self.playlist["items"][index]["video"]
+
+    def _next_index(self) -> int:
+        """Pick the item after the last queued one, skipping missing files"""
+        items = self.playlist["items"]
+        for _ in range(len(items)):
+            mode = self.playlist["mode"]
+            if mode == "weighted":
+                weights = [item.get("weight", 1) for item in items]
+                index = random.choices(range(len(items)), weights=weights)[0]
+            else:
+                if not self._order:
+                    self._order = list(range(len(items)))
+                    if mode == "shuffle":
+                        random.shuffle(self._order)
+                        # Don't play the same item twice across a cycle boundary
+                        last = self.sequence[-1] if self.sequence else None
+                        if len(items) > 1 and self._order[0] == last:
+                            self._order.append(self._order.pop(0))
+                    self.cycle += 1
+                index = self._order.pop(0)
+            if self._path(index).is_file():
+                return index
+        raise FileNotFoundError(f"No file of playlist {self.name} is available")
+
+    def _new_media(self, index: int, start_ms: int = 0):
+        item = self.playlist["items"][index]
+        options = list(self.video_manager._media_options())
+        if start_ms > 0:
+            options.append(f":start-time={start_ms / 1000:.3f}")
+        if item.get("duration"):
+            options.append(f":stop-time={item['duration']}")
+        media = self.video_manager._media_new(str(self._path(index)), *options)
+        # Asynchronous parse: demuxer probing happens before the item's turn
+        media.parse_with_options(vlc.MediaParseFlag.local, 0)
+        return media
+
+    def _enqueue(self, index: int, start_ms: int = 0):
+        media = self._new_media(index, start_ms)
+        media_list = self.video_manager.media_list
+        media_list.lock()
+        try:
+            media_list.add_media(media)
+        finally:
+            media_list.unlock()
+        media.release()  # the media list holds its own reference
+        self.sequence.append(index)
+
+    def _fill(self):
+        while len(self.sequence) - self.position - 1 < LOOKAHEAD:
+            self._enqueue(self._next_index())
+
+    def _rebuild(self, indices: List[int], start_ms: int = 0):
+        """New media list of `indices`, the first one starting at `start_ms`"""
+        vm = self.video_manager
+        vm._replace_media_list()
+        vm.list_player.set_playback_mode(vlc.PlaybackMode.default)
+        self._generation += 1
+        self.sequence = []
+        self.position = -1
+        for offset, index in enumerate(indices):
+            self._enqueue(index, start_ms if offset == 0 else 0)
+        self._fill()
+
+    def start(self, name: str, index: Optional[int] = None, start_ms: int = 0):
+        """
+        Start playing a stored playlist, from its beginning or from item
+        `index` at `start_ms` (used to resume after a restart).
+        """
+        playlist = self.store.get(name)
+        if playlist is None:
+            raise KeyError(f"Playlist not found: {name}")
+        if not playlist["items"]:
+            raise ValueError("Playlist is empty")
+        with self._lock:
+            self._attach()
+            self.name, self.playlist = name, playlist
+            self._order, self.sequence, self.cycle = [], [], 0
+            count = len(playlist["items"])
+            if index is not None and 0 <= index < count and self._path(index).is_file():
+                if playlist["mode"] == "ordered":
+                    # Carry on with the items after the resumed one
+                    self._order, self.cycle = list(range(index + 1, count)), 1
+                self._rebuild([index], start_ms)
+            else:
+                self._rebuild([self._next_index()])
+            self.video_manager.list_player.play()
+            self.video_manager.is_playing = True
+        logger.info(f"Playlist {name} started ({playlist['mode']})")
+
+    def reopen(self):
+        """Rebuild the media list from the current item, keeping its position"""
+        with self._lock:
+            if not self.active or self.position < 0:
+                return
+            elapsed = self.video_manager.player.get_time()
+            self._rebuild(self.sequence[self.position :])
+            self.video_manager.list_player.play()
+            if self.video_manager._wait_for_state(vlc.State.Playing, 5.0):
+                self.video_manager.player.set_time(elapsed)
+
+    def current_index(self) -> Optional[int]:
+        if not self.active or self.position < 0:
+            return None
+        return self.sequence[self.position]
+
+    def clear(self):
+        """Forget the playlist; called when a single video takes over"""
+        with self._lock:
+            self.name = self.playlist = None
+            self.sequence, self.position = [], -1
+
+    def _run(self):
+        while True:
+            started_at, generation = self._events.get()
+            with self._lock:
+                if not self.active or generation != self._generation:
+                    continue
+                self.position += 1
+                if self.position >= len(self.sequence):
+                    continue
+                self.item_started_at = started_at
+                current = self._path(self.sequence[self.position])
+                self.video_manager.current_video = str(current)
+                try:
+                    if self.position >= MAX_QUEUED:
+                        # Just started, so restarting it costs nothing visible
+                        self._rebuild(self.sequence[self.position :])
+                        self.video_manager.list_player.play()
+                    else:
+                        self._fill()
+                except Exception as e:
+                    logger.error(f"Playlist {self.name} could not queue items: {e}")
+            # Outside the lock: recycling the player waits on it
+            self.video_manager.apply_volume()
+            # The next item just started
+            self.video_manager.save_last_played(position_ms=0)
+
+    def report(self) -> Optional[Dict]:
+        """Where playback is in the current playlist"""
+        with self._lock:
+            if not self.active or self.position < 0:
+                return None
+            items = self.playlist["items"]
+            current = self.sequence[self.position]
+            return {
+                "playlist": self.name,
+                "mode": self.playlist["mode"],
+                "cycle": self.cycle,
+                "index": current,
+                "video": items[current]["video"],
+                "duration": items[current].get("duration"),
+                "item_started_at": self.item_started_at,
+                "elapsed": round(time.time() - self.item_started_at, 1),
+                "up_next": [
+                    items[index]["video"]
+                    for index in self.sequence[self.position + 1 :]
+                ],
+            }
@@ -0,0 +1,129 @@
+import logging
+import os
+import struct
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sources small enough to be streamed to the dashboard as they are
+PREVIEW_MAX_HEIGHT = 480
+PREVIEW_MAX_KBPS = 2500
+BROWSER_CONTAINERS = {".mp4", ".m4v"}
+BROWSER_AUDIO_CODECS = {None, "aac", "mp3"}
+# Remuxing into MP4 copies these without decoding them
+REMUXABLE_CODECS = {"h264"}
+
+
+def moov_first(path: Path) -> bool:
+    """
+    Whether an MP4's index (moov) comes before its media data (mdat), so a
+    browser can start playing before it has the whole file
+    """
+    try:
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                size, kind = struct.unpack(">I4s", header)
+                if kind == b"moov":
+                    return True
+                if kind == b"mdat" or size == 0:
+                    return False
+                header_size = 8
+                if size == 1:
+                    size = struct.unpack(">Q", f.read(8))[0]
+                    header_size = 16
+                if size < header_size:
+                    # Corrupt: seeking by it would go backwards or stand still
+                    return False
+                f.seek(size - header_size, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return False
+
+
+def plan_preview(source: Path, media: Dict) -> Tuple[str, List[str]]:
+    """
+    The cheapest way to get a browser-playable preview of `source`:
+    "original", "remux" or "transcode", with the reasons for it
+    """
+    reasons = []
+    if media["video_codec"] not in REMUXABLE_CODECS:
+        reasons.append(f"codec {media['video_codec']}")
+    if (media["height"] or 0) > PREVIEW_MAX_HEIGHT:
+        reasons.append(f"height {media['height']}")
+    if (media["bitrate_kbps"] or 0) > PREVIEW_MAX_KBPS:
+        reasons.append(f"{media['bitrate_kbps']} kb/s")
+    if reasons:
+        return "transcode", reasons
+
+    if source.suffix.lower() not in BROWSER_CONTAINERS:
+        reasons.append(f"container {source.suffix.lower()}")
+    elif not moov_first(source):
+        reasons.append("index at the end of the file")
+    if media["audio_codec"] not in BROWSER_AUDIO_CODECS:
+        reasons.append(f"audio {media['audio_codec']}")
+    if reasons:
+        return "remux", reasons
+    return "original", []
+
+
+class PreviewBuilder:
+    """
+    Makes dashboard previews of uploaded videos along the cheapest path.
+
+    A small H.264 MP4 with its index up front is served as it is. One that
+    only needs a different container, an index at the front or no audio is
+    remuxed without re-encoding. Anything else is transcoded to 240p with
+    compress_video. Every build returns a record of the path taken and what
+    it cost, which the caller keeps with the video's library entry.
+    """
+
+    def __init__(self, compressor, compressed_dir: Path):
+        self.compressor = compressor
+        self.compressed_dir = compressed_dir
+
+    def preview_path(self, source: Path, record: Optional[Dict]) -> Optional[Path]:
+        """The preview file a record stands for, if it still exists"""
+        if not record:
+            return None
+        path = source if record["path"] == "original" else self.compressed_dir / source.name
+        return path if path.is_file() else None
+
+    def build(self, source: Path, media: Optional[Dict]) -> Tuple[Path, Dict]:
+        started = time.monotonic()
+        if media is None:
+            media = self.compressor.describe_video(str(source))
+        path, reasons = plan_preview(source, media) if media else ("transcode", ["not probed"])
+
+        output = self.compressed_dir / source.name
+        if path == "original":
+            output = source
+        else:
+            # Renamed into place: API workers may build the same preview at once
+            partial = self.compressed_dir / f".{uuid.uuid4().hex}.part.mp4"
+            if path == "remux":
+                ok = self.compressor.remux(str(source), str(partial), audio=False)
+            else:
+                ok = self.compressor.compress_video(str(source), str(partial))
+            if not ok:
+                partial.unlink(missing_ok=True)
+                raise RuntimeError(f"Failed to {path} {source.name} for preview")
+            os.replace(partial, output)
+
+        record = {
+            "path": path,
+            "reasons": reasons,
+            "elapsed_ms": round((time.monotonic() - started) * 1000),
+            "source_bytes": source.stat().st_size,
+            "preview_bytes": output.stat().st_size,
+            "created_at": time.time(),
+        }
+        logger.info(
+            f"Preview of {source.name}: {path} in {record['elapsed_ms']} ms"
+            + (f" ({', '.join(reasons)})" if reasons else "")
+        )
+        return output, record
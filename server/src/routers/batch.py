@@ -0,0 +1,92 @@
+import logging
+from typing import Any, Callable, Dict, List
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, ValidationError
+
+from src.routers import inputs_switch, playlists, tv_controller, video_manager
+
+logger = logging.getLogger(__name__)
+
+router_batch = APIRouter(tags=["Batch"])
+
+
+class BatchOperation(BaseModel):
+    op: str
+    args: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    stop_on_error: bool = True
+
+
+# op name -> function taking the step's args and calling the matching endpoint,
+# so every step behaves exactly like its standalone request
+OPERATIONS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "play": lambda args: video_manager.play_video(video_manager.PlayRequest(**args)),
+    "pause": lambda args: video_manager.pause_video(),
+    "resume": lambda args: video_manager.resume_video(),
+    "stop": lambda args: video_manager.stop_video(),
+    "prepare": lambda args: video_manager.prepare_video(
+        video_manager.PrepareRequest(**args)
+    ),
+    "play_at": lambda args: video_manager.play_at(video_manager.PlayAtRequest(**args)),
+    "set_volume": lambda args: video_manager.set_volume(
+        video_manager.VolumeRequest(**args)
+    ),
+    "delete_video": lambda args: video_manager.delete_video(args["video_name"]),
+    "play_playlist": lambda args: playlists.play_playlist(args["name"]),
+    "switch": lambda args: inputs_switch.switch_input(int(args["device_number"])),
+    "set_schedule": lambda args: tv_controller.set_schedule(
+        tv_controller.WeeklySchedule(**args)
+    ),
+    "clear_schedule": lambda args: tv_controller.clear_schedule(),
+}
+
+
+def step_error(op: str, code: int, detail: Any) -> Dict[str, Any]:
+    return {"op": op, "status": "error", "code": code, "detail": detail}
+
+
+@router_batch.post("/batch")
+async def run_batch(request: BatchRequest):
+    """
+    Run an ordered list of operations in one round trip.
+
+    Each step is {"op": ..., "args": {...}} with the same arguments as the
+    matching endpoint (e.g. {"op": "switch", "args": {"device_number": 2}}).
+    Steps run in order; with stop_on_error (the default) the first failing
+    step ends the batch and the remaining steps are reported as skipped.
+    """
+    unknown = [step.op for step in request.operations if step.op not in OPERATIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown operations {unknown}. Allowed: {sorted(OPERATIONS)}",
+        )
+
+    results = []
+    failed_at = None
+    for index, step in enumerate(request.operations):
+        if failed_at is not None and request.stop_on_error:
+            results.append({"op": step.op, "status": "skipped"})
+            continue
+        try:
+            result = await OPERATIONS[step.op](step.args)
+            results.append({"op": step.op, "status": "ok", "result": result})
+        except HTTPException as e:
+            results.append(step_error(step.op, e.status_code, e.detail))
+        except (ValidationError, KeyError, TypeError, ValueError) as e:
+            results.append(step_error(step.op, 422, str(e)))
+        except Exception as e:
+            logger.error(f"Batch step {step.op} failed: {e}")
+            results.append(step_error(step.op, 500, str(e)))
+        if results[-1]["status"] == "error" and failed_at is None:
+            failed_at = index
+
+    return {
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed_at": failed_at,
+        "results": results,
+    }
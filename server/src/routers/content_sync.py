@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException
+
+router_sync = APIRouter(tags=["Content Sync"])
+
+# Store the agent reference
+_sync_agent = None
+
+
+def initialize_router_content_sync(agent):
+    """Initialize the router with a content sync agent instance"""
+    global _sync_agent
+    _sync_agent = agent
+
+
+def _require_agent():
+    if _sync_agent is None:
+        raise HTTPException(status_code=404, detail="Content sync is not configured")
+    return _sync_agent
+
+
+@router_sync.get("/status")
+async def get_sync_status():
+    """Result of the last sync round and the files managed by sync"""
+    try:
+        return _require_agent().status()
+    except LookupError as e:
+        # The player daemon runs the agent and has no hub configured
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router_sync.post("/run")
+async def run_sync():
+    """Start a sync round now"""
+    try:
+        _require_agent().trigger()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "Content sync triggered"}
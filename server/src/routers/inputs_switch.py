@@ -2,7 +2,9 @@ import json
 import os
 from typing import Dict
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from src.http_cache import conditional_json, make_etag
 
 # Create router with prefix and tags
 router_cec = APIRouter(tags=["HDMI Controls"])
@@ -81,17 +83,22 @@ async def set_hdmi_map(hdmi_map: Dict[str, str]):
         raise HTTPException(status_code=500, detail=f"Error saving HDMI map: {str(e)}")
 
 
+def _read_hdmi_map():
+    with open(HDMI_DEVICES_FILE, "r") as f:
+        return json.load(f)
+
+
 @router_cec.get("/fetch_hdmi_map")
-async def fetch_hdmi_map():
+async def fetch_hdmi_map(request: Request):
     """Read and return the HDMI device mapping"""
     try:
         if not os.path.exists(HDMI_DEVICES_FILE):
             raise HTTPException(status_code=404, detail="HDMI devices file not found")
 
-        with open(HDMI_DEVICES_FILE, "r") as f:
-            hdmi_map = json.load(f)
-
-        return hdmi_map
+        # The file is only ever rewritten whole, so its mtime versions it
+        stat = os.stat(HDMI_DEVICES_FILE)
+        etag = make_etag(stat.st_mtime_ns, stat.st_size)
+        return conditional_json(request, etag, _read_hdmi_map)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid JSON in HDMI devices file")
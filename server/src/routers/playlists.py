@@ -0,0 +1,93 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+router_playlists = APIRouter(tags=["Playlists"])
+
+# Store the controller reference
+_video_manager = None
+
+
+def initialize_router_playlists(controller):
+    """Initialize the router with a video manager instance"""
+    global _video_manager
+    _video_manager = controller
+
+
+class PlaylistItem(BaseModel):
+    video: str
+    duration: Optional[float] = Field(None, gt=0)  # seconds; None plays it whole
+    weight: float = Field(1.0, gt=0)
+
+
+class Playlist(BaseModel):
+    mode: Literal["ordered", "shuffle", "weighted"] = "ordered"
+    items: List[PlaylistItem]
+
+
+def _missing_videos(playlist: dict) -> List[str]:
+    return [
+        item["video"]
+        for item in playlist["items"]
+        if not (_video_manager.upload_dir / item["video"]).is_file()
+    ]
+
+
+@router_playlists.get("")
+async def list_playlists():
+    """All stored playlists"""
+    return _video_manager.playlists.store.all()
+
+
+@router_playlists.get("/current")
+async def get_current_position():
+    """The playing playlist, its current item and the items queued after it"""
+    report = _video_manager.playlists.report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No playlist is playing")
+    return report
+
+
+@router_playlists.get("/{name}")
+async def get_playlist(name: str):
+    playlist = _video_manager.playlists.store.get(name)
+    if playlist is None:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    return {"name": name, **playlist, "missing": _missing_videos(playlist)}
+
+
+@router_playlists.put("/{name}")
+async def put_playlist(name: str, playlist: Playlist):
+    """
+    Create or replace a playlist.
+
+    Items whose video isn't on the Pi yet are accepted (content sync may
+    still deliver them) and listed under "missing"; they are skipped while
+    missing. A playing playlist keeps its old contents until started again.
+    """
+    data = playlist.model_dump()
+    _video_manager.playlists.store.put(name, data)
+    return {"name": name, **data, "missing": _missing_videos(data)}
+
+
+@router_playlists.delete("/{name}")
+async def delete_playlist(name: str):
+    if _video_manager.playlists.store.get(name) is None:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    if _video_manager.playlists.name == name:
+        _video_manager.stop()
+    _video_manager.playlists.store.delete(name)
+    return {"message": f"Deleted playlist {name}"}
+
+
+@router_playlists.post("/{name}/play")
+async def play_playlist(name: str):
+    """Start a playlist from its beginning"""
+    try:
+        _video_manager.playlists.start(name)
+        return {"status": "success", "message": f"Playing playlist {name}"}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
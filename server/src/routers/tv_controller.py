@@ -2,10 +2,11 @@ import time
 from datetime import datetime
 from typing import Optional
 
-import schedule
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from src.http_cache import conditional_json, make_etag
+
 
 class DaySchedule(BaseModel):
     turn_on_time: Optional[str] = None
@@ -63,15 +64,17 @@ async def set_schedule(schedules: WeeklySchedule):
 
 
 @tv_router.get("/get_schedule")
-async def get_schedule():
-    return _tv_controller.current_schedule.model_dump()
+async def get_schedule(request: Request):
+    return conditional_json(
+        request,
+        make_etag(_tv_controller.schedule_version),
+        lambda: _tv_controller.current_schedule.model_dump(),
+    )
 
 
 @tv_router.delete("/clear_schedule")
 async def clear_schedule():
-    schedule.clear()
-    _tv_controller.current_schedule = WeeklySchedule()
-    _tv_controller.save_schedule()
+    _tv_controller.clear_schedule()
     return {"message": "All schedules cleared successfully"}
 
 
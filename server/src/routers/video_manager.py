@@ -1,14 +1,27 @@
+import asyncio
 import json
 import os
 import shutil
-from datetime import datetime
+import time
 from pathlib import Path
-from typing import Dict
-
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Response, UploadFile
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel
-
+from typing import Dict, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.http_cache import conditional_json, make_etag
+from src.keyframes import nearest_keyframe
+from src.video_library import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.video_manager import PlayerState
 
 # Store the controller reference
@@ -32,6 +45,24 @@ class PlayRequest(BaseModel):
     video_name: str
 
 
+class PrepareRequest(PlayRequest):
+    # False holds the video paused for good instead of playing it when no
+    # play_at arrives within PREPARED_TIMEOUT
+    auto_start: bool = True
+
+
+class PlayAtRequest(BaseModel):
+    start_at: float  # epoch seconds on this Pi's clock
+
+
+class VolumeRequest(BaseModel):
+    volume: int = Field(ge=0, le=100)
+
+
+class SeekRequest(BaseModel):
+    position: float = Field(ge=0)  # seconds from the start of the video
+
+
 router_main = APIRouter(tags=["Video Controls"])
 
 
@@ -49,10 +80,14 @@ async def upload_video(file: UploadFile, background_tasks: BackgroundTasks):
         )
 
     file_path = video_manager.upload_dir / file.filename
+    # Written aside and renamed into place, so the library never sees half a file
+    tmp_path = file_path.with_name(f".{file.filename}.upload")
     try:
-        with file_path.open("wb") as buffer:
+        with tmp_path.open("wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
+        os.replace(tmp_path, file_path)
     except Exception as e:
+        tmp_path.unlink(missing_ok=True)
         logger.error(f"Failed to save file: {e}")
         raise HTTPException(500, f"Failed to save file: {str(e)}")
 
@@ -116,23 +151,46 @@ async def stop_video():
         raise HTTPException(500, f"Failed to stop video: {str(e)}")
 
 
+@router_main.post("/seek")
+async def seek_video(request: SeekRequest):
+    """Jump to a position in the current video, snapped to the nearest keyframe"""
+    try:
+        return video_manager.seek(request.position)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        logger.error(f"Seek error: {e}")
+        raise HTTPException(500, f"Failed to seek: {str(e)}")
+
+
 @router_main.get("/status")
-async def get_status():
-    """Match the status format of main code."""
+async def get_status(request: Request):
+    """
+    Match the status format of main code.
+
+    The library is only summarized (version and count), so the status stays
+    the same size however many videos there are; clients list it through
+    /library when the version moves. The ETag combines the player's status
+    version with the library version.
+    """
     status = video_manager.get_status()
-    videos = list(video_manager.upload_dir.glob("*.mp4"))
+    library = video_manager.library.summary()
 
-    return {
-        "current_video": status["current_video"],
-        "is_playing": status["is_playing"],
-        "is_paused": status["status"] == PlayerState.PAUSED,
-        "is_looping": status["is_looping"],
-        "available_videos": [f.name for f in videos],
-        "date_uploaded": [
-            datetime.fromtimestamp(f.stat().st_mtime).strftime("%I:%M %p %b %d %Y")
-            for f in videos
-        ],
-    }
+    def build():
+        return {
+            "current_video": status["current_video"],
+            "is_playing": status["is_playing"],
+            "is_paused": status["status"] == PlayerState.PAUSED,
+            "is_looping": status["is_looping"],
+            "volume": status["volume"],
+            "error_count": status["error_count"],
+            "playlist": status["playlist"],
+            "library": library,
+        }
+
+    return conditional_json(
+        request, make_etag(status["version"], library["version"]), build
+    )
 
 
 @router_main.post("/resume")
@@ -148,49 +206,201 @@ async def resume_video():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router_main.post("/volume")
+async def set_volume(request: VolumeRequest):
+    """Set the output volume (0-100)"""
+    try:
+        video_manager.set_volume(request.volume)
+        return {"status": "success", "volume": request.volume}
+    except Exception as e:
+        logger.error(f"Failed to set volume: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router_main.get("/library")
+async def get_library(
+    request: Request,
+    sort: Literal["name", "date", "size", "duration"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    q: Optional[str] = None,
+    ext: Optional[str] = None,
+    since: Optional[int] = None,
+):
+    """
+    Page through the uploaded videos, or fetch what changed since a version.
+
+    Each item is {name, size, uploaded_at, duration}. Pages are sorted by
+    `sort` and `order` and filtered by a name substring `q` and an
+    extension `ext`; pass `next_cursor` back as `cursor` for the next page.
+
+    With `since=<version>` the answer is {version, added, removed}: the
+    videos added or changed and the names removed after that version. 410
+    means the Pi no longer has those changes and the library must be
+    listed again.
+    """
+    library = video_manager.library
+    version = library.summary()["version"]
+
+    def build():
+        if since is None:
+            return library.page(
+                sort=sort, order=order, cursor=cursor, limit=limit, q=q, ext=ext
+            )
+        changes = library.changes_since(since)
+        if changes is None:
+            raise HTTPException(
+                status_code=410,
+                detail=f"Library version {since} is too old, list the library again",
+            )
+        return changes
+
+    try:
+        return conditional_json(request, make_etag(version), build)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
 @router_main.get("/videos")
-async def list_videos():
-    """List all uploaded videos"""
-    try:
-        videos = [
-            f.name
-            for f in video_manager.upload_dir.glob("*")
-            if f.suffix.lower() in {".mp4", ".avi", ".mkv", ".mov"}
-        ]
-        return {"videos": videos}
+async def list_videos(request: Request):
+    """Names of all uploaded videos; /library pages and sorts them"""
+    try:
+        library = video_manager.library
+        version = library.summary()["version"]
+        return conditional_json(
+            request, make_etag(version), lambda: {"videos": library.names()}
+        )
     except Exception as e:
         logger.error(f"Failed to list videos: {e}")
         raise HTTPException(500, f"Failed to list videos: {str(e)}")
 
 
-@router_main.get("/preview")
-async def get_preview():
+async def current_preview():
+    """The preview file of the current video and its record, built if needed"""
     status = video_manager.get_status()
     if status["status"] != PlayerState.PLAYING or not status["current_video"]:
         raise HTTPException(status_code=404, detail="No video is currently playing")
 
-    try:
-        current_video = Path(status["current_video"])
-        uploaded_video_dir = str(
-            Path(video_manager.upload_dir).joinpath(current_video.name)
+    source = video_manager.upload_dir / Path(status["current_video"]).name
+    entry = video_manager.library.get(source.name) or {}
+    record = entry.get("preview")
+    preview_path = video_manager.previews.preview_path(source, record)
+
+    if preview_path is None:
+        preview_path, record = await asyncio.to_thread(
+            video_manager.previews.build, source, entry.get("media")
         )
-        compressed_path = video_manager.compressed_dir / current_video.name
+        if entry:
+            video_manager.library.annotate(
+                source.name, entry["uploaded_at"], preview=record
+            )
+    return preview_path, record
 
-        if not compressed_path.exists():
 
-            logger.info(f"Compressing video: {video_manager.current_video}")
-            video_manager.compressor.compress_video(
-                input_path=str(uploaded_video_dir),
-                output_path=str(compressed_path),
-            )
-            logger.info(f"Compression complete: {video_manager.current_video}")
+@router_main.get("/preview")
+async def get_preview():
+    """
+    Browser-playable copy of the current video, with Range support.
 
-        return StreamingResponse(open(compressed_path, "rb"), media_type="video/mp4")
+    Built once per upload along the cheapest path (see PreviewBuilder); the
+    path taken and its cost are kept in the video's library entry and
+    reported in X-Preview-Path.
+    """
+    try:
+        preview_path, record = await current_preview()
+        return FileResponse(
+            preview_path,
+            media_type="video/mp4",
+            headers={"X-Preview-Path": record["path"]},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error streaming preview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router_main.get("/preview/keyframes")
+async def get_preview_keyframes(t: Optional[float] = Query(None, ge=0)):
+    """
+    Keyframes of the current preview as time (s) and byte offset, or just
+    the one nearest to `t`.
+
+    A scrubbing client seeks the preview to a keyframe time, which shows at
+    once, and can fetch the bytes from its offset to the next keyframe's
+    with a Range request ahead of time.
+    """
+    try:
+        preview_path, _ = await current_preview()
+        keyframes = await asyncio.to_thread(video_manager.keyframes.get, preview_path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error indexing preview: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not keyframes:
+        raise HTTPException(status_code=404, detail="No keyframes found in the preview")
+
+    if t is not None:
+        time_s, offset = nearest_keyframe(keyframes, t)
+        return {"time": time_s, "offset": offset}
+    return {
+        "count": len(keyframes),
+        "keyframes": [{"time": time_s, "offset": offset} for time_s, offset in keyframes],
+    }
+
+
+@router_main.get("/preview/live")
+async def get_live_preview():
+    """
+    Live MJPEG stream of what the TV is showing right now.
+
+    Duplicated from the running player at low resolution and frame rate
+    while at least one viewer is connected; no per-file transcode.
+    """
+    status = video_manager.get_status()
+    if status["status"] not in (PlayerState.PLAYING, PlayerState.PAUSED):
+        raise HTTPException(status_code=404, detail="No video is currently playing")
+
+    try:
+        content_type, stream = await video_manager.live_preview.open()
+    except Exception as e:
+        logger.error(f"Error starting live preview: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    return StreamingResponse(
+        stream, media_type=content_type, headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router_main.get("/snapshot")
+async def get_snapshot(if_none_match: Optional[str] = Header(None)):
+    """
+    Small JPEG of the frame currently on screen.
+
+    Captures are shared between viewers for a few seconds; the ETag lets
+    pollers skip unchanged frames with If-None-Match.
+    """
+    status = video_manager.get_status()
+    if status["status"] not in (PlayerState.PLAYING, PlayerState.PAUSED):
+        raise HTTPException(status_code=404, detail="No video is currently playing")
+
+    try:
+        snapshot = await asyncio.to_thread(video_manager.snapshots.get)
+    except Exception as e:
+        logger.error(f"Snapshot failed: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    headers = {
+        "ETag": snapshot["etag"],
+        "Cache-Control": f"max-age={int(video_manager.snapshots.ttl)}",
+        "X-Taken-At": str(snapshot["taken_at"]),
+    }
+    if if_none_match == snapshot["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot["data"], media_type="image/jpeg", headers=headers)
+
+
 @router_main.delete("/video/{video_name}")
 async def delete_video(video_name: str):
     try:
@@ -215,3 +425,61 @@ async def delete_video(video_name: str):
     except Exception as e:
         logger.error(f"Failed to delete video: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router_main.get("/clock")
+async def get_clock():
+    """Timestamps for NTP-style clock offset estimation by the hub"""
+    received_at = time.time()
+    return {"received_at": received_at, "sent_at": time.time()}
+
+
+@router_main.post("/prepare")
+async def prepare_video(request: PrepareRequest):
+    """Load a video and hold it paused on its first frame for /play_at"""
+    try:
+        file_path = video_manager.upload_dir / request.video_name
+        video_manager.prepare_paused(str(file_path), auto_start=request.auto_start)
+        return {"status": "success", "message": f"{request.video_name} is ready"}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to prepare video: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router_main.post("/play_at")
+async def play_at(request: PlayAtRequest):
+    """Start the prepared video at a given time on this Pi's clock"""
+    if request.start_at < time.time():
+        raise HTTPException(status_code=400, detail="start_at is in the past")
+    try:
+        video_manager.start_at(request.start_at)
+        return {"status": "scheduled", "start_at": request.start_at}
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+@router_main.get("/memory")
+async def get_memory_report(minutes: int = 60):
+    """
+    Player RSS and libvlc object counts over the last `minutes`, the
+    recycling limits, and past recycles of the VLC instance.
+    """
+    return video_manager.memory.report(since=time.time() - minutes * 60)
+
+
+@router_main.get("/startup")
+async def get_startup_report():
+    """What was resumed at startup and the time from process start to picture"""
+    if video_manager.startup_report is None:
+        raise HTTPException(status_code=404, detail="Nothing was resumed at startup")
+    return video_manager.startup_report
+
+
+@router_main.get("/play_at")
+async def get_play_at_report():
+    """Measured start time and skew of the last synchronized start"""
+    if video_manager.sync_start_report is None:
+        raise HTTPException(status_code=404, detail="No synchronized start yet")
+    return video_manager.sync_start_report
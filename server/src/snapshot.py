@@ -0,0 +1,59 @@
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_WIDTH = 320  # height follows the aspect ratio
+SNAPSHOT_TTL = 5.0  # seconds a capture is shared between requests
+
+
+class SnapshotCache:
+    """
+    Small JPEG captures of the frame currently on screen.
+
+    A capture is reused for SNAPSHOT_TTL seconds and concurrent requests wait
+    for the same capture, so any number of viewers costs at most one libvlc
+    snapshot per TTL.
+
+    Captures hold the video manager's VLC guard and use its current player,
+    so a recycle never releases the player under a capture.
+    """
+
+    def __init__(self, video_manager, ttl: float = SNAPSHOT_TTL):
+        self.video_manager = video_manager
+        self.ttl = ttl
+        self.current: Optional[Dict] = None
+        self._lock = threading.Lock()
+        # Removed when the process exits
+        self._tmp = tempfile.TemporaryDirectory(prefix="tvs-snapshot-")
+        self._dir = Path(self._tmp.name)
+
+    def get(self) -> Dict:
+        """Latest capture as {"data", "etag", "taken_at"}, capturing if expired"""
+        with self.video_manager.vlc_guard.use(), self._lock:
+            if self.current is None or time.time() - self.current["taken_at"] > self.ttl:
+                self.current = self._capture()
+            return self.current
+
+    def _capture(self) -> Dict:
+        # The instance is started with --snapshot-format=jpg
+        path = self._dir / "snapshot.jpg"
+        path.unlink(missing_ok=True)
+        # Blocks until the video output has written the file
+        player = self.video_manager.player
+        if player.video_take_snapshot(0, str(path), SNAPSHOT_WIDTH, 0) != 0:
+            raise RuntimeError("No video output to capture")
+        if not path.exists():
+            raise RuntimeError("Snapshot was not written")
+
+        data = path.read_bytes()
+        return {
+            "data": data,
+            "etag": f'"{hashlib.sha1(data).hexdigest()[:16]}"',
+            "taken_at": time.time(),
+        }
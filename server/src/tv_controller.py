@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 import threading
 import time
@@ -13,44 +14,63 @@ SCHEDULE_FILE = "schedule.json"
 
 from src.hdmi_controllers import CECController
 from src.routers.inputs_switch import load_current_input
-from src.video_manager import video_manager
+
+logger = logging.getLogger(__name__)
 
 
 class TVController:
-    def __init__(self):
+    def __init__(self, video_manager, switch_handler: Optional[CECController] = None):
+        self.video_manager = video_manager
+        self.switch_handler = switch_handler or CECController()
+        # Starts at the process start time so versions never repeat across restarts
+        self.schedule_version = int(time.time() * 1000)
         self.current_schedule = self.load_schedule() or WeeklySchedule()
-        print(self.current_schedule)
+        logger.info(f"Loaded schedule: {self.current_schedule}")
         self.start_scheduler()
         self.apply_schedule()
 
+    @property
+    def current_schedule(self) -> WeeklySchedule:
+        return self._current_schedule
+
+    @current_schedule.setter
+    def current_schedule(self, schedule: WeeklySchedule):
+        self._current_schedule = schedule
+        self.schedule_version += 1
+
     def turn_on_tv(self):
-        switch_handler = CECController()
         current_device = load_current_input()
-        print(f"Turning on TV at {datetime.now()}")  # Debug log
+        logger.info(f"Turning on TV at {datetime.now()}")
         result = os.system('echo "on 0" | cec-client -s -d 1')
-        print(f"TV turn on command result: {result}")  # Debug log
+        logger.info(f"TV turn on command result: {result}")
 
         # Whenever TV is turned on, try to switch to the last used input
         if current_device == 0:
-            print("No HDMI device mapp set.")
+            logger.info("No HDMI device mapp set.")
         else:
             try:
-                switch_handler.switch_input(device_number=current_device)
+                self.switch_handler.switch_input(device_number=current_device)
             except Exception as e:
-                print(f"Cant switch to HDMI {current_device}")
+                logger.error(f"Cant switch to HDMI {current_device}: {e}")
 
         # Play the last played content
-        video_manager.load_last_played()
+        self.video_manager.load_last_played()
         return result
 
     def turn_off_tv(self):
 
-        print(f"Turning off TV at {datetime.now()}")  # Debug log
+        logger.info(f"Turning off TV at {datetime.now()}")
         result = os.system('echo "standby 0" | cec-client -s -d 1')
-        print(f"TV turn off command result: {result}")  # Debug log
+        logger.info(f"TV turn off command result: {result}")
 
         # stop the the item which is being currently played
-        video_manager.stop()
+        self.video_manager.stop()
+
+        # Nothing is on screen until the next turn on: recycle VLC now if needed
+        try:
+            self.video_manager.memory.check()
+        except Exception as e:
+            logger.error(f"Memory check after turn off failed: {e}")
 
         return result
 
@@ -88,6 +108,12 @@ class TVController:
             if times:
                 self.schedule_day(day, DaySchedule(**times))
 
+    def clear_schedule(self):
+        """Drop every scheduled job and reset to the default schedule"""
+        schedule.clear()
+        self.current_schedule = WeeklySchedule()
+        self.save_schedule()
+
     def save_schedule(self):
         with open(SCHEDULE_FILE, "w") as file:
             json.dump(self.current_schedule.model_dump(), file)
@@ -99,7 +125,7 @@ class TVController:
                     schedule_data = json.load(file)
                 return WeeklySchedule(**schedule_data)
             except Exception as e:
-                print(f"Error loading schedule: {e}")
+                logger.error(f"Error loading schedule: {e}")
         return None
 
     def get_tv_status(self) -> bool:
@@ -115,8 +141,8 @@ class TVController:
             elif "power status: standby" in result.lower():
                 return False
             else:
-                print(f"Unexpected power status response: {result}")
+                logger.warning(f"Unexpected power status response: {result}")
                 return False
         except Exception as e:
-            print(f"Error getting TV status: {e}")
+            logger.error(f"Error getting TV status: {e}")
             return False
@@ -1,8 +1,11 @@
+import logging
 import socket
 
 import netifaces
 from zeroconf import ServiceInfo, Zeroconf
 
+logger = logging.getLogger(__name__)
+
 
 def get_ip_address() -> str:
     """Get the IP address of the first available network interface."""
@@ -16,7 +19,7 @@ def get_ip_address() -> str:
 
         return "127.0.0.1"
     except Exception as e:
-        print(f"Error getting IP address: {e}")
+        logger.error(f"Error getting IP address: {e}")
         return "127.0.0.1"
 
 
@@ -26,7 +29,7 @@ def register_service() -> Zeroconf:
         ip = get_ip_address()
         hostname = socket.gethostname()
 
-        print(f"Registering service with IP: {ip}")
+        logger.info(f"Registering service with IP: {ip}")
 
         info = ServiceInfo(
             "_pivideo._tcp.local.",
@@ -40,5 +43,5 @@ def register_service() -> Zeroconf:
         zeroconf.register_service(info)
         return zeroconf
     except Exception as e:
-        print(f"Error registering service: {e}")
+        logger.error(f"Error registering service: {e}")
         raise
@@ -1,7 +1,10 @@
+import json
 import logging
 import os
+import re
 import subprocess
-from typing import Literal, Union
+from fractions import Fraction
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 
 class VideoCompressor:
@@ -23,7 +26,6 @@ class VideoCompressor:
         self.target_resolution = target_resolution
         self.target_fps = target_fps
         self.logger = logging.getLogger(__name__)
-        self._setup_logging()
 
         # Resolution mappings
         self.resolution_map = {
@@ -35,13 +37,6 @@ class VideoCompressor:
         # Verify FFmpeg installation
         self._check_ffmpeg()
 
-    def _setup_logging(self):
-        """Configure logging for the compressor"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
-
     def _check_ffmpeg(self):
         """Verify FFmpeg is installed and accessible"""
         try:
@@ -151,11 +146,249 @@ class VideoCompressor:
             )
 
             if result.returncode == 0:
-                import json
-
                 return json.loads(result.stdout)
             return None
 
         except Exception as e:
             self.logger.error(f"Failed to get video info: {str(e)}")
             return None
+
+    def get_keyframes(self, video_path: str) -> Optional[List[Tuple[float, int]]]:
+        """
+        Time and byte offset of every keyframe of the first video stream,
+        read from the packet headers without decoding anything.
+
+        Args:
+            video_path: Path to video file
+
+        Returns:
+            list: (seconds, byte offset) pairs in time order, or None if failed
+        """
+        command = [
+            "ffprobe",
+            "-v",
+            "quiet",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,pos,flags",
+            "-of",
+            "csv=p=0",
+            video_path,
+        ]
+        try:
+            result = subprocess.run(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to get keyframes: {str(e)}")
+            return None
+        if result.returncode != 0:
+            return None
+
+        keyframes = []
+        for line in result.stdout.splitlines():
+            fields = line.split(",")
+            if len(fields) < 3 or not fields[2].startswith("K"):
+                continue
+            try:
+                keyframes.append((round(float(fields[0]), 3), int(fields[1])))
+            except ValueError:
+                continue  # N/A timestamps or offsets
+        return sorted(keyframes)
+
+    def describe_video(self, video_path: str) -> Optional[Dict]:
+        """
+        The properties of a video that decide how costly it is to decode,
+        from get_video_info.
+
+        Returns:
+            dict: duration (s), video_codec, width, height, fps, bitrate_kbps
+                  and audio_codec, or None if the file couldn't be probed
+        """
+        info = self.get_video_info(video_path)
+        if not info:
+            return None
+        streams = info.get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        if video is None:
+            return None
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+        fmt = info.get("format", {})
+
+        try:
+            fps = float(Fraction(video.get("avg_frame_rate") or "0"))
+        except (ValueError, ZeroDivisionError):
+            fps = 0.0
+        # Containers like MKV don't carry a per-stream bitrate
+        bit_rate = video.get("bit_rate") or fmt.get("bit_rate")
+        duration = video.get("duration") or fmt.get("duration")
+        return {
+            "duration": round(float(duration), 3) if duration else None,
+            "video_codec": video.get("codec_name"),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "fps": round(fps, 3),
+            "bitrate_kbps": round(int(bit_rate) / 1000) if bit_rate else None,
+            "audio_codec": audio.get("codec_name"),
+        }
+
+    def _ffmpeg(
+        self, command: List[str], niceness: int = 0
+    ) -> Optional[subprocess.CompletedProcess]:
+        """Run an FFmpeg command, at lower CPU priority when niceness > 0"""
+        if niceness:
+            # Not preexec_fn: forking a threaded process (VLC, ingest, ...)
+            # can deadlock the child before exec
+            command = ["nice", "-n", str(niceness), *command]
+        try:
+            process = subprocess.run(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+            )
+        except Exception as e:
+            self.logger.error(f"FFmpeg failed to run: {str(e)}")
+            return None
+        if process.returncode != 0:
+            self.logger.error(f"FFmpeg error: {process.stderr}")
+            return None
+        return process
+
+    def _run_ffmpeg(self, command: List[str], niceness: int = 0) -> bool:
+        return self._ffmpeg(command, niceness) is not None
+
+    def measure_loudness(self, video_path: str, niceness: int = 0) -> Optional[Dict]:
+        """
+        EBU R128 loudness of the first audio stream, measured by decoding
+        the audio once; the video is not decoded.
+
+        Args:
+            video_path: Path to video file
+            niceness: CPU priority decrease for FFmpeg
+
+        Returns:
+            dict: integrated loudness (LUFS), loudness range (LU) and true
+            peak (dBTP, None for silence), or None if failed
+        """
+        command = [
+            "ffmpeg",
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            video_path,
+            "-map",
+            "0:a:0",
+            "-af",
+            "ebur128=peak=true",
+            "-f",
+            "null",
+            "-",
+        ]
+        self.logger.info(f"Measuring loudness of {video_path}")
+        process = self._ffmpeg(command, niceness)
+        if process is None:
+            return None
+        # The filter logs a summary when the stream ends
+        summary = process.stderr.rpartition("Summary:")[2]
+        values = {}
+        for key, label in (
+            ("integrated_lufs", "I:"),
+            ("range_lu", "LRA:"),
+            ("true_peak_dbtp", "Peak:"),
+        ):
+            match = re.search(rf"{label}\s+(-?[\d.]+|-inf)", summary)
+            if match is None:
+                return None
+            # Silence has no peak
+            values[key] = None if match.group(1) == "-inf" else float(match.group(1))
+        return values
+
+    def remux(
+        self, input_path: str, output_path: str, audio: bool = True, niceness: int = 0
+    ) -> bool:
+        """
+        Copy the streams of a video into an MP4 without re-encoding them.
+        The index is written at the start for progressive playback.
+
+        Args:
+            input_path: Path to input video file
+            output_path: Path where the MP4 will be saved
+            audio: Keep the first audio stream, if there is one
+            niceness: CPU priority decrease for FFmpeg
+        """
+        command = ["ffmpeg", "-i", input_path, "-map", "0:v:0"]
+        # "?" keeps ffmpeg from failing on videos without audio
+        command += ["-map", "0:a:0?"] if audio else ["-an"]
+        command += [
+            "-c",
+            "copy",
+            "-movflags",
+            "+faststart",
+            "-y",
+            output_path,
+        ]
+        self.logger.info(f"Remuxing {input_path}")
+        return self._run_ffmpeg(command, niceness)
+
+    def normalize(
+        self,
+        input_path: str,
+        output_path: str,
+        media: Dict,
+        profile: Dict,
+        niceness: int = 0,
+    ) -> bool:
+        """
+        Re-encode a video into H.264 within a playback profile.
+
+        Frames are only scaled down and dropped where `media` (from
+        describe_video) exceeds the profile; audio is re-encoded to AAC.
+
+        Args:
+            input_path: Path to input video file
+            output_path: Path where the rendition will be saved
+            media: describe_video() of the input
+            profile: max_width, max_height, max_fps, max_bitrate_kbps,
+                     encoder, preset and crf of the rendition
+            niceness: CPU priority decrease for FFmpeg
+        """
+        filters = []
+        if (media["width"] or 0) > profile["max_width"] or (
+            media["height"] or 0
+        ) > profile["max_height"]:
+            filters.append(
+                f"scale={profile['max_width']}:{profile['max_height']}"
+                ":force_original_aspect_ratio=decrease"
+            )
+            filters.append("scale=trunc(iw/2)*2:trunc(ih/2)*2")  # H.264 needs even sizes
+        if media["fps"] > profile["max_fps"]:
+            filters.append(f"fps={profile['max_fps']}")
+
+        max_bitrate = profile["max_bitrate_kbps"]
+        command = ["ffmpeg", "-i", input_path, "-map", "0:v:0", "-map", "0:a:0?"]
+        if filters:
+            command += ["-vf", ",".join(filters)]
+        command += ["-c:v", profile["encoder"], "-pix_fmt", "yuv420p"]
+        if profile["encoder"] == "libx264":
+            command += [
+                "-preset",
+                profile["preset"],
+                "-crf",
+                str(profile["crf"]),
+                "-maxrate",
+                f"{max_bitrate}k",
+                "-bufsize",
+                f"{max_bitrate * 2}k",
+            ]
+        else:
+            # Hardware encoders (h264_v4l2m2m) take a bitrate, not a quality
+            command += ["-b:v", f"{max_bitrate}k"]
+        command += ["-c:a", "aac", "-b:a", "160k", "-movflags", "+faststart", "-y", output_path]
+
+        self.logger.info(f"Normalizing {input_path} with filters {filters or 'none'}")
+        return self._run_ffmpeg(command, niceness)
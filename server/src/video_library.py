@@ -0,0 +1,314 @@
+import base64
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_FILE = Path("library.json")
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov"}
+SORT_FIELDS = ("name", "date", "size", "duration")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Changes kept for delta syncs; older clients list the library again
+MAX_CHANGES = 1000
+
+
+def _sort_key(sort: str) -> Callable[[Dict], Tuple]:
+    # The name always breaks ties, so every key is unique and cursors are exact
+    if sort == "date":
+        return lambda e: (e["uploaded_at"], e["name"])
+    if sort == "size":
+        return lambda e: (e["size"], e["name"])
+    if sort == "duration":
+        # Videos that haven't been probed yet sort after the others
+        return lambda e: (e["duration"] is None, e["duration"] or 0, e["name"])
+    return lambda e: (e["name"].casefold(), e["name"])
+
+
+def encode_cursor(sort: str, order: str, key: Tuple) -> str:
+    raw = json.dumps([sort, order, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, key = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("Cursor belongs to a different sort order")
+    return tuple(key)
+
+
+class VideoLibrary:
+    """
+    Index of the videos in the upload directory, persisted in library.json.
+
+    The version moves on every add, replace or remove, and a log of the
+    last MAX_CHANGES changes lets clients catch up with changes_since()
+    instead of listing everything again. The directory is only rescanned
+    when its mtime changes: every writer renames files into place or
+    unlinks them.
+
+    New and replaced videos are queued for ingest (see src.ingest), which
+    adds what it learns about them with update(); that is logged as an add
+    too, so delta clients pick it up.
+    """
+
+    def __init__(self, upload_dir: Path, path: Path = LIBRARY_FILE):
+        self.upload_dir = upload_dir
+        self.path = path
+        self._lock = threading.RLock()
+        self._scanned_mtime: Optional[int] = None
+        self._pending: queue.Queue = queue.Queue()
+        # Called with the name of every removed video
+        self.removed_hooks: List[Callable[[str], None]] = []
+
+        state = self._load()
+        self.entries: Dict[str, Dict] = state.get("entries", {})
+        # Starts at the creation time so versions never repeat if the state is lost
+        self.version: int = state.get("version") or int(time.time() * 1000)
+        # Deltas can only be served from this version on
+        self.oldest: int = state.get("oldest", self.version)
+        self.changes: deque = deque(
+            (tuple(change) for change in state.get("changes", [])), maxlen=MAX_CHANGES
+        )
+
+    def _load(self) -> Dict:
+        try:
+            if self.path.exists():
+                with open(self.path, "r") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading video library: {e}")
+        return {}
+
+    def _save(self):
+        state = {
+            "version": self.version,
+            "oldest": self.oldest,
+            "entries": self.entries,
+            "changes": list(self.changes),
+        }
+        tmp_file = self.path.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.path)
+
+    def start(self):
+        # Known videos whose ingest didn't finish start over; new ones are
+        # queued by the scan
+        with self._lock:
+            for name, entry in self.entries.items():
+                ingest = entry.get("ingest")
+                if ingest is None or ingest["state"] == "running":
+                    entry["ingest"] = None
+                    self._pending.put(name)
+        self.refresh()
+
+    def refresh(self):
+        """Rescan the upload directory if anything was added or removed"""
+        try:
+            mtime = self.upload_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._scanned_mtime:
+            return
+        with self._lock:
+            if mtime == self._scanned_mtime:
+                return
+            # Taken before scanning: a change during the scan triggers another
+            self._scanned_mtime = mtime
+            found = self._scan()
+            changes = []
+            for name, (size, uploaded_at) in found.items():
+                entry = self.entries.get(name)
+                if entry and (entry["size"], entry["uploaded_at"]) == (size, uploaded_at):
+                    continue
+                self.entries[name] = {
+                    "name": name,
+                    "size": size,
+                    "uploaded_at": uploaded_at,
+                    "duration": None,
+                    "ingest": None,
+                }
+                changes.append(("add", name))
+                self._pending.put(name)
+            for name in self.entries.keys() - found.keys():
+                del self.entries[name]
+                changes.append(("remove", name))
+                for hook in self.removed_hooks:
+                    try:
+                        hook(name)
+                    except Exception as e:
+                        logger.error(f"Library removal hook failed for {name}: {e}")
+            self._commit(changes)
+
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        found = {}
+        if not self.upload_dir.exists():
+            return found
+        for path in self.upload_dir.iterdir():
+            # Dot files are uploads still being written
+            if path.name.startswith(".") or path.suffix.lower() not in VIDEO_EXTENSIONS:
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            found[path.name] = (st.st_size, st.st_mtime)
+        return found
+
+    def _commit(self, changes: List[Tuple[str, str]]):
+        if not changes:
+            return
+        self.version += 1
+        for op, name in changes:
+            if len(self.changes) == self.changes.maxlen:
+                self.oldest = self.changes[0][0]
+            self.changes.append((self.version, op, name))
+        self._save()
+
+    def next_pending(self) -> Tuple[str, Dict]:
+        """
+        Block until a video needs ingest; returns its name and its live
+        entry, to be passed back to update()
+        """
+        while True:
+            name = self._pending.get()
+            with self._lock:
+                entry = self.entries.get(name)
+                if entry is not None and entry["ingest"] is None:
+                    return name, entry
+
+    def update(self, name: str, entry: Dict, **fields) -> bool:
+        """
+        Add `fields` to a video's entry, unless the file was replaced or
+        removed since `entry` was handed out
+        """
+        with self._lock:
+            if self.entries.get(name) is not entry:
+                return False
+            entry.update(fields)
+            self._commit([("add", name)])
+            return True
+
+    def annotate(self, name: str, uploaded_at: float, **fields) -> bool:
+        """
+        update() for callers without the live entry (other processes): the
+        fields are only added if the file is still the one uploaded at
+        `uploaded_at`
+        """
+        with self._lock:
+            entry = self.entries.get(name)
+            if entry is None or entry["uploaded_at"] != uploaded_at:
+                return False
+            return self.update(name, entry, **fields)
+
+    def get(self, name: str) -> Optional[Dict]:
+        self.refresh()
+        with self._lock:
+            entry = self.entries.get(name)
+            return dict(entry) if entry is not None else None
+
+    def summary(self) -> Dict[str, int]:
+        """Fixed-size description of the library for /status"""
+        self.refresh()
+        with self._lock:
+            return {"version": self.version, "count": len(self.entries)}
+
+    def names(self) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return sorted(self.entries)
+
+    def page(
+        self,
+        sort: str = "name",
+        order: str = "asc",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        q: Optional[str] = None,
+        ext: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of the library, filtered by a case-insensitive name
+        substring `q` and an extension `ext`.
+
+        Pages are keyed on the last item's sort key rather than an offset,
+        so adds and removes between two requests never skip or repeat items.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown sort order {order}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        needle = q.casefold() if q else None
+        suffix = ("." + ext.lstrip(".")).lower() if ext else None
+
+        self.refresh()
+        with self._lock:
+            version = self.version
+            items = [
+                dict(entry)
+                for entry in self.entries.values()
+                if (needle is None or needle in entry["name"].casefold())
+                and (suffix is None or Path(entry["name"]).suffix.lower() == suffix)
+            ]
+
+        key = _sort_key(sort)
+        descending = order == "desc"
+        items.sort(key=key, reverse=descending)
+        start = 0
+        if cursor:
+            after = decode_cursor(cursor, sort, order)
+            start = next(
+                (
+                    i
+                    for i, entry in enumerate(items)
+                    if (key(entry) < after if descending else key(entry) > after)
+                ),
+                len(items),
+            )
+        page = items[start : start + limit]
+        more = start + limit < len(items)
+        return {
+            "version": version,
+            "total": len(items),
+            "items": page,
+            "next_cursor": encode_cursor(sort, order, key(page[-1])) if more else None,
+        }
+
+    def changes_since(self, since: int) -> Optional[Dict[str, Any]]:
+        """
+        Videos added (or replaced, or ingested) and removed after
+        version `since`, one entry per video. None if the log no longer
+        reaches back that far, or `since` isn't a version of this library.
+        """
+        self.refresh()
+        with self._lock:
+            if since < self.oldest or since > self.version:
+                return None
+            latest: Dict[str, str] = {}
+            for version, op, name in self.changes:
+                if version > since:
+                    latest[name] = op
+            return {
+                "version": self.version,
+                "since": since,
+                "added": [
+                    dict(self.entries[name])
+                    for name, op in latest.items()
+                    if op == "add" and name in self.entries
+                ],
+                "removed": [name for name, op in latest.items() if op == "remove"],
+            }
@@ -1,20 +1,70 @@
+import functools
 import json
 import logging
+import os
+import threading
 import time
 from enum import Enum
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 import vlc
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from src.ingest import Ingest, rendition_path
+from src.keyframes import KeyframeIndex, nearest_keyframe
+from src.live_preview import PREVIEW_ALWAYS_ON, LivePreview, preview_media_options
+from src.logging_setup import VLC_LOG_FILE
+from src.playlist import PlaylistEngine, PlaylistStore
+from src.preview import PreviewBuilder
+from src.snapshot import SnapshotCache
+from src.video_compressor import VideoCompressor
+from src.video_library import VideoLibrary
+from src.vlc_memory import MemoryMonitor, VlcGuard, trim_heap
+
 logger = logging.getLogger(__name__)
 
+UPLOAD_DIR = Path("uploaded_videos")
+COMPRESSED_DIR = UPLOAD_DIR / "compressed"
+NORMALIZED_DIR = UPLOAD_DIR / "normalized"
+KEYFRAME_DIR = UPLOAD_DIR / "keyframes"
+MAX_VLC_VOLUME = 200  # percent; above 100 VLC amplifies
+# A prepared video that is never started plays unsynchronized after this
+PREPARED_TIMEOUT = 30.0
+CHECKPOINT_INTERVAL = 10  # seconds between playback position checkpoints
+# Status fields whose change bumps the status version (position moves constantly)
+VERSIONED_STATUS_FIELDS = (
+    "current_video",
+    "status",
+    "is_playing",
+    "error_count",
+    "volume",
+    "playlist",
+)
+IMPORTED_AT = time.time()
 
-from src.video_compressor import VideoCompressor
+
+def process_started_at() -> float:
+    """Wall-clock start time of this process, for restart-to-picture timing"""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Fields after the command name; starttime is field 22 overall
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return IMPORTED_AT
+
+
+def uses_vlc(method):
+    """Keep the libvlc objects from being recycled while `method` runs"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.vlc_guard.use():
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class PlayerState(str, Enum):
@@ -27,8 +77,8 @@ class PlayerState(str, Enum):
 
 class VideoManager:
     def __init__(self):
-        self.upload_dir = Path("uploaded_videos")
-        self.compressed_dir = self.upload_dir / "compressed"
+        self.upload_dir = UPLOAD_DIR
+        self.compressed_dir = COMPRESSED_DIR
         self.upload_dir.mkdir(exist_ok=True)
         self.compressed_dir.mkdir(exist_ok=True)
         self.last_played_file = Path("last_played.json")
@@ -37,10 +87,36 @@ class VideoManager:
         self.retry_delay = 1
         self.current_video = None
         self.is_playing = False
+        self.sync_start_report = None
+        self._prepared = None  # set while a prepared video awaits start_at
+        self.preview_enabled = PREVIEW_ALWAYS_ON
+        self.volume = 100
+        self.startup_report = None
+        # Starts at the process start time so versions never repeat across restarts
+        self.status_version = int(time.time() * 1000)
+        self._status_key = None
+        self.live_preview = LivePreview(self)
+        self.vlc_guard = VlcGuard()
+        # Outlives recycles: it captures from whichever player is current
+        self.snapshots = SnapshotCache(self)
+        # Needed by the resume below to find normalized renditions
+        self.library = VideoLibrary(self.upload_dir)
 
         self.setup_vlc()
-        self.load_last_played()
+        self.playlists = PlaylistEngine(self, PlaylistStore())
+        # Get a picture back on screen before anything else is set up
+        self.load_last_played(startup=True)
+        threading.Thread(
+            target=self._checkpoint_loop, name="checkpoint", daemon=True
+        ).start()
         self.compressor = VideoCompressor(target_resolution=240, target_fps=10)
+        self.previews = PreviewBuilder(self.compressor, self.compressed_dir)
+        self.keyframes = KeyframeIndex(self.compressor, KEYFRAME_DIR)
+        self.ingest = Ingest(self.library, self.compressor, NORMALIZED_DIR, self.keyframes)
+        self.library.start()
+        self.ingest.start()
+        self.memory = MemoryMonitor(self)
+        self.memory.start()
 
     def setup_vlc(self):
         """Initialize VLC with robust settings"""
@@ -53,7 +129,8 @@ class VideoManager:
                 "--no-xlib",  # Better compatibility
                 "--aout=alsa",  # Stable audio output
                 "--file-logging",  # Enable logging
-                "--logfile=vlc_log.txt",  # Log file
+                f"--logfile={VLC_LOG_FILE}",  # Log file, rotated by logging_setup
+                "--snapshot-format=jpg",  # Small captures for /snapshot
             ]
 
             self.instance = vlc.Instance(*vlc_args)
@@ -64,17 +141,80 @@ class VideoManager:
 
             # Get the underlying media player for more control
             self.player = self.list_player.get_media_player()
-            self.player.audio_set_volume(100)
+            # Unguarded: recycling sets the new player up with exclusive use
+            self._apply_volume()
+            self.player.event_manager().event_attach(
+                vlc.EventType.MediaPlayerVout, self._on_vout
+            )
+            self.instance_started_at = time.time()
+            # Objects created on this instance, for the memory monitor
+            self.vlc_objects = {"media_created": 0, "media_lists_created": 1}
 
             logger.info("VLC setup completed successfully")
         except Exception as e:
             logger.error(f"Failed to setup VLC: {e}")
             raise RuntimeError(f"Failed to initialize video player: {e}")
 
+    def recycle_vlc(self):
+        """
+        Replace the libvlc instance with a fresh one, releasing every object
+        of the old one. Whatever was playing carries on from its checkpointed
+        position. Must not be called while holding the VLC guard.
+        """
+        resume = self.is_playing and self.current_video is not None
+        if resume:
+            self.save_last_played()
+        with self.vlc_guard.exclusive(), self.playlists._lock:
+            self.list_player.stop()
+            self.player.release()
+            self.list_player.release()
+            self.media_list.release()
+            self.instance.release()
+            self.is_playing = False
+            self.setup_vlc()
+        trim_heap()
+        if resume:
+            self.load_last_played()
+
+    @uses_vlc
+    def is_idle(self) -> bool:
+        """Nothing on screen and nothing prepared, so VLC can be recycled"""
+        return self.list_player.get_state() not in (
+            vlc.State.Opening,
+            vlc.State.Buffering,
+            vlc.State.Playing,
+            vlc.State.Paused,
+        )
+
+    def _media_new(self, path: str, *options):
+        self.vlc_objects["media_created"] += 1
+        return self.instance.media_new(self.playback_path(path), *options)
+
+    def playback_path(self, video_path: str) -> str:
+        """
+        What VLC opens for an uploaded video: its normalized rendition once
+        ingest has made one, otherwise the upload itself
+        """
+        path = Path(video_path)
+        if path.parent != self.upload_dir:
+            return video_path
+        rendition = rendition_path(self.library.get(path.name), NORMALIZED_DIR)
+        return str(rendition) if rendition else video_path
+
+    def _replace_media_list(self):
+        """Give the list player a new, empty media list and release the old one"""
+        old = self.media_list
+        self.media_list = self.instance.media_list_new()
+        self.vlc_objects["media_lists_created"] += 1
+        self.list_player.set_media_list(self.media_list)
+        old.release()
+
+    @uses_vlc
     def validate_video(self, video_path: str) -> bool:
         """Validate video file before playing"""
+        test_media = None
         try:
-            test_media = self.instance.media_new(video_path)
+            test_media = self._media_new(video_path)
             test_media.parse()
             duration = test_media.get_duration()
 
@@ -92,7 +232,11 @@ class VideoManager:
         except Exception as e:
             logger.error(f"Video validation failed: {e}")
             return False
+        finally:
+            if test_media is not None:
+                test_media.release()
 
+    @uses_vlc
     def load_video(self, video_path: str):
         if not Path(video_path).is_file():
             raise FileNotFoundError(f"Video file not found: {video_path}")
@@ -101,19 +245,21 @@ class VideoManager:
             raise ValueError("Invalid video file")
 
         try:
-            self.media_list = self.instance.media_list_new()
-            media = self.instance.media_new(video_path)
+            self.playlists.clear()
+            self._end_prepared()
+            media = self._media_new(video_path, *self._media_options())
             media.parse()  # Wait for media to be parsed
             time.sleep(0.5)  # Small delay to ensure media is ready
+            self._replace_media_list()
             self.media_list.add_media(media)
-            self.list_player.set_media_list(self.media_list)
+            media.release()  # the media list holds its own reference
             self.list_player.set_playback_mode(
                 vlc.PlaybackMode.loop
             )  # Ensure loop mode
 
             self.error_count = 0
             self.current_video = video_path
-            self.save_last_played()
+            self.save_last_played(position_ms=0)
             logger.info(f"Video loaded successfully: {video_path}")
 
         except Exception as e:
@@ -121,13 +267,89 @@ class VideoManager:
             self.error_count += 1
             raise
 
+    @uses_vlc
+    def resume(self, video_path: str, offset_ms: int = 0):
+        """
+        Play a previously played video from `offset_ms` as fast as possible.
+
+        The file was validated when it was first loaded, so validation and
+        the blocking parse are skipped; the seek happens as soon as VLC
+        reports Playing.
+        """
+        if not Path(video_path).is_file():
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+        self.playlists.clear()
+        self._end_prepared()
+        media = self._media_new(video_path, *self._media_options())
+        self._replace_media_list()
+        self.media_list.add_media(media)
+        media.release()
+        self.list_player.set_playback_mode(vlc.PlaybackMode.loop)
+        self.current_video = video_path
+        self.list_player.play()
+        self.apply_volume()
+        self.is_playing = True
+        if offset_ms > 0 and self._wait_for_state(vlc.State.Playing, 5.0):
+            self.player.set_time(offset_ms)
+
+    def _on_vout(self, event):
+        # Runs on a libvlc thread: record the time only
+        report = self.startup_report
+        if report is not None and report["picture_at"] is None:
+            report["picture_at"] = time.time()
+            report["restart_to_picture_ms"] = round(
+                (report["picture_at"] - report["process_started_at"]) * 1000
+            )
+            logger.info(f"Restart to picture: {report['restart_to_picture_ms']} ms")
+
+    def _checkpoint_loop(self):
+        while True:
+            time.sleep(CHECKPOINT_INTERVAL)
+            if self.is_playing and self.current_video:
+                self.save_last_played()
+
+    def _media_options(self):
+        return preview_media_options() if self.preview_enabled else []
+
+    @uses_vlc
+    def set_live_preview(self, enabled: bool):
+        """
+        Turn the live preview tee on or off.
+
+        Stream output is a media option, so the current video is reopened
+        from the same file, skipping validation and parsing like resume(),
+        and put back at the same position and pause state. The picture still
+        blinks while the media restarts.
+        """
+        if enabled == self.preview_enabled or PREVIEW_ALWAYS_ON:
+            return
+        self.preview_enabled = enabled
+        logger.info(f"Live preview {'enabled' if enabled else 'disabled'}")
+
+        state = self.list_player.get_state()
+        if not self.current_video or state not in (vlc.State.Playing, vlc.State.Paused):
+            return
+        try:
+            if self.playlists.active:
+                self.playlists.reopen()
+            else:
+                self.resume(self.current_video, self.player.get_time())
+            if state == vlc.State.Paused:
+                self.list_player.set_pause(1)
+                self.is_playing = False
+        except Exception as e:
+            logger.error(f"Failed to reopen video for live preview: {e}")
+
+    @uses_vlc
     def play(self):
         """Play video with error recovery"""
         if not self.current_video:
             raise ValueError("No video loaded")
 
         try:
+            self._end_prepared()
             self.list_player.play()
+            self.apply_volume()
             self.is_playing = True
             logger.info("Video playback started")
 
@@ -149,6 +371,7 @@ class VideoManager:
             else:
                 raise RuntimeError("Max retry attempts reached")
 
+    @uses_vlc
     def pause(self):
         """Pause video with state verification"""
         if not self.current_video:
@@ -168,6 +391,7 @@ class VideoManager:
             logger.error(f"Failed to pause video: {e}")
             raise
 
+    @uses_vlc
     def stop(self):
         """Stop video with cleanup"""
         if not self.current_video:
@@ -175,6 +399,7 @@ class VideoManager:
 
         try:
             self.list_player.stop()
+            self.playlists.clear()
             self.is_playing = False
             self.error_count = 0  # Reset error count
             logger.info("Video stopped successfully")
@@ -183,21 +408,169 @@ class VideoManager:
             logger.error(f"Failed to stop video: {e}")
             raise
 
+    @uses_vlc
+    def seek(self, seconds: float) -> Dict:
+        """
+        Jump to `seconds` into the current video.
+
+        Lands on the keyframe nearest to it when the video has been indexed,
+        so VLC shows a picture at once instead of decoding forward from the
+        keyframe before the requested time.
+        """
+        if not self.current_video or self.list_player.get_state() not in (
+            vlc.State.Playing,
+            vlc.State.Paused,
+        ):
+            raise ValueError("No video is playing")
+        length = self.player.get_length() / 1000
+        if length > 0 and seconds > length:
+            raise ValueError(f"Position {seconds} s is past the end of the video ({length:.1f} s)")
+
+        keyframes = self.keyframes.cached(Path(self.playback_path(self.current_video)))
+        position = nearest_keyframe(keyframes, seconds)[0] if keyframes else seconds
+        self.player.set_time(int(position * 1000))
+        logger.info(f"Seeked to {position} s (requested {seconds} s)")
+        return {"requested_s": seconds, "position_s": position, "keyframe": bool(keyframes)}
+
+    @uses_vlc
+    def set_volume(self, volume: int):
+        """Set the output volume (0-100)"""
+        self.volume = max(0, min(100, int(volume)))
+        # Without an audio output yet, the volume is applied on the next play
+        if self.list_player.is_playing() and not self.apply_volume():
+            raise RuntimeError("Failed to set volume")
+        logger.info(f"Volume set to {self.volume}")
+
+    @uses_vlc
+    def apply_volume(self) -> bool:
+        """
+        Set VLC's volume to the user's volume times the loudness gain of the
+        current video, so every video plays at the same loudness. The gain
+        was measured at ingest; nothing is filtered during playback.
+        """
+        return self._apply_volume()
+
+    def _apply_volume(self) -> bool:
+        volume = round(self.volume * 10 ** (self._loudness_gain() / 20))
+        return self.player.audio_set_volume(max(0, min(MAX_VLC_VOLUME, volume))) == 0
+
+    def _loudness_gain(self) -> float:
+        if not self.current_video:
+            return 0.0
+        path = Path(self.current_video)
+        if path.parent != self.upload_dir:
+            return 0.0
+        loudness = (self.library.get(path.name) or {}).get("loudness")
+        return loudness["gain_db"] if loudness else 0.0
+
+    def _wait_for_state(self, state, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.list_player.get_state() == state:
+                return True
+            time.sleep(0.01)
+        return False
+
+    @uses_vlc
+    def prepare_paused(
+        self, video_path: str, timeout: float = 10.0, auto_start: bool = True
+    ):
+        """
+        Load a video and hold it paused on its first frame, ready to start.
+
+        Playback is started muted, paused as soon as VLC reports Playing and
+        rewound to 0, so all decoder setup is done before `start_at`. Without
+        `auto_start` the video is simply left paused and unmuted, and is not
+        played after PREPARED_TIMEOUT.
+        """
+        self.load_video(video_path)
+        try:
+            self.player.audio_set_mute(True)
+            self.list_player.play()
+            self.apply_volume()
+            if not self._wait_for_state(vlc.State.Playing, timeout):
+                raise RuntimeError("Player did not start in time")
+            self.list_player.set_pause(1)
+            self.player.set_time(0)
+            if not self._wait_for_state(vlc.State.Paused, timeout):
+                raise RuntimeError("Player did not pause in time")
+            self.is_playing = False
+            logger.info(f"Video prepared paused: {video_path}")
+        except Exception:
+            self.player.audio_set_mute(False)
+            raise
+        if not auto_start:
+            self.player.audio_set_mute(False)
+            return
+        prepared = self._prepared = object()
+        timer = threading.Timer(PREPARED_TIMEOUT, self._prepared_expired, args=(prepared,))
+        timer.daemon = True
+        timer.start()
+
+    def _end_prepared(self):
+        """Leave the prepared state: unmute, and forget the pending start"""
+        self._prepared = None
+        self.player.audio_set_mute(False)
+
+    @uses_vlc
+    def _prepared_expired(self, prepared):
+        # start_at never came (rejected, lost or never sent): don't leave
+        # the TV paused and muted
+        if self._prepared is not prepared:
+            return
+        logger.warning("Prepared video was not started in time; playing it now")
+        try:
+            self.play()
+        except Exception as e:
+            logger.error(f"Failed to play expired prepared video: {e}")
+
+    @uses_vlc
+    def start_at(self, start_at: float):
+        """Unpause a prepared video at `start_at` (epoch seconds, local clock)"""
+        if self.list_player.get_state() != vlc.State.Paused:
+            raise ValueError("No prepared video to start")
+
+        self.sync_start_report = {"target": start_at, "started_at": None}
+        self._prepared = None
+
+        def run():
+            remaining = start_at - time.time()
+            if remaining > 0.02:
+                time.sleep(remaining - 0.02)
+            # Spin the last few milliseconds; sleep() alone overshoots
+            while time.time() < start_at:
+                pass
+            self.list_player.set_pause(0)
+            started_at = time.time()
+            self.player.audio_set_mute(False)
+            self.is_playing = True
+            self.sync_start_report = {
+                "target": start_at,
+                "started_at": started_at,
+                "skew_ms": round((started_at - start_at) * 1000, 3),
+            }
+            logger.info(f"Synchronized start, skew {self.sync_start_report['skew_ms']} ms")
+
+        threading.Thread(target=run, name="sync-start", daemon=True).start()
+
+    @uses_vlc
     def get_status(self) -> Dict:
         """Get comprehensive player status"""
         if not self.current_video:
-            return {
-                "current_video": None,
-                "status": PlayerState.NO_MEDIA,
-                "is_playing": False,
-                "is_looping": True,
-                "error_count": self.error_count,
-                "volume": 0,
-            }
+            return self._versioned(
+                {
+                    "current_video": None,
+                    "status": PlayerState.NO_MEDIA,
+                    "is_playing": False,
+                    "is_looping": True,
+                    "error_count": self.error_count,
+                    "volume": self.volume,
+                    "playlist": None,
+                }
+            )
 
         try:
             player_state = self.list_player.get_state()
-            volume = self.player.audio_get_volume()
 
             status = {
                 "current_video": Path(self.current_video).name,
@@ -205,7 +578,9 @@ class VideoManager:
                 "is_playing": self.is_playing,
                 "is_looping": True,
                 "error_count": self.error_count,
-                "volume": volume,
+                # The user's volume; VLC's also carries the loudness gain
+                "volume": self.volume,
+                "playlist": self.playlists.name,
             }
 
             # Add position info if playing
@@ -213,11 +588,20 @@ class VideoManager:
                 status["position"] = self.player.get_position()
                 status["time"] = self.player.get_time()
 
-            return status
+            return self._versioned(status)
 
         except Exception as e:
             logger.error(f"Failed to get status: {e}")
-            return {"status": PlayerState.ERROR, "error": str(e)}
+            return self._versioned({"status": PlayerState.ERROR, "error": str(e)})
+
+    def _versioned(self, status: Dict) -> Dict:
+        """Add the status version, bumping it if the status changed since last asked"""
+        key = tuple(status.get(field) for field in VERSIONED_STATUS_FIELDS)
+        if key != self._status_key:
+            self._status_key = key
+            self.status_version += 1
+        status["version"] = self.status_version
+        return status
 
     def _map_vlc_state(self, state):
         """Map VLC states to PlayerState enum"""
@@ -225,34 +609,74 @@ class VideoManager:
             vlc.State.Playing: PlayerState.PLAYING,
             vlc.State.Paused: PlayerState.PAUSED,
             vlc.State.Stopped: PlayerState.STOPPED,
+            # A freshly recycled player that hasn't played anything yet
+            vlc.State.NothingSpecial: PlayerState.STOPPED,
             vlc.State.Error: PlayerState.ERROR,
         }
         return state_map.get(state, PlayerState.ERROR)
 
-    def load_last_played(self):
+    @uses_vlc
+    def load_last_played(self, startup: bool = False):
+        """
+        Resume the last video or playlist at its checkpointed position.
+
+        At startup the time from process start to the first video frame is
+        recorded in `startup_report`.
+        """
         try:
-            if self.last_played_file.exists():
-                with open(self.last_played_file, "r") as f:
-                    data = json.load(f)
-                    if "last_video" in data:
-                        video_path = self.upload_dir / data["last_video"]
-                        if video_path.exists():
-                            self.load_video(str(video_path))
-                            self.play()  # Start playing the loaded video
-                            logger.info(
-                                f"Loaded and started playing last video: {data['last_video']}"
-                            )
+            if not self.last_played_file.exists():
+                return
+            with open(self.last_played_file, "r") as f:
+                data = json.load(f)
+            playlist = data.get("last_playlist")
+            offset_ms = int(data.get("position_ms") or 0)
+            if startup:
+                self.startup_report = {
+                    "video": data.get("last_video"),
+                    "playlist": playlist,
+                    "offset_ms": offset_ms,
+                    "process_started_at": process_started_at(),
+                    "picture_at": None,
+                    "restart_to_picture_ms": None,
+                }
+            if playlist and self.playlists.store.get(playlist):
+                self.playlists.start(playlist, data.get("playlist_index"), offset_ms)
+                logger.info(f"Resumed playlist {playlist} at {offset_ms} ms")
+            elif "last_video" in data:
+                video_path = self.upload_dir / data["last_video"]
+                if video_path.exists():
+                    self.resume(str(video_path), offset_ms)
+                    logger.info(
+                        f"Resumed last video {data['last_video']} at {offset_ms} ms"
+                    )
         except Exception as e:
             logger.error(f"Error loading last played video: {e}")
 
-    def save_last_played(self):
+    @uses_vlc
+    def save_last_played(self, position_ms: Optional[int] = None):
+        """
+        Checkpoint the current item and position (atomic write).
+
+        Pass position_ms=0 when an item was just loaded: until it plays,
+        VLC still reports the time of the previous one.
+        """
+        if not self.current_video:
+            return
+        if position_ms is None:
+            position_ms = max(self.player.get_time(), 0)
+        state = {
+            "last_video": Path(self.current_video).name,
+            "last_playlist": self.playlists.name,
+            "playlist_index": self.playlists.current_index(),
+            "position_ms": position_ms,
+            "saved_at": time.time(),
+        }
         try:
-            with open(self.last_played_file, "w") as f:
-                json.dump({"last_video": Path(self.current_video).name}, f)
-            logger.info(f"Saved last played video: {Path(self.current_video).name}")
+            tmp_file = self.last_played_file.with_suffix(".tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_file, self.last_played_file)
+            logger.debug(f"Checkpoint: {state['last_video']} {state['position_ms']} ms")
         except Exception as e:
             logger.error(f"Error saving last played video: {e}")
 
-
-# Create global video manager instance
-video_manager = VideoManager()
@@ -0,0 +1,205 @@
+import ctypes
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 60  # seconds between memory samples
+HISTORY_SIZE = 1440  # 24 hours of samples
+MAX_RECYCLE_EVENTS = 20
+
+# Above these, the VLC instance is recycled the next time the player is idle
+# (the TV is switched off on schedule every night)
+RECYCLE_RSS_MB = 400
+RECYCLE_MEDIA_CREATED = 5000
+# Above this it is recycled even mid-playback, resuming at the same position:
+# a moment of black is better than pm2's max_memory_restart (800M) kicking in
+FORCE_RECYCLE_RSS_MB = 650
+# A fresh instance is never recycled sooner than this
+MIN_INSTANCE_AGE_S = 1800
+MAX_INSTANCE_AGE_S = 24 * 3600
+# A recycle that frees less than this didn't help: the next one waits twice
+# as long, and RSS must first grow this much past what the recycle left
+MIN_RECYCLE_GAIN_MB = 50
+
+
+def read_rss_mb() -> float:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return 0.0
+
+
+def trim_heap():
+    """Hand memory freed by libvlc back to the OS instead of keeping it in malloc"""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class VlcGuard:
+    """
+    Any number of threads may use the libvlc objects at once; recycling
+    waits for them to finish and keeps new users out while the instance is
+    swapped. Users may nest; recycling must not be started by a user.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._users = 0
+        self._recycling = False
+
+    @contextmanager
+    def use(self):
+        with self._cond:
+            while self._recycling:
+                self._cond.wait()
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._users -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._recycling or self._users:
+                self._cond.wait()
+            self._recycling = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._recycling = False
+                self._cond.notify_all()
+
+
+class MemoryMonitor:
+    """
+    Samples the player's RSS and libvlc object counts, and recycles the
+    VLC instance when they grow past the limits.
+
+    libvlc doesn't give back everything a media or media list allocated,
+    even once released, so memory creeps up with every video change. A
+    fresh instance resets it without restarting the process.
+
+    Memory a recycle can't free (fragmentation, decoder buffers of large
+    videos) must not cause a recycle loop: RSS has to grow past what the
+    last recycle left behind, and each recycle that didn't lower RSS
+    doubles how old the instance must be before the next one.
+    """
+
+    def __init__(self, video_manager):
+        self.video_manager = video_manager
+        self.samples: deque = deque(maxlen=HISTORY_SIZE)
+        self.recycles: deque = deque(maxlen=MAX_RECYCLE_EVENTS)
+        self.min_instance_age_s = MIN_INSTANCE_AGE_S
+        self.rss_mb_after: Optional[float] = None  # left by the last recycle
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, name="vlc-memory", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Memory check failed: {e}")
+
+    def sample(self) -> Dict:
+        vm = self.video_manager
+        return {
+            "t": time.time(),
+            "rss_mb": read_rss_mb(),
+            "instance_age_s": round(time.time() - vm.instance_started_at),
+            **vm.vlc_objects,
+        }
+
+    def _rss_limit(self) -> float:
+        if self.rss_mb_after is None:
+            return RECYCLE_RSS_MB
+        return max(RECYCLE_RSS_MB, self.rss_mb_after + MIN_RECYCLE_GAIN_MB)
+
+    def _reason(self, sample: Dict) -> Optional[str]:
+        if sample["rss_mb"] >= self._rss_limit():
+            return f"RSS {sample['rss_mb']} MB"
+        if sample["media_created"] >= RECYCLE_MEDIA_CREATED:
+            return f"{sample['media_created']} media created"
+        return None
+
+    def check(self):
+        """
+        Take a sample and recycle if a limit is crossed and it is safe to.
+
+        Called periodically, and right after the TV is switched off.
+        """
+        with self._lock:
+            sample = self.sample()
+            self.samples.append(sample)
+            reason = self._reason(sample)
+            if reason is None or sample["instance_age_s"] < self.min_instance_age_s:
+                return
+            vm = self.video_manager
+            if vm.is_idle():
+                self._recycle(reason, sample)
+            elif (
+                sample["rss_mb"] >= max(FORCE_RECYCLE_RSS_MB, self._rss_limit())
+                and vm.is_playing
+            ):
+                self._recycle(f"{reason}, forced during playback", sample)
+
+    def _recycle(self, reason: str, before: Dict):
+        logger.warning(f"Recycling the VLC instance: {reason}")
+        started = time.monotonic()
+        self.video_manager.recycle_vlc()
+        after = self.sample()
+        self.recycles.append(
+            {
+                "t": after["t"],
+                "reason": reason,
+                "rss_mb_before": before["rss_mb"],
+                "rss_mb_after": after["rss_mb"],
+                "duration_ms": round((time.monotonic() - started) * 1000),
+            }
+        )
+        self.samples.append(after)
+        logger.info(f"VLC recycled: RSS {before['rss_mb']} -> {after['rss_mb']} MB")
+
+        self.rss_mb_after = after["rss_mb"]
+        if before["rss_mb"] - after["rss_mb"] < MIN_RECYCLE_GAIN_MB:
+            self.min_instance_age_s = min(self.min_instance_age_s * 2, MAX_INSTANCE_AGE_S)
+            logger.warning(
+                "Recycle freed little memory; the next one waits until the "
+                f"instance is {self.min_instance_age_s} s old"
+            )
+        else:
+            self.min_instance_age_s = MIN_INSTANCE_AGE_S
+
+    def report(self, since: float = 0) -> Dict:
+        samples: List[Dict] = [s for s in list(self.samples) if s["t"] >= since]
+        return {
+            "current": self.sample(),
+            "limits": {
+                "recycle_rss_mb": RECYCLE_RSS_MB,
+                "recycle_media_created": RECYCLE_MEDIA_CREATED,
+                "force_recycle_rss_mb": FORCE_RECYCLE_RSS_MB,
+                "current_rss_limit_mb": self._rss_limit(),
+                "min_instance_age_s": self.min_instance_age_s,
+            },
+            "recycles": list(self.recycles),
+            "samples": samples,
+        }
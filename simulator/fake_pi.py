@@ -0,0 +1,469 @@
+import asyncio
+import hashlib
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Header, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+DEFAULT_SCHEDULE = {
+    day: {"turn_on_time": "09:30", "turn_off_time": "20:15"}
+    for day in ["sunday", "monday", "tuesday", "wednesday", "thursday"]
+}
+DEFAULT_SCHEDULE.update(
+    {
+        day: {"turn_on_time": "09:30", "turn_off_time": "22:15"}
+        for day in ["friday", "saturday"]
+    }
+)
+
+
+@dataclass
+class FakePi:
+    """In-memory state of one simulated Pi"""
+
+    hostname: str
+    host: str
+    videos: Dict[str, float] = field(default_factory=dict)
+    current_video: Optional[str] = None
+    playlist: Optional[str] = None
+    is_playing: bool = False
+    is_paused: bool = False
+    tv_on: bool = True
+    current_input: int = 1
+    hdmi_map: Optional[Dict[str, str]] = None
+    schedule: Dict = field(default_factory=lambda: dict(DEFAULT_SCHEDULE))
+    sync_start_report: Optional[Dict] = None
+    volume: int = 100
+    library_version: int = field(default_factory=lambda: int(time.time() * 1000))
+    # (version, op, name) of every library change, for /library?since=
+    library_changes: List[Tuple[int, str, str]] = field(default_factory=list)
+
+    def video_entry(self, name: str) -> Dict:
+        return {"name": name, "size": 0, "uploaded_at": self.videos[name], "duration": 30.0}
+
+    def add_video(self, name: str):
+        self.videos[name] = time.time()
+        self.library_version += 1
+        self.library_changes.append((self.library_version, "add", name))
+
+    def remove_video(self, name: str):
+        if self.videos.pop(name, None) is not None:
+            self.library_version += 1
+            self.library_changes.append((self.library_version, "remove", name))
+
+
+@dataclass
+class FleetBehaviour:
+    """Latency and failure profile shared by all simulated Pis"""
+
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    failure_rate: float = 0.0
+    password: str = "simulator"
+
+
+class PlayRequest(BaseModel):
+    video_name: str
+
+
+class PlayAtRequest(BaseModel):
+    start_at: float
+
+
+class VolumeRequest(BaseModel):
+    volume: int
+
+
+class BatchOperation(BaseModel):
+    op: str
+    args: Dict = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    stop_on_error: bool = True
+
+
+def fleet_address(index: int) -> str:
+    """Loopback address of the simulated Pi at `index`.
+
+    Every Pi gets its own 127.x.y.z address so that, like the real fleet,
+    all of them listen on port 8000 and the hub can address them by IP only.
+    """
+    return f"127.0.{10 + index // 250}.{index % 250 + 1}"
+
+
+def create_fleet(count: int, prefix: str = "sim-pi", videos: int = 5) -> List[FakePi]:
+    """Build `count` simulated Pis with a small preloaded library each"""
+    fleet = []
+    now = time.time()
+    for index in range(count):
+        pi = FakePi(hostname=f"{prefix}-{index:03d}", host=fleet_address(index))
+        pi.videos = {f"promo_{n}.mp4": now - n * 3600 for n in range(videos)}
+        fleet.append(pi)
+    return fleet
+
+
+def create_app(fleet: List[FakePi], behaviour: FleetBehaviour) -> FastAPI:
+    """Create one FastAPI app serving the Pi API for every Pi in `fleet`.
+
+    The app is bound to one socket per Pi; requests are routed to the right
+    `FakePi` by the local address they arrived on.
+    """
+    app = FastAPI()
+    by_host = {pi.host: pi for pi in fleet}
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        delay = behaviour.latency_ms + random.uniform(
+            -behaviour.jitter_ms, behaviour.jitter_ms
+        )
+        await asyncio.sleep(max(delay, 0) / 1000)
+        if random.random() < behaviour.failure_rate:
+            return JSONResponse({"detail": "Simulated failure"}, status_code=503)
+        return await call_next(request)
+
+    def get_pi(request: Request, auth: Optional[str]) -> FakePi:
+        if auth != behaviour.password:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        server = request.scope.get("server") or ("", 0)
+        pi = by_host.get(server[0])
+        if pi is None:
+            raise HTTPException(status_code=404, detail="Unknown simulated Pi")
+        return pi
+
+    @app.post("/auth/login")
+    async def login(body: Dict[str, str]):
+        if body.get("password") != behaviour.password:
+            raise HTTPException(status_code=401, detail="Invalid password")
+        return {"message": "Login successful", "token": behaviour.password}
+
+    @app.get("/status")
+    async def get_status(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        return {
+            "current_video": pi.current_video,
+            "is_playing": pi.is_playing,
+            "is_paused": pi.is_paused,
+            "is_looping": True,
+            "volume": pi.volume,
+            "error_count": 0,
+            "playlist": pi.playlist,
+            "library": {"version": pi.library_version, "count": len(pi.videos)},
+        }
+
+    @app.get("/library")
+    async def get_library(
+        request: Request, since: Optional[int] = None, AUTH: str = Header(None)
+    ):
+        """The whole library as one page sorted by name, or changes since a version"""
+        pi = get_pi(request, AUTH)
+        if since is None:
+            return {
+                "version": pi.library_version,
+                "total": len(pi.videos),
+                "items": [pi.video_entry(name) for name in sorted(pi.videos)],
+                "next_cursor": None,
+            }
+        # Every change bumps the version by one and all of them are kept
+        first = pi.library_version - len(pi.library_changes)
+        if not first <= since <= pi.library_version:
+            raise HTTPException(status_code=410, detail="Unknown library version")
+        latest = {name: op for version, op, name in pi.library_changes if version > since}
+        return {
+            "version": pi.library_version,
+            "since": since,
+            "added": [
+                pi.video_entry(name)
+                for name, op in latest.items()
+                if op == "add" and name in pi.videos
+            ],
+            "removed": [name for name, op in latest.items() if op == "remove"],
+        }
+
+    @app.get("/videos")
+    async def list_videos(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        return {"videos": sorted(pi.videos)}
+
+    @app.post("/upload")
+    async def upload_video(request: Request, file: UploadFile, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        while await file.read(1024 * 1024):
+            pass
+        pi.add_video(file.filename)
+        pi.current_video = file.filename
+        return {
+            "message": "Video uploaded and loaded successfully",
+            "filename": file.filename,
+        }
+
+    @app.post("/play")
+    async def play_video(
+        request: Request, body: PlayRequest, AUTH: str = Header(None)
+    ):
+        pi = get_pi(request, AUTH)
+        if body.video_name not in pi.videos:
+            raise HTTPException(status_code=404, detail="Video file not found")
+        pi.current_video, pi.playlist = body.video_name, None
+        pi.is_playing, pi.is_paused = True, False
+        return {
+            "status": "success",
+            "message": f"Playing {body.video_name} in loop mode",
+        }
+
+    @app.post("/pause")
+    async def pause_video(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        if not pi.current_video:
+            raise HTTPException(400, "No video loaded")
+        pi.is_playing, pi.is_paused = False, True
+        return {"message": "Video paused"}
+
+    @app.post("/resume")
+    async def resume_video(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        if not pi.is_paused:
+            raise HTTPException(status_code=400, detail="Video is not paused")
+        pi.is_playing, pi.is_paused = True, False
+        return {"status": "success", "message": "Video resumed"}
+
+    @app.post("/stop")
+    async def stop_video(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        if not pi.current_video:
+            raise HTTPException(400, "No video loaded")
+        pi.is_playing, pi.is_paused = False, False
+        pi.playlist = None
+        return {"message": "Video stopped"}
+
+    @app.post("/playlists/{name}/play")
+    async def play_playlist(request: Request, name: str, AUTH: str = Header(None)):
+        """Every simulated playlist plays the device's videos in name order"""
+        pi = get_pi(request, AUTH)
+        if not pi.videos:
+            raise HTTPException(status_code=400, detail="Playlist is empty")
+        pi.current_video, pi.playlist = min(pi.videos), name
+        pi.is_playing, pi.is_paused = True, False
+        return {"status": "success", "message": f"Playing playlist {name}"}
+
+    @app.delete("/video/{video_name}")
+    async def delete_video(request: Request, video_name: str, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        pi.remove_video(video_name)
+        if pi.current_video == video_name:
+            pi.current_video = None
+            pi.is_playing, pi.is_paused = False, False
+        return {"status": "success", "message": f"Deleted {video_name}"}
+
+    @app.get("/clock")
+    async def get_clock(request: Request, AUTH: str = Header(None)):
+        get_pi(request, AUTH)
+        received_at = time.time()
+        return {"received_at": received_at, "sent_at": time.time()}
+
+    @app.post("/prepare")
+    async def prepare_video(
+        request: Request, body: PlayRequest, AUTH: str = Header(None)
+    ):
+        pi = get_pi(request, AUTH)
+        if body.video_name not in pi.videos:
+            raise HTTPException(status_code=404, detail="Video file not found")
+        pi.current_video, pi.playlist = body.video_name, None
+        pi.is_playing, pi.is_paused = False, True
+        return {"status": "success", "message": f"{body.video_name} is ready"}
+
+    @app.post("/play_at")
+    async def play_at(request: Request, body: PlayAtRequest, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        if body.start_at < time.time():
+            raise HTTPException(status_code=400, detail="start_at is in the past")
+        if not pi.is_paused:
+            raise HTTPException(400, "No prepared video to start")
+
+        async def start():
+            await asyncio.sleep(max(body.start_at - time.time(), 0))
+            started_at = time.time()
+            pi.is_playing, pi.is_paused = True, False
+            pi.sync_start_report = {
+                "target": body.start_at,
+                "started_at": started_at,
+                "skew_ms": round((started_at - body.start_at) * 1000, 3),
+            }
+
+        asyncio.create_task(start())
+        return {"status": "scheduled", "start_at": body.start_at}
+
+    @app.get("/play_at")
+    async def get_play_at_report(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        if pi.sync_start_report is None:
+            raise HTTPException(status_code=404, detail="No synchronized start yet")
+        return pi.sync_start_report
+
+    @app.get("/snapshot")
+    async def get_snapshot(
+        request: Request,
+        AUTH: str = Header(None),
+        if_none_match: Optional[str] = Header(None),
+    ):
+        pi = get_pi(request, AUTH)
+        if not (pi.is_playing or pi.is_paused):
+            raise HTTPException(status_code=404, detail="No video is currently playing")
+        # A stand-in "JPEG" that changes with what the Pi is showing
+        frame = f"{pi.hostname}:{pi.current_video}:{int(time.time() // 5)}".encode()
+        data = b"\xff\xd8" + frame * 64 + b"\xff\xd9"
+        etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"'
+        headers = {"ETag": etag, "X-Taken-At": str(time.time())}
+        if if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(data, media_type="image/jpeg", headers=headers)
+
+    @app.get("/tv/status")
+    async def tv_status(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        return {
+            "status": "on" if pi.tv_on else "off",
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @app.get("/tv/current")
+    async def current_input(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        return {"current_input": pi.current_input}
+
+    @app.post("/tv/switch/{device_number}")
+    async def switch_input(
+        request: Request, device_number: int, AUTH: str = Header(None)
+    ):
+        pi = get_pi(request, AUTH)
+        pi.current_input = device_number
+        return {"message": f"Successfully switched to input {device_number}"}
+
+    @app.get("/tv/check_json")
+    async def check_json(request: Request, AUTH: str = Header(None)) -> bool:
+        return get_pi(request, AUTH).hdmi_map is not None
+
+    @app.get("/tv/fetch_hdmi_map")
+    async def fetch_hdmi_map(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        if pi.hdmi_map is None:
+            raise HTTPException(status_code=404, detail="HDMI devices file not found")
+        return pi.hdmi_map
+
+    @app.post("/tv/set_hdmi_map")
+    async def set_hdmi_map(
+        request: Request, hdmi_map: Dict[str, str], AUTH: str = Header(None)
+    ):
+        get_pi(request, AUTH).hdmi_map = hdmi_map
+        return {"message": "HDMI mapped Successfully"}
+
+    @app.post("/tv/reset")
+    async def reset_files(request: Request, AUTH: str = Header(None)):
+        pi = get_pi(request, AUTH)
+        pi.hdmi_map, pi.current_input = None, 0
+        return {"message": "No files found to delete"}
+
+    @app.get("/tv/get_schedule")
+    async def get_schedule(request: Request, AUTH: str = Header(None)):
+        return get_pi(request, AUTH).schedule
+
+    @app.post("/tv/set_schedule")
+    async def set_schedule(request: Request, schedule: Dict, AUTH: str = Header(None)):
+        get_pi(request, AUTH).schedule = schedule
+        return {"message": "Schedules set successfully", "schedule": schedule}
+
+    @app.delete("/tv/clear_schedule")
+    async def clear_schedule(request: Request, AUTH: str = Header(None)):
+        get_pi(request, AUTH).schedule = dict(DEFAULT_SCHEDULE)
+        return {"message": "All schedules cleared successfully"}
+
+    @app.post("/volume")
+    async def set_volume(
+        request: Request, body: VolumeRequest, AUTH: str = Header(None)
+    ):
+        get_pi(request, AUTH).volume = max(0, min(100, body.volume))
+        return {"status": "success", "volume": body.volume}
+
+    @app.post("/batch")
+    async def run_batch(
+        request: Request, body: BatchRequest, AUTH: str = Header(None)
+    ):
+        get_pi(request, AUTH)
+        operations = {
+            "play": lambda a: play_video(request, PlayRequest(**a), AUTH),
+            "pause": lambda a: pause_video(request, AUTH),
+            "resume": lambda a: resume_video(request, AUTH),
+            "stop": lambda a: stop_video(request, AUTH),
+            "prepare": lambda a: prepare_video(request, PlayRequest(**a), AUTH),
+            "set_volume": lambda a: set_volume(request, VolumeRequest(**a), AUTH),
+            "delete_video": lambda a: delete_video(request, a["video_name"], AUTH),
+            "play_playlist": lambda a: play_playlist(request, a["name"], AUTH),
+            "switch": lambda a: switch_input(request, int(a["device_number"]), AUTH),
+            "set_schedule": lambda a: set_schedule(request, a, AUTH),
+            "clear_schedule": lambda a: clear_schedule(request, AUTH),
+        }
+        unknown = [step.op for step in body.operations if step.op not in operations]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown operations {unknown}")
+
+        results, failed_at = [], None
+        for index, step in enumerate(body.operations):
+            if failed_at is not None and body.stop_on_error:
+                results.append({"op": step.op, "status": "skipped"})
+                continue
+            try:
+                result = await operations[step.op](step.args)
+                results.append({"op": step.op, "status": "ok", "result": result})
+            except HTTPException as e:
+                error = {"code": e.status_code, "detail": e.detail}
+                results.append({"op": step.op, "status": "error", **error})
+                if failed_at is None:
+                    failed_at = index
+        return {
+            "succeeded": sum(1 for r in results if r["status"] == "ok"),
+            "failed_at": failed_at,
+            "results": results,
+        }
+
+    return app
+
+
+def bind_sockets(fleet: List[FakePi], port: int = 8000) -> List[socket.socket]:
+    """Open one listening socket per simulated Pi"""
+    sockets = []
+    for pi in fleet:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((pi.host, port))
+        sock.listen(512)
+        sock.setblocking(False)
+        sockets.append(sock)
+    return sockets
+
+
+async def announce_fleet(fleet: List[FakePi], port: int = 8000):
+    """Announce every simulated Pi over zeroconf the way `register_service` does"""
+    from zeroconf import ServiceInfo
+    from zeroconf.asyncio import AsyncZeroconf
+
+    aiozc = AsyncZeroconf()
+    infos = [
+        ServiceInfo(
+            "_pivideo._tcp.local.",
+            f"{pi.hostname}._pivideo._tcp.local.",
+            addresses=[socket.inet_aton(pi.host)],
+            port=port,
+            properties={"hostname": pi.hostname},
+        )
+        for pi in fleet
+    ]
+    tasks = await asyncio.gather(*(aiozc.async_register_service(i) for i in infos))
+    await asyncio.gather(*tasks)
+    return aiozc, infos
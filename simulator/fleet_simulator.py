@@ -0,0 +1,316 @@
+"""
+Load-test the hub against a fleet of simulated Pis.
+
+Start the hub first with the simulated fleet's API key, which the hub
+polls with (`PI_AUTH_TOKEN=simulator python client.py`), then for example:
+
+    python -m simulator.fleet_simulator --pis 200 --group-size 10 --latency-ms 40
+
+Each simulated Pi listens on its own loopback address (127.0.10.1,
+127.0.10.2, ...) on port 8000, so on Linux no extra network setup is needed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+
+from simulator.fake_pi import (
+    FakePi,
+    FleetBehaviour,
+    announce_fleet,
+    bind_sockets,
+    create_app,
+    create_fleet,
+)
+
+PI_PORT = 8000
+
+
+class LatencyRecorder:
+    """Collect request latencies and failures per operation"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+
+    async def timed(self, operation: str, coro):
+        start = time.perf_counter()
+        try:
+            result = await coro
+            if isinstance(result, httpx.Response):
+                result.raise_for_status()
+            return result
+        except Exception:
+            self.failures[operation] = self.failures.get(operation, 0) + 1
+            return None
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.samples.setdefault(operation, []).append(elapsed)
+
+    def report(self) -> Dict[str, Dict]:
+        summary = {}
+        for operation, samples in self.samples.items():
+            ordered = sorted(samples)
+            summary[operation] = {
+                "count": len(ordered),
+                "failures": self.failures.get(operation, 0),
+                "p50_ms": round(percentile(ordered, 50), 1),
+                "p90_ms": round(percentile(ordered, 90), 1),
+                "p99_ms": round(percentile(ordered, 99), 1),
+                "max_ms": round(ordered[-1], 1),
+                "mean_ms": round(statistics.fmean(ordered), 1),
+            }
+        return summary
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class FleetDriver:
+    """Drive the hub and the fleet the way dashboards do"""
+
+    def __init__(
+        self,
+        hub_url: str,
+        fleet: List[FakePi],
+        token: str,
+        concurrency: int,
+    ):
+        self.hub_url = hub_url.rstrip("/")
+        self.fleet = fleet
+        self.headers = {"AUTH": token}
+        self.recorder = LatencyRecorder()
+        self.stale_devices: List[int] = []
+        self.device_failures = 0
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def request(self, operation: str, method: str, url: str, **kwargs):
+        async with self.semaphore:
+            return await self.recorder.timed(
+                operation, self.client.request(method, url, **kwargs)
+            )
+
+    async def discovery(self, timeout: float) -> Optional[float]:
+        """Poll the hub's /pis until it lists the whole fleet.
+
+        Returns the time it took in seconds, or None on timeout.
+        """
+        expected = {pi.hostname for pi in self.fleet}
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            response = await self.request("hub GET /pis", "GET", f"{self.hub_url}/pis")
+            if response is not None:
+                seen = {pi["name"] for pi in response.json()}
+                if expected <= seen:
+                    return time.perf_counter() - start
+            await asyncio.sleep(0.5)
+        return None
+
+    async def status_sweep(self):
+        """One dashboard refresh: every Pi's /status, /tv/status and /tv/current"""
+        paths = ["/status", "/tv/status", "/tv/current"]
+
+        async def one_pi(pi: FakePi):
+            for path in paths:
+                await self.request(
+                    f"pi GET {path}",
+                    "GET",
+                    f"http://{pi.host}:{PI_PORT}{path}",
+                    headers=self.headers,
+                )
+
+        await self.recorder.timed(
+            "fleet status sweep",
+            asyncio.gather(*(one_pi(pi) for pi in self.fleet)),
+        )
+
+    async def aggregated_status(self):
+        """The same refresh through the hub's aggregated /pis/status endpoint"""
+        response = await self.request(
+            "hub GET /pis/status",
+            "GET",
+            f"{self.hub_url}/pis/status",
+            headers=self.headers,
+        )
+        if response is not None:
+            devices = response.json()["devices"]
+            self.stale_devices.append(sum(1 for d in devices if d["stale"]))
+
+    async def group_cycle(self, group_size: int):
+        """Create groups on the hub, play and stop through them, then delete them"""
+        members = list(self.fleet)
+        random.shuffle(members)
+        groups = [
+            members[i : i + group_size] for i in range(0, len(members), group_size)
+        ]
+
+        async def one_group(index: int, pis: List[FakePi]):
+            body = {
+                "name": f"sim-group-{index}",
+                "devices": [{"name": pi.hostname, "host": pi.host} for pi in pis],
+            }
+            response = await self.request(
+                "hub POST /groups", "POST", f"{self.hub_url}/groups", json=body
+            )
+            if response is None:
+                return
+            group_id = response.json()["id"]
+            await self.request("hub GET /groups", "GET", f"{self.hub_url}/groups")
+            await self.request(
+                "hub GET /groups/by-device",
+                "GET",
+                f"{self.hub_url}/groups/by-device/{pis[0].host}",
+            )
+
+            video = random.choice(sorted(pis[0].videos))
+            response = await self.request(
+                "hub POST /groups/{id}/play",
+                "POST",
+                f"{self.hub_url}/groups/{group_id}/play",
+                headers=self.headers,
+                json={"video_name": video},
+            )
+            if response is not None:
+                self.device_failures += response.json()["failed"]
+            await self.request(
+                "hub GET /pis/contact-sheet",
+                "GET",
+                f"{self.hub_url}/pis/contact-sheet",
+                headers=self.headers,
+            )
+            await self.request(
+                "hub POST /groups/{id}/stop",
+                "POST",
+                f"{self.hub_url}/groups/{group_id}/stop",
+                headers=self.headers,
+            )
+            await self.request(
+                "hub DELETE /groups/{id}",
+                "DELETE",
+                f"{self.hub_url}/groups/{group_id}",
+            )
+
+        await asyncio.gather(*(one_group(i, g) for i, g in enumerate(groups)))
+
+
+async def run(args):
+    behaviour = FleetBehaviour(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        password=args.password,
+    )
+    fleet = create_fleet(args.pis, videos=args.videos)
+    sockets = bind_sockets(fleet, PI_PORT)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(fleet, behaviour),
+            log_level="warning",
+            backlog=2048,
+            limit_concurrency=None,
+        )
+    )
+    server_task = asyncio.create_task(server.serve(sockets=sockets))
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    aiozc = infos = None
+    if args.announce:
+        aiozc, infos = await announce_fleet(fleet, PI_PORT)
+
+    driver = FleetDriver(args.hub, fleet, args.password, args.concurrency)
+    report = {"pis": args.pis, "group_size": args.group_size}
+    try:
+        if args.announce:
+            discovered = await driver.discovery(args.discovery_timeout)
+            report["discovery_seconds"] = (
+                round(discovered, 2) if discovered is not None else None
+            )
+        for _ in range(args.rounds):
+            await driver.status_sweep()
+            await driver.aggregated_status()
+            await driver.group_cycle(args.group_size)
+        report["operations"] = driver.recorder.report()
+        report["hub_stale_devices"] = driver.stale_devices
+        report["group_device_failures"] = driver.device_failures
+    finally:
+        await driver.close()
+        if aiozc is not None:
+            await aiozc.async_unregister_all_services()
+            await aiozc.async_close()
+        server.should_exit = True
+        await server_task
+
+    return report
+
+
+def print_report(report: Dict):
+    print(f"Simulated Pis: {report['pis']}, group size: {report['group_size']}")
+    if "discovery_seconds" in report:
+        print(f"Hub discovered the whole fleet in: {report['discovery_seconds']} s")
+    if report.get("hub_stale_devices"):
+        print(f"Stale devices per /pis/status call: {report['hub_stale_devices']}")
+    if "group_device_failures" in report:
+        print(f"Devices failing group commands: {report['group_device_failures']}")
+    header = f"{'operation':<28}{'count':>7}{'fail':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for operation, stats in sorted(report["operations"].items()):
+        print(
+            f"{operation:<28}{stats['count']:>7}{stats['failures']:>6}"
+            f"{stats['p50_ms']:>9}{stats['p90_ms']:>9}{stats['p99_ms']:>9}"
+            f"{stats['max_ms']:>9}"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pis", type=int, default=50, help="Number of simulated Pis")
+    parser.add_argument("--hub", default="http://127.0.0.1:7777", help="Hub base URL")
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--videos", type=int, default=5, help="Videos per Pi")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--password", default="simulator")
+    parser.add_argument(
+        "--no-announce",
+        dest="announce",
+        action="store_false",
+        help="Skip zeroconf announcement and the discovery phase",
+    )
+    parser.add_argument("--discovery-timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)